@@ -0,0 +1,343 @@
+"""
+Benchmark du chemin d'écriture Supabase contre un bouchon PostgREST local
+
+Mesure, pour plusieurs tailles de batch et niveaux de concurrence:
+lignes/s, nombre de requêtes, latence par requête (p50/p95/p99) de
+create_rate_snapshots_batch, ainsi que create_scraper_log / update_scraper_log.
+
+--curves compare sur SQLite le stockage en lignes (rate_snapshots) et en
+courbes compactes (rate_curves): taille des tables et index, temps de
+lecture de la matrice hôtels x dates, et vérifie la conversion.
+
+Usage:
+    python benchmarks/bench_database.py
+    python benchmarks/bench_database.py --rows 20000 --latency-ms 60 --failure-rate 0.02
+    python benchmarks/bench_database.py --json after.json --baseline before.json --max-regression 0.15
+    python benchmarks/bench_database.py --curves --runs 365
+"""
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from typing import List, Dict, Any, Optional
+import argparse
+import io
+import json
+import tempfile
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from common import setup_env, percentile, print_report, write_json
+from fake_postgrest import FakePostgrestServer
+
+
+def make_snapshots(n_rows: int) -> List[Dict[str, Any]]:
+    """Snapshots synthétiques (6 hôtels x 30 dates répétés)"""
+    today = date.today()
+    return [
+        {
+            "hotelId": f"hotel-{i % 6}",
+            "dateCheckin": (today + timedelta(days=1 + (i // 6) % 30)).isoformat(),
+            "price": 100.0 + (i % 80),
+            "currency": "EUR",
+            "available": i % 11 != 0,
+        }
+        for i in range(n_rows)
+    ]
+
+
+def bench_snapshots(client, server: Optional[FakePostgrestServer], n_rows: int, batch_size: int, concurrency: int):
+    """Écrit n_rows snapshots par paquets de batch_size avec concurrency threads"""
+    snapshots = make_snapshots(n_rows)
+    chunks = [snapshots[i:i + batch_size] for i in range(0, n_rows, batch_size)]
+    latencies: List[float] = []
+
+    def write(chunk):
+        started = time.perf_counter()
+        written = client.create_rate_snapshots_batch(chunk, batch_size=batch_size)
+        latencies.append((time.perf_counter() - started) * 1000)
+        return written
+
+    if server:
+        server.reset_stats()
+    with redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            written = sum(pool.map(write, chunks))
+        wall = time.perf_counter() - started
+
+    log = server.request_log if server else []
+    return {
+        "batch": batch_size,
+        "conc": concurrency,
+        "rows": written,
+        "wall_s": round(wall, 2),
+        "rows_per_s": round(written / wall) if wall else 0,
+        "requests": len(log) if server else len(chunks),
+        "failed": sum(1 for r in log if r["status"] >= 400),
+        "conns": len({r["client_port"] for r in log}),
+        "p50_ms": round(percentile(latencies, 50) or 0, 1),
+        "p95_ms": round(percentile(latencies, 95) or 0, 1),
+        "p99_ms": round(percentile(latencies, 99) or 0, 1),
+        "kb_sent": round(sum(r["bytes_in"] for r in log) / 1024),
+    }
+
+
+def bench_logs(client, server: Optional[FakePostgrestServer], n_runs: int):
+    """Cycle create_scraper_log -> update_scraper_log d'un run"""
+    create_ms, update_ms = [], []
+    if server:
+        server.reset_stats()
+    with redirect_stdout(io.StringIO()):
+        for _ in range(n_runs):
+            started = time.perf_counter()
+            log_id = client.create_scraper_log({"status": "running", "hotelId": None, "snapshotsCreated": 0})
+            create_ms.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            client.update_scraper_log(log_id, {"status": "success", "snapshotsCreated": 180})
+            update_ms.append((time.perf_counter() - started) * 1000)
+
+    return [
+        {"op": "create_scraper_log", "calls": n_runs,
+         "p50_ms": round(percentile(create_ms, 50), 1), "p95_ms": round(percentile(create_ms, 95), 1)},
+        {"op": "update_scraper_log", "calls": n_runs,
+         "p50_ms": round(percentile(update_ms, 50), 1), "p95_ms": round(percentile(update_ms, 95), 1)},
+        {"op": "requests", "calls": len(server.request_log) if server else 2 * n_runs,
+         "p50_ms": "", "p95_ms": ""},
+        {"op": "connections", "calls": len({r["client_port"] for r in server.request_log}) if server else "",
+         "p50_ms": "", "p95_ms": ""},
+    ]
+
+
+def make_runs(n_runs: int, n_hotels: int = 6, horizon: int = 30) -> List[List[Dict[str, Any]]]:
+    """Runs synthétiques: n_hotels x horizon snapshots par run (quelques complets / échecs)"""
+    today = date.today()
+    runs = []
+    for run in range(n_runs):
+        snapshots = []
+        for h in range(n_hotels):
+            for d in range(horizon):
+                sold_out = (run + h + d) % 13 == 0
+                failed = (run * 7 + h + d) % 29 == 0
+                snapshots.append({
+                    "hotelId": f"hotel-{h}",
+                    "dateCheckin": (today + timedelta(days=1 + d)).isoformat(),
+                    "price": None if sold_out or failed else round(90 + (run + d * h) % 120 + 0.5 * (d % 2), 2),
+                    "currency": "EUR",
+                    "available": not sold_out and not failed,
+                    "outcome": "sold_out" if sold_out else "timeout" if failed else "success",
+                    "nights": 1,
+                    "adults": 2,
+                })
+        runs.append(snapshots)
+    return runs
+
+
+def _table_kb(conn, tables: List[str]) -> Optional[float]:
+    """Taille des tables et de leurs index (dbstat), None si SQLite compilé sans"""
+    try:
+        placeholders = ", ".join("?" * len(tables))
+        indexes = [r[0] for r in conn.execute(
+            f"SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name IN ({placeholders})", tables
+        )]
+        names = tables + indexes
+        row = conn.execute(
+            f"SELECT SUM(pgsize) FROM dbstat WHERE name IN ({', '.join('?' * len(names))})", names
+        ).fetchone()
+        return round((row[0] or 0) / 1024, 1)
+    except Exception:
+        return None
+
+
+def bench_curves(n_runs: int, repeat: int = 20):
+    """Lignes rate_snapshots vs courbes rate_curves sur les mêmes runs (SQLite)"""
+    from database.sqlite_backend import SQLiteStorage
+    from database.rate_curves import convert_snapshots, curves_from_snapshots, expand_curve, price_matrix
+
+    directory = tempfile.mkdtemp(prefix="bench-curves-")
+    runs = make_runs(n_runs)
+    hotel_ids = sorted({s["hotelId"] for s in runs[0]})
+    with redirect_stdout(io.StringIO()):
+        rows_db = SQLiteStorage(os.path.join(directory, "rows.db"))
+        curves_db = SQLiteStorage(os.path.join(directory, "curves.db"))
+        started = time.perf_counter()
+        for i, run in enumerate(runs):
+            # Un run par jour (la conversion regroupe les snapshots proches en runs)
+            scraped_at = f"{date(2026, 1, 1) + timedelta(days=i)}T06:00:00.000000"
+            for snapshot in run:
+                snapshot["scrapedAt"] = scraped_at
+            rows_db._insert("rate_snapshots", [dict(s, id=f"{i}-{j}") for j, s in enumerate(run)])
+        rows_write = time.perf_counter() - started
+        started = time.perf_counter()
+        for run in runs:
+            curves_db.create_rate_curves_batch(curves_from_snapshots(run))
+        curves_write = time.perf_counter() - started
+        # Conversion depuis la table en lignes, rejouée pour vérifier l'idempotence
+        converted = convert_snapshots(rows_db, page_size=1000)
+        reconverted = convert_snapshots(rows_db, page_size=1000)
+    for db in (rows_db, curves_db):
+        db.conn.execute("VACUUM")
+        # Mode WAL: les pages sont encore dans -wal, reportées dans le fichier avant de le mesurer
+        db.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def read_rows():
+        latest = rows_db.conn.execute('SELECT MAX("scrapedAt") FROM rate_snapshots').fetchone()[0]
+        matrix: Dict[str, Dict[str, Any]] = {}
+        for row in rows_db._select(
+            "rate_snapshots",
+            'SELECT "hotelId", "dateCheckin", price FROM rate_snapshots WHERE "scrapedAt" = ?', (latest,)
+        ):
+            matrix.setdefault(row["hotelId"], {})[row["dateCheckin"]] = row["price"]
+        return matrix
+
+    def read_curves():
+        latest = curves_db.conn.execute('SELECT MAX("scrapedAt") FROM rate_curves').fetchone()[0]
+        return price_matrix(curves_db._select(
+            "rate_curves", 'SELECT * FROM rate_curves WHERE "scrapedAt" = ?', (latest,)
+        ))
+
+    def best_ms(read) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            read()
+            best = min(best, time.perf_counter() - started)
+        return round(best * 1000, 3)
+
+    # Aller-retour: les courbes redonnent exactement les snapshots
+    expanded = {
+        (s["hotelId"], s["dateCheckin"], s["scrapedAt"]): (s["price"], s["available"], s["outcome"])
+        for curve in curves_db.get_rate_curves(hotel_ids)
+        for s in expand_curve(curve)
+    }
+    original = {
+        (s["hotelId"], s["dateCheckin"], s["scrapedAt"]): (s["price"], s["available"], s["outcome"])
+        for run in runs for s in run
+    }
+
+    rows = []
+    for name, db, tables, write_s, read in (
+        ("rate_snapshots", rows_db, ["rate_snapshots"], rows_write, read_rows),
+        ("rate_curves", curves_db, ["rate_curves"], curves_write, read_curves),
+    ):
+        rows.append({
+            "format": name,
+            "rows": db.conn.execute(f"SELECT COUNT(*) FROM {tables[0]}").fetchone()[0],
+            "file_kb": round(os.path.getsize(db.path) / 1024, 1),
+            "table_index_kb": _table_kb(db.conn, tables),
+            "write_s": round(write_s, 2),
+            "matrix_read_ms": best_ms(read),
+        })
+    checks = {
+        "round_trip_ok": expanded == original,
+        "converted": converted,
+        "reconverted": reconverted,
+    }
+    return rows, checks
+
+
+def check_regression(rows: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> bool:
+    """Compare lignes/s à une mesure de référence; False si régression"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["batch"], r["conc"]): r for r in json.load(f)["snapshots"]}
+
+    ok = True
+    for row in rows:
+        ref = baseline.get((row["batch"], row["conc"]))
+        if not ref or not ref["rows_per_s"]:
+            continue
+        ratio = row["rows_per_s"] / ref["rows_per_s"]
+        if ratio < 1 - max_regression:
+            ok = False
+            print(f"❌ Régression batch={row['batch']} conc={row['conc']}: "
+                  f"{ref['rows_per_s']} -> {row['rows_per_s']} lignes/s ({ratio:.0%})")
+    if ok:
+        print(f"✅ Aucune régression > {max_regression:.0%} par rapport à {baseline_path}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark écriture Supabase (bouchon PostgREST)")
+    parser.add_argument("--backend", choices=["supabase", "sqlite"], default="supabase",
+                        help="supabase = SupabaseClient sur le bouchon, sqlite = fichier local")
+    parser.add_argument("--rows", type=int, default=10000, help="Snapshots par scénario")
+    parser.add_argument("--batch-sizes", default="100,500,1000,5000")
+    parser.add_argument("--concurrency", default="1,4")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Latence serveur injectée")
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Part de requêtes en 503")
+    parser.add_argument("--log-runs", type=int, default=50)
+    parser.add_argument("--json", help="Écrire les résultats bruts dans ce fichier")
+    parser.add_argument("--baseline", help="Résultats de référence (JSON) pour détecter une régression")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    parser.add_argument("--curves", action="store_true", help="Comparer rate_snapshots et rate_curves (SQLite)")
+    parser.add_argument("--runs", type=int, default=200, help="Runs simulés avec --curves (6 hôtels x 30 dates)")
+    args = parser.parse_args()
+
+    if args.curves:
+        setup_env(STORAGE_BACKEND="sqlite")
+        curve_rows, checks = bench_curves(args.runs)
+        print_report(f"Lignes vs courbes ({args.runs} runs)", curve_rows, [
+            "format", "rows", "file_kb", "table_index_kb", "write_s", "matrix_read_ms",
+        ])
+        print(f"\n🔁 Aller-retour courbes -> snapshots: {'✅' if checks['round_trip_ok'] else '❌'}, "
+              f"conversion: {checks['converted']} courbe(s), rejouée: {checks['reconverted']}")
+        write_json(args.json, {"params": vars(args), "curves": curve_rows, "checks": checks})
+        if not checks["round_trip_ok"] or checks["reconverted"]:
+            sys.exit(1)
+        return
+
+    server = None
+    if args.backend == "supabase":
+        server = FakePostgrestServer(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            failure_rate=args.failure_rate,
+        ).start()
+
+    try:
+        if server:
+            setup_env(SUPABASE_URL=server.base_url)
+            from database.supabase_client import SupabaseClient
+            with redirect_stdout(io.StringIO()):
+                client = SupabaseClient()
+            print(f"🧪 Faux PostgREST sur {server.base_url} "
+                  f"(latence {args.latency_ms}±{args.jitter_ms} ms, échecs {args.failure_rate:.0%})")
+        else:
+            db_path = os.path.join(tempfile.mkdtemp(prefix="bench-db-"), "bench.db")
+            setup_env(STORAGE_BACKEND="sqlite", SQLITE_PATH=db_path)
+            from database.sqlite_backend import SQLiteStorage
+            with redirect_stdout(io.StringIO()):
+                client = SQLiteStorage(db_path)
+            print(f"🧪 SQLite local ({db_path})")
+
+        snapshot_rows = [
+            bench_snapshots(client, server, args.rows, int(batch), int(conc))
+            for batch in args.batch_sizes.split(",")
+            for conc in args.concurrency.split(",")
+        ]
+        log_rows = bench_logs(client, server, args.log_runs)
+    finally:
+        if server:
+            server.stop()
+
+    print_report(f"create_rate_snapshots_batch ({args.rows} lignes)", snapshot_rows, [
+        "batch", "conc", "rows", "wall_s", "rows_per_s", "requests", "failed", "conns",
+        "p50_ms", "p95_ms", "p99_ms", "kb_sent",
+    ])
+    print_report("scraper_logs", log_rows, ["op", "calls", "p50_ms", "p95_ms"])
+
+    write_json(args.json, {
+        "params": vars(args),
+        "snapshots": snapshot_rows,
+        "logs": log_rows,
+    })
+
+    if args.baseline and not check_regression(snapshot_rows, args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark du temps d'import et du démarrage à froid de l'API
+
+Pour chaque module: durée de `python -c "import <module>"` dans un process
+neuf (médiane de --repeat essais), et les imports les plus coûteux selon
+`python -X importtime`. Le démarrage de l'API est mesuré du lancement de
+src/api/server.py jusqu'à la première réponse 200 de /health.
+
+Usage:
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 10 --top 15 --json import.json
+"""
+from typing import List, Dict, Any, Tuple
+import argparse
+import socket
+import statistics
+import subprocess
+import time
+import urllib.request
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from common import ROOT_DIR, SRC_DIR, print_report, write_json
+
+DEFAULT_MODULES = "config,observability,database,alerts,scrapers,scheduler.run_price_scraper,api.server"
+
+
+def _env() -> Dict[str, str]:
+    """Environnement des process mesurés: src/ dans le path, jamais la vraie base"""
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])),
+        "SUPABASE_URL": "http://127.0.0.1:9",
+        "SUPABASE_SERVICE_KEY": "bench.bench.bench",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    })
+    return env
+
+
+def time_import(module: str, repeat: int) -> Dict[str, Any]:
+    """Durée médiane (ms) d'un process qui importe uniquement le module"""
+    timings = []
+    error = ""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-c", f"import {module}"],
+            cwd=ROOT_DIR, env=_env(), capture_output=True, text=True,
+        )
+        timings.append((time.perf_counter() - started) * 1000)
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "exit != 0"
+            break
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "error": error,
+    }
+
+
+def import_profile(module: str, top: int) -> List[Tuple[str, int]]:
+    """Imports les plus coûteux (temps cumulé, µs) selon -X importtime"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT_DIR, env=_env(), capture_output=True, text=True,
+    )
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self_us | cumulative_us | <indentation>module"
+        _, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((name[1:], int(cumulative_us)))
+    # Seuls les imports de premier niveau (non indentés) sont additifs
+    top_level = [(name, us) for name, us in entries if not name.startswith(" ")]
+    return sorted(top_level, key=lambda e: e[1], reverse=True)[:top]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def api_cold_start(repeat: int, timeout: float = 30.0) -> Dict[str, Any]:
+    """Lance l'API et mesure le temps jusqu'au premier /health en 200"""
+    timings = []
+    for _ in range(repeat):
+        port = _free_port()
+        env = _env()
+        env.update({"PORT": str(port), "API_HOST": "127.0.0.1"})
+        started = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, os.path.join(SRC_DIR, "api", "server.py")],
+            cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while time.perf_counter() - started < timeout:
+                if proc.poll() is not None:
+                    return {"error": f"l'API s'est arrêtée (code {proc.returncode})"}
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as resp:
+                        if resp.status == 200:
+                            timings.append((time.perf_counter() - started) * 1000)
+                            break
+                except OSError:
+                    time.sleep(0.02)
+            else:
+                return {"error": f"/health sans réponse après {timeout}s"}
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    return {
+        "median_ms": round(statistics.median(timings), 1),
+        "min_ms": round(min(timings), 1),
+        "runs": len(timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark temps d'import / démarrage de l'API")
+    parser.add_argument("--modules", default=DEFAULT_MODULES, help="Modules à importer (séparés par des virgules)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="Imports les plus coûteux affichés par module")
+    parser.add_argument("--skip-api", action="store_true", help="Ne pas mesurer le démarrage de l'API")
+    parser.add_argument("--json", help="Écrire les résultats bruts dans ce fichier")
+    args = parser.parse_args()
+
+    modules = [m.strip() for m in args.modules.split(",") if m.strip()]
+    baseline = time_import("sys", args.repeat)
+    print(f"🐍 Interpréteur seul: {baseline['median_ms']} ms")
+
+    rows = []
+    profiles = {}
+    for module in modules:
+        row = time_import(module, args.repeat)
+        row["over_python_ms"] = round(row["median_ms"] - baseline["median_ms"], 1)
+        rows.append(row)
+        if not row["error"]:
+            profiles[module] = import_profile(module, args.top)
+
+    print_report(f"Import dans un process neuf (médiane de {args.repeat})", rows,
+                 ["module", "median_ms", "min_ms", "over_python_ms", "error"])
+    for module, entries in profiles.items():
+        print_report(f"Imports les plus coûteux: {module}", [
+            {"import": name, "cumulative_ms": round(us / 1000, 1)} for name, us in entries
+        ], ["import", "cumulative_ms"])
+
+    api = {}
+    if not args.skip_api:
+        api = api_cold_start(args.repeat)
+        if api.get("error"):
+            print(f"\n❌ Démarrage API: {api['error']}")
+        else:
+            print(f"\n🚀 Démarrage API jusqu'à /health: {api['median_ms']} ms "
+                  f"(min {api['min_ms']} ms, {api['runs']} essais)")
+
+    write_json(args.json, {
+        "params": vars(args),
+        "python_ms": baseline["median_ms"],
+        "imports": rows,
+        "profiles": {m: [{"import": n, "cumulative_us": us} for n, us in e] for m, e in profiles.items()},
+        "api": api,
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark et vérification de la lecture des prix (scrapers/price_parser.py)
+
+Trois jeux de cas:
+    corpus      textes réels ou plausibles (benchmarks/fixtures/price_corpus.json)
+    generated   montants aléatoires formatés dans plusieurs locales, relus
+                (aller-retour formatage -> parsing, graine fixe)
+    legacy      mêmes cas passés à l'ancienne expression du scraper
+
+Affiche la justesse et le temps par appel; exit 1 si un cas du corpus ou
+un cas généré est mal lu par price_parser.
+
+Usage:
+    python benchmarks/bench_price_parser.py
+    python benchmarks/bench_price_parser.py --generated 5000 --repeat 20 --json parser.json
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import json
+import random
+import re
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from common import setup_env, print_report, write_json
+
+setup_env()
+from scrapers.price_parser import parse_amount, parse_price
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "price_corpus.json")
+
+# Expression utilisée par le scraper avant price_parser (référence)
+LEGACY_PATTERN = re.compile(r'[\d\s]+(?:[.,]\d+)?')
+
+# Locale -> (séparateur de milliers, séparateur décimal, gabarit avec devise)
+LOCALES = {
+    "fr": (" ", ",", "{amount}\xa0€", "EUR"),
+    "de": (".", ",", "{amount} €", "EUR"),
+    "en": (",", ".", "€{amount}", "EUR"),
+    "us": (",", ".", "US${amount}", "USD"),
+    "gb": (",", ".", "£{amount}", "GBP"),
+    "ch": ("'", ".", "CHF {amount}", "CHF"),
+    "pl": ("\xa0", ",", "{amount} zł", "PLN"),
+}
+
+
+def legacy_amount(text: str) -> Optional[float]:
+    match = LEGACY_PATTERN.search(text.replace('\xa0', ''))
+    if not match:
+        return None
+    try:
+        return float(match.group().replace(' ', '').replace(',', '.'))
+    except ValueError:
+        return None
+
+
+def format_amount(value: float, thousands: str, decimal: str, cents: bool) -> str:
+    integer, fraction = f"{value:.2f}".split(".")
+    groups = []
+    while len(integer) > 3:
+        groups.insert(0, integer[-3:])
+        integer = integer[:-3]
+    groups.insert(0, integer)
+    text = thousands.join(groups)
+    return f"{text}{decimal}{fraction}" if cents else text
+
+
+def generated_cases(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Montants aléatoires (1 à 99 999, avec ou sans centimes) dans chaque locale"""
+    rng = random.Random(seed)
+    cases = []
+    for i in range(count):
+        locale = list(LOCALES)[i % len(LOCALES)]
+        thousands, decimal, template, currency = LOCALES[locale]
+        cents = rng.random() < 0.5
+        value = round(rng.uniform(1, 99999), 2) if cents else float(rng.randint(1, 99999))
+        text = template.format(amount=format_amount(value, thousands, decimal, cents))
+        cases.append({"text": text, "amount": value, "currency": currency, "locale": locale})
+    return cases
+
+
+def check(cases: List[Dict[str, Any]]) -> Tuple[int, List[Dict[str, Any]]]:
+    """Cas bien lus par price_parser (montant, devise, taxes si attendues)"""
+    failures = []
+    for case in cases:
+        parsed = parse_price(case["text"])
+        got = {
+            "amount": parsed.amount if parsed else None,
+            "currency": parsed.currency if parsed else None,
+        }
+        ok = got["amount"] == case["amount"] and (parsed is None or got["currency"] == case["currency"])
+        if "taxesIncluded" in case:
+            got["taxesIncluded"] = parsed.taxes_included if parsed else None
+            ok = ok and got["taxesIncluded"] == case["taxesIncluded"]
+        if not ok:
+            failures.append({"text": case["text"], "expected": case, "got": got})
+    return len(cases) - len(failures), failures
+
+
+def accuracy(cases: List[Dict[str, Any]], parse: Callable[[str], Optional[float]]) -> int:
+    return sum(1 for case in cases if parse(case["text"]) == case["amount"])
+
+
+def time_per_call(cases: List[Dict[str, Any]], parse: Callable[[str], Any], repeat: int) -> float:
+    """Meilleur temps moyen par appel (µs) sur repeat passes"""
+    texts = [case["text"] for case in cases]
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in texts:
+            parse(text)
+        best = min(best, (time.perf_counter() - started) / len(texts))
+    return round(best * 1e6, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la lecture des prix")
+    parser.add_argument("--generated", type=int, default=2000, help="Nombre de cas générés")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=10, help="Passes de mesure (meilleure retenue)")
+    parser.add_argument("--json", help="Écrire les résultats bruts dans ce fichier")
+    args = parser.parse_args()
+
+    with open(CORPUS_PATH, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+    generated = generated_cases(args.generated, args.seed)
+
+    rows = []
+    all_failures = {}
+    for name, cases in (("corpus", corpus), ("generated", generated)):
+        correct, failures = check(cases)
+        all_failures[name] = failures
+        rows.append({
+            "cases": name,
+            "n": len(cases),
+            "parser_ok": correct,
+            "legacy_ok": accuracy(cases, legacy_amount),
+            "parser_us": time_per_call(cases, parse_price, args.repeat),
+            "amount_us": time_per_call(cases, parse_amount, args.repeat),
+            "legacy_us": time_per_call(cases, legacy_amount, args.repeat),
+        })
+
+    print_report("Lecture des prix (price_parser vs ancienne expression)", rows, [
+        "cases", "n", "parser_ok", "legacy_ok", "parser_us", "amount_us", "legacy_us",
+    ])
+
+    failed = [f for failures in all_failures.values() for f in failures]
+    for failure in failed[:20]:
+        print(f"❌ {failure['text']!r}: attendu {failure['expected']}, lu {failure['got']}")
+
+    write_json(args.json, {"params": vars(args), "results": rows, "failures": all_failures})
+    if failed:
+        print(f"\n❌ {len(failed)} prix mal lu(s)")
+        sys.exit(1)
+    print("\n✅ Tous les prix sont lus correctement")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Benchmark du pipeline de scraping contre le faux serveur Booking
+
+Lance scrape_hotel_prices / scrape_hotel_info sur les variantes de page
+(testid, fallback, complet, lente, CAPTCHA, instable) avec les délais à zéro et mesure:
+pages/s, temps jusqu'au sélecteur, coût de lancement du navigateur, mémoire.
+
+Usage:
+    python benchmarks/bench_scrapers.py
+    python benchmarks/bench_scrapers.py --variants testid,slow --dates 30 --json bench.json
+    python benchmarks/bench_scrapers.py --variants testid --proxies ok,slow,blocked
+    python benchmarks/bench_scrapers.py --variants testid,soldout --los 1,2,3 --adults 1,2
+    python benchmarks/bench_scrapers.py --variants testid,fallback,slow --session-delay 3 --parallel 3
+    python benchmarks/bench_scrapers.py --variants testid,slow --tabs 3
+
+--session-delay lance une session complète (scrape_multiple_hotels) avec ce
+délai entre pages d'une même identité: le temps de session est comparé à
+la somme des temps de page (1.0 = aucune attente à vide).
+"""
+from contextlib import ExitStack
+from datetime import date, timedelta
+import argparse
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from common import setup_env, percentile, MemorySampler, stage_summary, counter_total, print_report, write_json
+from fake_booking_server import FakeBookingServer, FakeBookingHandler, VARIANTS
+from fake_proxy import FakeProxy, MODES as PROXY_MODES
+
+
+def bench_prices(server: FakeBookingServer, variant: str, n_dates: int):
+    """Scrape une variante sur n_dates et retourne la ligne de rapport"""
+    from scrapers.price_scraper import scrape_hotel_prices
+    from scrapers.run_stats import HotelRunStats
+    from observability import registry
+
+    hotel = {"id": f"bench-{variant}", "name": f"bench-{variant}", "url": server.hotel_url(variant)}
+    dates = [date.today() + timedelta(days=i) for i in range(1, n_dates + 1)]
+    run_stats = HotelRunStats(hotel["id"], hotel["name"])
+
+    with MemorySampler() as memory:
+        started = time.perf_counter()
+        snapshots = scrape_hotel_prices(hotel, run_stats=run_stats, dates=dates)
+        wall = time.perf_counter() - started
+
+    stages = stage_summary(registry, hotel=hotel["name"])
+    timings = list(run_stats.date_timings.values())
+    return {
+        "variant": variant,
+        "cells": len(snapshots),
+        "pages": run_stats.pages_loaded,
+        "pruned": run_stats.pruned,
+        "priced": sum(1 for s in snapshots if s.get("price") is not None),
+        "rooms": sum(len(s.get("rooms") or []) for s in snapshots),
+        "failed": len(run_stats.failed_dates),
+        "retries": run_stats.retries,
+        "wall_s": round(wall, 2),
+        "pages_per_s": round(run_stats.pages_loaded / wall, 2) if wall else 0,
+        "p50_page_ms": percentile(timings, 50),
+        "p95_page_ms": percentile(timings, 95),
+        "first_price_ms": stages.get("first_price", {}).get("mean_ms"),
+        "consent": int(counter_total(registry, "scrape_consent_clicks_total", hotel=hotel["name"])),
+        "state_reused": int(counter_total(registry, "browser_state_reused_total", hotel=hotel["name"])),
+        "recycles": int(counter_total(registry, "browser_recycles_total", hotel=hotel["name"])),
+        "goto_ms": stages.get("goto", {}).get("mean_ms"),
+        "selector_ms": stages.get("selector_wait", {}).get("mean_ms"),
+        "extract_ms": stages.get("extraction", {}).get("mean_ms"),
+        "tab_wait_ms": stages.get("tab_wait", {}).get("mean_ms"),
+        "tab_heap_mb": run_stats.peak_tab_heap_mb,
+        "kb": round(run_stats.bytes_transferred / 1024, 1),
+        "peak_rss_mb": round(memory.peak_mb, 1),
+    }
+
+
+def bench_session(server: FakeBookingServer, variants, parallel: int):
+    """Session complète sur les variantes (délais et parallélisme de l'environnement)"""
+    from scrapers.price_scraper import scrape_multiple_hotels
+    from observability import registry
+
+    hotels = [{"id": f"session-{v}", "name": f"session-{v}", "url": server.hotel_url(v)} for v in variants]
+    with MemorySampler() as memory:
+        started = time.perf_counter()
+        stats, snapshots = scrape_multiple_hotels(hotels)
+        wall = time.perf_counter() - started
+
+    runs = stats["hotel_runs"]
+    page_s = sum(sum(run["dateTimings"].values()) for run in runs) / 1000
+    stages = stage_summary(registry)
+    waited_s = sum(
+        stages.get(stage, {}).get("mean_ms", 0) * stages.get(stage, {}).get("count", 0)
+        for stage in ("delay", "refine_delay")
+    ) / 1000
+    return {
+        "hotels": len(hotels),
+        "parallel": parallel,
+        "snapshots": len(snapshots),
+        "pages": sum(run["pagesLoaded"] for run in runs),
+        "wall_s": round(wall, 2),
+        "page_time_s": round(page_s, 2),
+        "waited_s": round(waited_s, 2),
+        "busy_ratio": round(page_s / wall, 2) if wall else 0,
+        "peak_rss_mb": round(memory.peak_mb, 1),
+    }
+
+
+def bench_info(server: FakeBookingServer, variant: str):
+    """Mesure scrape_hotel_info sur une variante"""
+    from scrapers.hotel_info_scraper import scrape_hotel_info
+
+    with MemorySampler() as memory:
+        started = time.perf_counter()
+        info = scrape_hotel_info(server.hotel_url(variant))
+        wall = time.perf_counter() - started
+
+    return {
+        "variant": variant,
+        "ok": bool(info and info.get("name")),
+        "wall_s": round(wall, 2),
+        "peak_rss_mb": round(memory.peak_mb, 1),
+    }
+
+
+def proxy_report(proxies):
+    """Santé vue par le pool pour chaque faux proxy"""
+    if not proxies:
+        return []
+    from scrapers.proxy_pool import get_proxy_pool
+
+    pool = get_proxy_pool()
+    health = {row["proxy"]: row for row in pool.snapshot()} if pool else {}
+    modes = {p.url.split("://", 1)[1]: p.mode for p in proxies}
+    return [dict(health[label], mode=mode) for label, mode in modes.items() if label in health]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des scrapers (hors-ligne)")
+    parser.add_argument("--variants", default="testid,fallback,soldout,slow,flaky",
+                        help=f"Variantes parmi: {', '.join(VARIANTS)}")
+    parser.add_argument("--dates", type=int, default=10, help="Dates par variante")
+    parser.add_argument("--los", default="1", help="Durées de séjour (nuits), ex: 1,2,3")
+    parser.add_argument("--adults", default="2", help="Occupations (adultes), ex: 1,2")
+    parser.add_argument("--slow-ms", type=int, default=1500, help="Latence de la variante slow")
+    parser.add_argument("--skip-info", action="store_true", help="Ne pas mesurer scrape_hotel_info")
+    parser.add_argument("--proxies", default="",
+                        help=f"Faux proxies à mettre dans le pool, parmi: {', '.join(PROXY_MODES)}")
+    parser.add_argument("--proxy-latency-ms", type=int, default=800, help="Latence des proxies slow")
+    parser.add_argument("--no-browser-state", action="store_true",
+                        help="Contextes sans cookies sauvegardés (comparaison avant/après)")
+    parser.add_argument("--session-delay", type=float, default=0,
+                        help="Session complète avec ce délai (s) entre pages d'une identité")
+    parser.add_argument("--parallel", type=int, default=3, help="Hôtels en parallèle (avec --session-delay)")
+    parser.add_argument("--domain-rate", type=float, default=0,
+                        help="Pages/minute vers le domaine, toutes identités (0 = illimité)")
+    parser.add_argument("--tabs", type=int, default=1, help="Onglets chargés en pipeline par contexte")
+    parser.add_argument("--json", help="Écrire les résultats bruts dans ce fichier")
+    args = parser.parse_args()
+
+    variants = [v.strip() for v in args.variants.split(",") if v.strip()]
+    proxy_modes = [m.strip() for m in args.proxies.split(",") if m.strip()]
+
+    with ExitStack() as stack:
+        proxies = [
+            stack.enter_context(FakeProxy(mode=mode, latency_ms=args.proxy_latency_ms))
+            for mode in proxy_modes
+        ]
+        setup_env(
+            PROXY_LIST=",".join(p.url for p in proxies),
+            BROWSER_STATE_ENABLED="false" if args.no_browser_state else "true",
+            SCRAPE_LENGTHS_OF_STAY=args.los,
+            SCRAPE_ADULTS=args.adults,
+            SCRAPE_HORIZON_DAYS=args.dates,
+            MIN_DELAY_SECONDS=args.session_delay,
+            MAX_DELAY_SECONDS=args.session_delay,
+            SCRAPE_PARALLEL_HOTELS=args.parallel,
+            POLITENESS_DOMAIN_RATE_PER_MINUTE=args.domain_rate,
+            SCRAPE_TABS=args.tabs,
+            SCRAPE_MAX_TABS=max(args.tabs, 1),
+        )
+        from observability import registry
+
+        server = stack.enter_context(FakeBookingServer(slow_ms=args.slow_ms))
+        print(f"🧪 Faux Booking sur {server.base_url}")
+        for proxy in proxies:
+            print(f"🧪 Faux proxy ({proxy.mode}) sur {proxy.url}")
+
+        if args.session_delay > 0:
+            session_row = bench_session(server, variants, args.parallel)
+            print_report("Session (ordonnanceur de politesse)", [session_row], [
+                "hotels", "parallel", "snapshots", "pages", "wall_s", "page_time_s", "waited_s", "busy_ratio",
+                "peak_rss_mb",
+            ])
+            write_json(args.json, {"params": vars(args), "session": session_row})
+            return
+
+        price_rows = [bench_prices(server, variant, args.dates) for variant in variants]
+        info_rows = [] if args.skip_info else [bench_info(server, v) for v in variants]
+        proxy_rows = proxy_report(proxies)
+        visits = {
+            "consent_banners": FakeBookingHandler.consent_banners,
+            "returning_visits": FakeBookingHandler.returning_visits,
+        }
+
+    launch = stage_summary(registry).get("browser_launch", {})
+
+    print_report("Scraping des prix", price_rows, [
+        "variant", "cells", "pages", "pruned", "priced", "rooms", "failed", "retries", "wall_s", "pages_per_s", "p50_page_ms",
+        "p95_page_ms", "first_price_ms", "consent", "state_reused", "recycles", "goto_ms", "selector_ms", "extract_ms",
+        "tab_wait_ms", "tab_heap_mb", "kb", "peak_rss_mb",
+    ])
+    if info_rows:
+        print_report("Scraping des infos", info_rows, ["variant", "ok", "wall_s", "peak_rss_mb"])
+    if proxy_rows:
+        print_report("Santé des proxies", proxy_rows, [
+            "mode", "proxy", "requests", "successes", "blocks", "failures", "latencyMs", "score", "cooldownSeconds",
+        ])
+    print(f"\n🍪 Bandeaux cookies servis: {visits['consent_banners']}, "
+          f"visites avec consentement déjà donné: {visits['returning_visits']}")
+    print(f"\n🚀 Lancement navigateur: {launch.get('mean_ms')} ms en moyenne "
+          f"({int(launch.get('count', 0))} lancements)")
+
+    write_json(args.json, {
+        "prices": price_rows,
+        "info": info_rows,
+        "proxies": proxy_rows,
+        "visits": visits,
+        "browser_launch_ms": launch.get("mean_ms"),
+    })
+
+
+if __name__ == "__main__":
+    main()
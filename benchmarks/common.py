@@ -0,0 +1,169 @@
+"""
+Utilitaires partagés par les benchmarks (environnement, mémoire, rapport)
+"""
+from typing import List, Dict, Any, Optional
+import json
+import tempfile
+import threading
+import time
+import sys
+import os
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+# Même calcul que les agrégats de scraper_hotel_logs (réexporté pour les benchmarks)
+from database.log_stats import percentile
+
+
+def setup_env(**overrides):
+    """
+    Prépare l'environnement avant d'importer le code du projet:
+    src/ dans le path, identifiants factices, délais à zéro
+
+    Les identifiants Supabase sont toujours forcés (jamais la vraie base
+    depuis un benchmark); les autres valeurs ne remplacent pas l'env existant.
+    """
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+    forced = {
+        "SUPABASE_URL": "http://127.0.0.1:9",
+        "SUPABASE_SERVICE_KEY": "bench.bench.bench",
+    }
+    forced.update({k: str(v) for k, v in overrides.items()})
+    defaults = {
+        "MIN_DELAY_SECONDS": "0",
+        "MAX_DELAY_SECONDS": "0",
+        "PAGE_SETTLE_MIN_SECONDS": "0",
+        "PAGE_SETTLE_MAX_SECONDS": "0",
+        "DATE_RETRY_BACKOFF_SECONDS": "0",
+        "HOTEL_RESCHEDULE_DELAY_SECONDS": "0",
+        "SCRAPE_REFINE_DELAY_MIN_SECONDS": "0",
+        "SCRAPE_REFINE_DELAY_MAX_SECONDS": "0",
+        "POLITENESS_DOMAIN_RATE_PER_MINUTE": "0",
+        # Cookies des identités gardés le temps du benchmark, jamais dans data/
+        "BROWSER_STATE_DIR": tempfile.mkdtemp(prefix="bench-browser-state-"),
+        "ALERTS_ENABLED": "false",
+        "STRUCTURED_LOGS": "false",
+    }
+    os.environ.update(forced)
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return 0
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    try:
+        for tid in os.listdir(task_dir):
+            try:
+                with open(f"{task_dir}/{tid}/children", "r") as f:
+                    children.extend(int(c) for c in f.read().split())
+            except (FileNotFoundError, ProcessLookupError):
+                continue
+    except (FileNotFoundError, PermissionError):
+        pass
+    return children
+
+
+def process_tree_rss_mb(pid: Optional[int] = None) -> float:
+    """RSS cumulée du process et de tous ses descendants (Linux /proc)"""
+    root = pid or os.getpid()
+    total_kb = 0
+    stack = [root]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        total_kb += _rss_kb(current)
+        stack.extend(_children(current))
+    return total_kb / 1024
+
+
+class MemorySampler:
+    """Échantillonne la RSS de l'arbre de process dans un thread"""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.samples.append(process_tree_rss_mb())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def peak_mb(self) -> float:
+        return max(self.samples) if self.samples else 0.0
+
+
+def stage_summary(registry, **label_filter) -> Dict[str, Dict[str, float]]:
+    """Moyenne et nombre d'observations par étape (histogramme des stages)"""
+    summary: Dict[str, Dict[str, float]] = {}
+    series = registry.histograms.get("scrape_stage_duration_seconds", {})
+    for key, hist in series.items():
+        labels = dict(key)
+        if any(labels.get(k) != str(v) for k, v in label_filter.items()):
+            continue
+        stage = labels.get("stage", "?")
+        entry = summary.setdefault(stage, {"count": 0, "sum": 0.0})
+        entry["count"] += hist["count"]
+        entry["sum"] += hist["sum"]
+    for entry in summary.values():
+        entry["mean_ms"] = round(entry["sum"] / entry["count"] * 1000, 1) if entry["count"] else 0.0
+    return summary
+
+
+def counter_total(registry, name: str, **label_filter) -> float:
+    """Somme d'un compteur sur les séries qui portent ces labels"""
+    total = 0.0
+    for key, value in registry.counters.get(name, {}).items():
+        labels = dict(key)
+        if all(labels.get(k) == str(v) for k, v in label_filter.items()):
+            total += value
+    return total
+
+
+def print_report(title: str, rows: List[Dict[str, Any]], columns: List[str]):
+    """Affiche un tableau aligné"""
+    print(f"\n📊 {title}")
+    widths = {c: max([len(c)] + [len(str(r.get(c, ""))) for r in rows]) for c in columns}
+    print("  " + "  ".join(c.ljust(widths[c]) for c in columns))
+    print("  " + "  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        print("  " + "  ".join(str(row.get(c, "")).ljust(widths[c]) for c in columns))
+
+
+def write_json(path: Optional[str], payload: Dict[str, Any]):
+    """Écrit le résultat brut (comparaison entre deux commits)"""
+    if not path:
+        return
+    payload = dict(payload, generatedAt=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Résultats écrits dans {path}")
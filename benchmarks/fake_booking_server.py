@@ -0,0 +1,229 @@
+"""
+Faux serveur Booking.com pour les benchmarks hors-ligne
+
+Pages servies (fixtures enregistrées dans benchmarks/fixtures):
+    /hotel/fr/testid.fr.html    prix via [data-testid="price-and-discounted-price"], 3 offres
+    /hotel/fr/fallback.fr.html  prix uniquement via .prco-valign-middle-helper
+    /hotel/fr/soldout.fr.html   aucun prix (complet)
+    /hotel/fr/slow.fr.html      comme testid, avec une latence serveur (--slow-ms)
+    /hotel/fr/captcha.fr.html   page de CAPTCHA à chaque requête
+    /hotel/fr/flaky.fr.html     CAPTCHA au premier passage d'une date, testid ensuite
+    /images/main.png            image principale
+
+Tant que le cookie de consentement est absent, les fiches affichent le
+bandeau cookies OneTrust (le bouton "Accepter" pose le cookie).
+
+Usage: python benchmarks/fake_booking_server.py --port 8765
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from datetime import date, timedelta
+from typing import Dict, Optional
+import threading
+import struct
+import time
+import zlib
+import os
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# variante -> fichier fixture
+VARIANTS = {
+    "testid": "hotel_testid.html",
+    "fallback": "hotel_fallback.html",
+    "soldout": "hotel_soldout.html",
+    "slow": "hotel_testid.html",
+    "captcha": "hotel_captcha.html",
+    "flaky": "hotel_testid.html",
+}
+
+
+# Cookie posé par le bouton "Accepter" du bandeau OneTrust
+CONSENT_COOKIE = "OptanonAlertBoxClosed"
+CONSENT_BANNER = (
+    '<div id="onetrust-banner-sdk">'
+    '<button id="onetrust-accept-btn-handler" onclick="document.cookie=\''
+    + CONSENT_COOKIE + '=1; path=/; max-age=31536000\'; this.parentNode.remove();">Accepter</button>'
+    '</div>'
+)
+
+
+def _make_png(width: int = 320, height: int = 200) -> bytes:
+    """Image PNG générée (dégradé) pour la photo principale"""
+    raw = b"".join(
+        b"\x00" + bytes(
+            value
+            for x in range(width)
+            for value in (x * 255 // width, y * 255 // height, 128)
+        )
+        for y in range(height)
+    )
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+        )
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+MAIN_IMAGE = _make_png()
+
+
+def price_for(checkin: Optional[str], base: int = 120) -> int:
+    """Prix déterministe selon la date (varie sur la semaine et le mois)"""
+    if not checkin:
+        return base
+    day = date.fromisoformat(checkin)
+    weekend = 40 if day.weekday() in (4, 5) else 0
+    return base + weekend + (day.day % 7) * 5
+
+
+def stay_price_for(checkin: Optional[str], checkout: Optional[str] = None, adults: int = 2) -> int:
+    """Prix du séjour: somme des nuits, -10 par nuit pour un adulte seul"""
+    if not checkin or not checkout:
+        return price_for(checkin) - (10 if adults < 2 else 0)
+    first = date.fromisoformat(checkin)
+    nights = max(1, (date.fromisoformat(checkout) - first).days)
+    return sum(
+        price_for((first + timedelta(days=i)).isoformat()) - (10 if adults < 2 else 0)
+        for i in range(nights)
+    )
+
+
+def _load_fixtures() -> Dict[str, str]:
+    fixtures = {}
+    for variant, filename in VARIANTS.items():
+        with open(os.path.join(FIXTURES_DIR, filename), "r", encoding="utf-8") as f:
+            fixtures[variant] = f.read()
+    return fixtures
+
+
+class FakeBookingHandler(BaseHTTPRequestHandler):
+    """Handler HTTP: rend la fixture de la variante avec les prix de la date"""
+
+    fixtures: Dict[str, str] = {}
+    slow_ms: int = 1500
+    request_count = 0
+    bytes_sent = 0
+    flaky_seen: set = set()
+    consent_banners = 0
+    returning_visits = 0
+    _lock = threading.Lock()
+
+    def log_message(self, format, *args):
+        # Silencieux: le benchmark mesure, il ne logge pas chaque requête
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with FakeBookingHandler._lock:
+            FakeBookingHandler.request_count += 1
+            FakeBookingHandler.bytes_sent += len(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+
+        if parsed.path == "/images/main.png":
+            self._send(200, MAIN_IMAGE, "image/png")
+            return
+
+        variant = os.path.basename(parsed.path).split(".")[0]
+        if not parsed.path.startswith("/hotel/") or variant not in self.fixtures:
+            self._send(404, b"Not found", "text/plain")
+            return
+
+        if variant == "slow":
+            time.sleep(self.slow_ms / 1000)
+
+        query = parse_qs(parsed.query)
+        checkin = (query.get("checkin") or [None])[0]
+        checkout = (query.get("checkout") or [None])[0]
+        adults = int((query.get("group_adults") or ["2"])[0])
+        if variant == "flaky":
+            with FakeBookingHandler._lock:
+                first_time = checkin not in FakeBookingHandler.flaky_seen
+                FakeBookingHandler.flaky_seen.add(checkin)
+            if first_time:
+                variant = "captcha"
+
+        price = stay_price_for(checkin, checkout, adults)
+        html = self.fixtures[variant] \
+            .replace("{{PRICE}}", str(price)) \
+            .replace("{{ORIGINAL_PRICE}}", str(int(price * 1.15))) \
+            .replace("{{PRICE_FLEX}}", str(price + 12)) \
+            .replace("{{PRICE_SUITE}}", str(price + 85))
+        if variant != "captcha":
+            returning = CONSENT_COOKIE in (self.headers.get("Cookie") or "")
+            with FakeBookingHandler._lock:
+                if returning:
+                    FakeBookingHandler.returning_visits += 1
+                else:
+                    FakeBookingHandler.consent_banners += 1
+            if not returning:
+                html = html.replace("</body>", f"{CONSENT_BANNER}</body>")
+        self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+
+
+class FakeBookingServer:
+    """Serveur démarré dans un thread (context manager)"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, slow_ms: int = 1500):
+        FakeBookingHandler.fixtures = _load_fixtures()
+        FakeBookingHandler.slow_ms = slow_ms
+        FakeBookingHandler.flaky_seen = set()
+        FakeBookingHandler.consent_banners = 0
+        FakeBookingHandler.returning_visits = 0
+        self.httpd = ThreadingHTTPServer((host, port), FakeBookingHandler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def hotel_url(self, variant: str) -> str:
+        return f"{self.base_url}/hotel/fr/{variant}.fr.html"
+
+    def start(self) -> "FakeBookingServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Faux serveur Booking.com")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--slow-ms", type=int, default=1500)
+    args = parser.parse_args()
+
+    server = FakeBookingServer(port=args.port, slow_ms=args.slow_ms)
+    print(f"🧪 Faux Booking sur {server.base_url}")
+    for variant in VARIANTS:
+        print(f"   • {server.hotel_url(variant)}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,220 @@
+"""
+Bouchon HTTP compatible PostgREST (sous-ensemble utilisé par SupabaseClient)
+
+Stocke les lignes en mémoire et supporte:
+    POST   /rest/v1/<table>             insert (objet ou tableau)
+    PATCH  /rest/v1/<table>?col=eq.x    update
+    GET    /rest/v1/<table>?col=eq.x    select (eq, in, gte, lte, order, limit)
+
+Latence (fixe + gigue) et taux d'échec (503) injectables pour mesurer
+le comportement du client sous charge.
+
+Usage: python benchmarks/fake_postgrest.py --port 54321 --latency-ms 40
+"""
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+from typing import List, Dict, Any, Tuple
+import json
+import random
+import threading
+import time
+
+
+def _parse_filters(query: str) -> Tuple[List[Tuple[str, str, str]], Dict[str, str]]:
+    """Sépare les filtres PostgREST (col=op.val) des paramètres (select, order, limit)"""
+    filters, params = [], {}
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        if key in ("select", "order", "limit", "offset", "columns", "on_conflict"):
+            params[key] = value
+        elif "." in value:
+            op, operand = value.split(".", 1)
+            filters.append((key, op, operand))
+    return filters, params
+
+
+def _matches(row: Dict[str, Any], filters: List[Tuple[str, str, str]]) -> bool:
+    for column, op, operand in filters:
+        value = row.get(column)
+        as_text = "" if value is None else str(value).lower() if isinstance(value, bool) else str(value)
+        if op == "eq" and as_text != operand:
+            return False
+        if op == "in":
+            options = [o.strip().strip('"') for o in operand.strip("()").split(",")]
+            if as_text not in options:
+                return False
+        if op == "gte" and not as_text >= operand:
+            return False
+        if op == "lte" and not as_text <= operand:
+            return False
+    return True
+
+
+class FakePostgrestHandler(BaseHTTPRequestHandler):
+    """Handler HTTP: tables en mémoire + injection de latence/échecs"""
+
+    tables: Dict[str, List[Dict[str, Any]]] = {}
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    failure_rate: float = 0.0
+    request_log: List[Dict[str, Any]] = []
+    _lock = threading.Lock()
+
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps sont écrits séparément: sans TCP_NODELAY, Nagle +
+    # ACK retardé ajoutent ~40 ms par requête sur une connexion keep-alive
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _table(self) -> str:
+        path = urlparse(self.path).path
+        return path.rstrip("/").split("/")[-1]
+
+    def _read_body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null")
+
+    def _respond(self, status: int, payload: Any, started: float, rows: int = 0):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with self._lock:
+            FakePostgrestHandler.request_log.append({
+                "method": self.command,
+                "table": self._table(),
+                "status": status,
+                "rows": rows,
+                "bytes_in": int(self.headers.get("Content-Length") or 0),
+                "server_ms": (time.perf_counter() - started) * 1000,
+                # Une connexion TCP = un port client: mesure la réutilisation keep-alive
+                "client_port": self.client_address[1],
+            })
+
+    def _inject(self, started: float) -> bool:
+        """Applique latence et échec simulé; True si la requête échoue"""
+        delay = self.latency_ms + random.uniform(0, self.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000)
+        if self.failure_rate and random.random() < self.failure_rate:
+            self._respond(503, {"message": "Service Unavailable (simulé)", "code": "503"}, started)
+            return True
+        return False
+
+    def do_POST(self):
+        started = time.perf_counter()
+        body = self._read_body()
+        if self._inject(started):
+            return
+        rows = body if isinstance(body, list) else [body]
+        with self._lock:
+            self.tables.setdefault(self._table(), []).extend(rows)
+        self._respond(201, rows, started, rows=len(rows))
+
+    def do_PATCH(self):
+        started = time.perf_counter()
+        updates = self._read_body()
+        if self._inject(started):
+            return
+        filters, _ = _parse_filters(urlparse(self.path).query)
+        updated = []
+        with self._lock:
+            for row in self.tables.get(self._table(), []):
+                if _matches(row, filters):
+                    row.update(updates)
+                    updated.append(row)
+        self._respond(200, updated, started, rows=len(updated))
+
+    def do_GET(self):
+        started = time.perf_counter()
+        if self._inject(started):
+            return
+        filters, params = _parse_filters(urlparse(self.path).query)
+        with self._lock:
+            rows = [dict(r) for r in self.tables.get(self._table(), []) if _matches(r, filters)]
+        if "order" in params:
+            column, _, direction = params["order"].partition(".")
+            rows.sort(key=lambda r: str(r.get(column) or ""), reverse=direction.startswith("desc"))
+        if "limit" in params:
+            rows = rows[:int(params["limit"])]
+        self._respond(200, rows, started, rows=len(rows))
+
+
+class FakePostgrestServer:
+    """Serveur démarré dans un thread (context manager)"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        failure_rate: float = 0.0,
+    ):
+        FakePostgrestHandler.tables = {}
+        FakePostgrestHandler.request_log = []
+        self.configure(latency_ms, jitter_ms, failure_rate)
+        self.httpd = ThreadingHTTPServer((host, port), FakePostgrestHandler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def configure(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, failure_rate: float = 0.0):
+        FakePostgrestHandler.latency_ms = latency_ms
+        FakePostgrestHandler.jitter_ms = jitter_ms
+        FakePostgrestHandler.failure_rate = failure_rate
+
+    def reset_stats(self):
+        with FakePostgrestHandler._lock:
+            FakePostgrestHandler.request_log = []
+
+    @property
+    def request_log(self) -> List[Dict[str, Any]]:
+        return FakePostgrestHandler.request_log
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return FakePostgrestHandler.tables.get(table, [])
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakePostgrestServer":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Bouchon PostgREST en mémoire")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakePostgrestServer(
+        port=args.port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        failure_rate=args.failure_rate,
+    )
+    print(f"🧪 Faux PostgREST sur {server.base_url} (SUPABASE_URL={server.base_url})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
@@ -0,0 +1,144 @@
+"""
+Faux proxy HTTP (stand-in local) pour tester le pool de proxies
+
+Relaie les requêtes GET en URI absolue (http:// uniquement, comme le faux
+serveur Booking) selon un comportement:
+    ok       relaie la requête
+    slow     relaie après latency_ms
+    blocked  répond 403 avec une page CAPTCHA (IP grillée)
+    dead     coupe la connexion sans répondre
+
+Usage:
+    python benchmarks/fake_proxy.py --mode slow --latency-ms 800 --port 8899
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+MODES = ("ok", "slow", "blocked", "dead")
+
+BLOCK_PAGE = (
+    b"<html><head><title>Access Denied</title></head>"
+    b'<body><div id="px-captcha"></div></body></html>'
+)
+
+# En-têtes propres au saut client -> proxy, non relayés
+HOP_HEADERS = {"proxy-connection", "proxy-authorization", "connection", "keep-alive"}
+
+
+class FakeProxyHandler(BaseHTTPRequestHandler):
+    """Handler du proxy: comportement lu sur le serveur (self.server)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _count(self, key: str):
+        with self.server.lock:
+            self.server.stats[key] = self.server.stats.get(key, 0) + 1
+
+    def _reply(self, status: int, body: bytes, headers: Dict[str, str]):
+        self.send_response(status)
+        for name, value in headers.items():
+            if name.lower() not in HOP_HEADERS and name.lower() != "transfer-encoding":
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._count("requests")
+        mode = self.server.mode
+
+        if mode == "dead":
+            self._count("dropped")
+            self.close_connection = True
+            self.connection.close()
+            return
+        if mode == "blocked":
+            self._count("blocked")
+            self._reply(403, BLOCK_PAGE, {"Content-Type": "text/html; charset=utf-8"})
+            return
+        if mode == "slow":
+            time.sleep(self.server.latency_ms / 1000)
+
+        target = urlsplit(self.path)
+        if target.scheme != "http" or not target.hostname:
+            self._reply(400, b"Absolute http:// URI expected", {"Content-Type": "text/plain"})
+            return
+
+        upstream = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        try:
+            path = target.path + (f"?{target.query}" if target.query else "")
+            headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_HEADERS}
+            upstream.request("GET", path or "/", headers=headers)
+            response = upstream.getresponse()
+            body = response.read()
+            self._reply(response.status, body, dict(response.getheaders()))
+            self._count("forwarded")
+        except OSError as e:
+            self._reply(502, f"Upstream error: {e}".encode(), {"Content-Type": "text/plain"})
+        finally:
+            upstream.close()
+
+
+class FakeProxy:
+    """Proxy démarré dans un thread (context manager)"""
+
+    def __init__(self, mode: str = "ok", latency_ms: int = 800, host: str = "127.0.0.1", port: int = 0):
+        if mode not in MODES:
+            raise ValueError(f"Mode inconnu: {mode} (parmi {', '.join(MODES)})")
+        self.httpd = ThreadingHTTPServer((host, port), FakeProxyHandler)
+        self.httpd.mode = mode
+        self.httpd.latency_ms = latency_ms
+        self.httpd.stats = {}
+        self.httpd.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def mode(self) -> str:
+        return self.httpd.mode
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return dict(self.httpd.stats)
+
+    def start(self) -> "FakeProxy":
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Faux proxy HTTP")
+    parser.add_argument("--mode", default="ok", choices=MODES)
+    parser.add_argument("--latency-ms", type=int, default=800)
+    parser.add_argument("--port", type=int, default=8899)
+    args = parser.parse_args()
+
+    proxy = FakeProxy(mode=args.mode, latency_ms=args.latency_ms, port=args.port)
+    print(f"🧪 Faux proxy ({args.mode}) sur {proxy.url}")
+    try:
+        proxy.httpd.serve_forever()
+    except KeyboardInterrupt:
+        proxy.httpd.server_close()
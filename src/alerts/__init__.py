@@ -0,0 +1,15 @@
+from .engine import AlertEngine, evaluate_new_snapshots
+from .rules import CompetitorUndercutRule, SoldOutRule, default_rules
+from .sinks import FileSink, StorageSink, WebhookSink, build_sinks_from_config
+
+__all__ = [
+    'AlertEngine',
+    'evaluate_new_snapshots',
+    'CompetitorUndercutRule',
+    'SoldOutRule',
+    'default_rules',
+    'FileSink',
+    'StorageSink',
+    'WebhookSink',
+    'build_sinks_from_config',
+]
@@ -0,0 +1,203 @@
+"""
+Moteur d'alertes incrémental
+Évalue les règles uniquement sur les snapshots écrits par le run courant,
+en comparant à un état précédent mis en cache (fichier JSON) plutôt qu'en
+relisant l'historique de rate_snapshots.
+"""
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Iterable
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ALERTS_ENABLED, ALERT_STATE_PATH, ALERT_STATE_LOOKBACK_HOURS
+from alerts.rules import AlertContext, AlertRule, default_rules, make_key, split_key
+from alerts.sinks import AlertSink, build_sinks_from_config
+from scrapers.outcomes import is_definitive
+from scrapers.scrape_grid import is_reference_snapshot
+
+
+def _state_from_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Réduit un snapshot aux champs utiles aux règles"""
+    return {
+        "price": snapshot.get("price"),
+        "available": bool(snapshot.get("available")),
+        "scrapedAt": snapshot.get("scrapedAt"),
+    }
+
+
+class AlertEngine:
+    """
+    Évalue les règles sur le delta d'un run
+
+    Le coût dépend du nombre de snapshots du run (et des hôtels suivis
+    pour les mêmes dates), pas de la taille de la table.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[List[AlertRule]] = None,
+        sinks: Optional[List[AlertSink]] = None,
+        state_path: str = ALERT_STATE_PATH,
+        storage=None,
+    ):
+        self.rules = rules if rules is not None else default_rules()
+        self.sinks = sinks if sinks is not None else build_sinks_from_config()
+        self.state_path = state_path
+        self.storage = storage
+        self._state: Optional[Dict[str, Dict[str, Any]]] = None
+
+    # ============ ÉTAT ============
+
+    def _load_state(self) -> Dict[str, Dict[str, Any]]:
+        """Charge l'état précédent depuis le fichier cache (une seule fois)"""
+        if self._state is not None:
+            return self._state
+        self._state = {}
+        if self.state_path and os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    self._state = json.load(f)
+            except Exception as e:
+                print(f"⚠️ Cache d'alertes illisible, reconstruit: {e}")
+                self._state = {}
+        return self._state
+
+    def _save_state(self):
+        """Persiste l'état en supprimant les dates passées"""
+        if not self.state_path:
+            return
+        today = date.today().isoformat()
+        state = {
+            key: value for key, value in self._load_state().items()
+            if split_key(key)[1] >= today
+        }
+        self._state = state
+        directory = os.path.dirname(self.state_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _fill_missing_from_storage(
+        self,
+        state: Dict[str, Dict[str, Any]],
+        keys: Iterable[str],
+        exclude_ids: set,
+    ):
+        """
+        Complète le cache pour les clés absentes (premier run, cache perdu)
+        en lisant uniquement les derniers snapshots de ces hôtels/dates
+        """
+        missing = [key for key in keys if key not in state]
+        if not missing or self.storage is None:
+            return
+
+        hotel_ids = sorted({split_key(key)[0] for key in missing})
+        checkins = sorted({split_key(key)[1] for key in missing})
+        since = datetime.now() - timedelta(hours=ALERT_STATE_LOOKBACK_HOURS)
+
+        rows = self.storage.get_latest_snapshots(hotel_ids, checkins, since)
+        for row in rows:
+            if row.get("id") in exclude_ids or not is_definitive(row.get("outcome")):
+                continue
+            if not is_reference_snapshot(row):
+                continue
+            key = make_key(row["hotelId"], row["dateCheckin"])
+            if key not in missing:
+                continue
+            known = state.get(key)
+            if known is None or (row.get("scrapedAt") or "") > (known.get("scrapedAt") or ""):
+                state[key] = _state_from_snapshot(row)
+
+    # ============ ÉVALUATION ============
+
+    def evaluate(
+        self,
+        hotels: List[Dict[str, Any]],
+        snapshots: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """
+        Évalue les règles sur les snapshots du run et émet les alertes
+
+        Args:
+            hotels: Hôtels suivis (pour isClient et les noms)
+            snapshots: Snapshots nouvellement écrits
+
+        Returns:
+            Liste des alertes émises
+        """
+        # Un timeout ou un blocage ne dit rien du prix: seuls les résultats
+        # définitifs (prix lu, complet) font évoluer l'état. Les règles
+        # comparent des nuits: seul le séjour de référence (1 nuit, 2 adultes) compte
+        snapshots = [
+            s for s in snapshots
+            if is_definitive(s.get("outcome")) and is_reference_snapshot(s)
+        ]
+        if not snapshots:
+            return []
+
+        hotels_by_id = {h["id"]: h for h in hotels}
+        previous = self._load_state()
+
+        delta: Dict[str, Dict[str, Any]] = {}
+        for snapshot in snapshots:
+            key = make_key(snapshot["hotelId"], snapshot["dateCheckin"])
+            delta[key] = _state_from_snapshot(snapshot)
+
+        # Les règles comparent les hôtels entre eux pour une même date:
+        # on s'assure d'avoir l'état précédent de chaque hôtel sur ces dates
+        checkins = {split_key(key)[1] for key in delta}
+        needed = {make_key(h_id, checkin) for h_id in hotels_by_id for checkin in checkins}
+        exclude_ids = {s.get("id") for s in snapshots if s.get("id")}
+        self._fill_missing_from_storage(previous, needed, exclude_ids)
+
+        current = dict(previous)
+        current.update(delta)
+        ctx = AlertContext(hotels_by_id, current, dict(previous), delta_keys=set(delta))
+
+        alerts = []
+        for key in delta:
+            for rule in self.rules:
+                try:
+                    alerts.extend(rule.evaluate(ctx, key))
+                except Exception as e:
+                    print(f"⚠️ Erreur règle {rule.name} sur {key}: {e}")
+
+        previous.update(delta)
+        self._save_state()
+
+        if alerts:
+            print(f"🔔 {len(alerts)} alerte(s) de prix")
+            for sink in self.sinks:
+                try:
+                    sink.emit(alerts)
+                except Exception as e:
+                    print(f"⚠️ Erreur sink {type(sink).__name__}: {e}")
+
+        return alerts
+
+
+def evaluate_new_snapshots(
+    hotels: List[Dict[str, Any]],
+    snapshots: List[Dict[str, Any]],
+    storage=None,
+) -> List[Dict[str, Any]]:
+    """
+    Point d'entrée utilisé après l'enregistrement des snapshots
+    Ne lève jamais: une erreur d'alerting ne doit pas faire échouer le run
+    """
+    if not ALERTS_ENABLED:
+        return []
+    try:
+        engine = AlertEngine(
+            sinks=build_sinks_from_config(storage),
+            storage=storage,
+        )
+        return engine.evaluate(hotels, snapshots)
+    except Exception as e:
+        print(f"❌ Erreur moteur d'alertes: {e}")
+        return []
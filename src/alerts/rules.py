@@ -0,0 +1,202 @@
+"""
+Règles d'alerte sur les variations de prix
+Chaque règle compare l'état courant d'une date à l'état précédent (cache)
+et ne se déclenche qu'au moment de la transition, pas à chaque run.
+"""
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import List, Dict, Any, Optional
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ALERT_UNDERCUT_THRESHOLD_PCT, ALERT_UNDERCUT_WITHIN_DAYS
+
+
+def _days_until(checkin: str, today: date) -> int:
+    """Nombre de jours entre aujourd'hui et la date de check-in"""
+    return (date.fromisoformat(checkin) - today).days
+
+
+def _is_priced(state: Optional[Dict[str, Any]]) -> bool:
+    """True si l'état contient un prix disponible"""
+    return bool(state) and bool(state.get("available")) and state.get("price") is not None
+
+
+class AlertContext:
+    """
+    Vue utilisée par les règles pendant une évaluation
+
+    current: état après application du delta (clé -> état)
+    previous: état avant application du delta (clé -> état)
+    delta_keys: clés écrites par le run courant
+    """
+
+    def __init__(
+        self,
+        hotels: Dict[str, Dict[str, Any]],
+        current: Dict[str, Dict[str, Any]],
+        previous: Dict[str, Dict[str, Any]],
+        delta_keys: Optional[set] = None,
+        today: Optional[date] = None,
+    ):
+        self.hotels = hotels
+        self.current = current
+        self.previous = previous
+        self.delta_keys = delta_keys or set()
+        self.today = today or date.today()
+        self.client_ids = [h_id for h_id, h in hotels.items() if h.get("isClient")]
+
+    def hotel_name(self, hotel_id: str) -> str:
+        hotel = self.hotels.get(hotel_id) or {}
+        return hotel.get("name") or hotel_id
+
+
+def make_alert(
+    rule: str,
+    hotel_id: str,
+    checkin: str,
+    message: str,
+    severity: str = "warning",
+    payload: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Construit le dict d'une alerte (format commun à tous les sinks)"""
+    return {
+        "rule": rule,
+        "hotelId": hotel_id,
+        "dateCheckin": checkin,
+        "severity": severity,
+        "message": message,
+        "payload": payload or {},
+        "createdAt": datetime.now().isoformat(),
+    }
+
+
+class AlertRule(ABC):
+    """Règle de base: évalue une clé (hôtel, date) modifiée par le run"""
+
+    name = "rule"
+
+    @abstractmethod
+    def evaluate(self, ctx: AlertContext, key: str) -> List[Dict[str, Any]]:
+        """Alertes déclenchées par la transition de cette clé (liste vide sinon)"""
+
+
+class CompetitorUndercutRule(AlertRule):
+    """
+    Un concurrent passe à plus de X% sous le prix du client
+    pour une date dans les N prochains jours
+    """
+
+    name = "competitor_undercut"
+
+    def __init__(
+        self,
+        threshold_pct: float = ALERT_UNDERCUT_THRESHOLD_PCT,
+        within_days: int = ALERT_UNDERCUT_WITHIN_DAYS,
+    ):
+        self.threshold_pct = threshold_pct
+        self.within_days = within_days
+
+    def _is_undercut(
+        self,
+        competitor: Optional[Dict[str, Any]],
+        client: Optional[Dict[str, Any]],
+    ) -> bool:
+        if not _is_priced(competitor) or not _is_priced(client):
+            return False
+        limit = client["price"] * (1 - self.threshold_pct / 100)
+        return competitor["price"] < limit
+
+    def evaluate(self, ctx: AlertContext, key: str) -> List[Dict[str, Any]]:
+        hotel_id, checkin = split_key(key)
+        if not 0 <= _days_until(checkin, ctx.today) <= self.within_days:
+            return []
+
+        # Paires (concurrent, client) touchées par cette clé: si le client
+        # a changé, on réévalue les concurrents connus pour cette date
+        # (ceux présents dans le delta sont évalués via leur propre clé)
+        if hotel_id in ctx.client_ids:
+            pairs = [
+                (other_id, hotel_id) for other_id in ctx.hotels
+                if other_id not in ctx.client_ids
+                and make_key(other_id, checkin) not in ctx.delta_keys
+            ]
+        else:
+            pairs = [(hotel_id, client_id) for client_id in ctx.client_ids]
+
+        alerts = []
+        for competitor_id, client_id in pairs:
+            competitor_key = make_key(competitor_id, checkin)
+            client_key = make_key(client_id, checkin)
+
+            now_undercut = self._is_undercut(
+                ctx.current.get(competitor_key), ctx.current.get(client_key)
+            )
+            was_undercut = self._is_undercut(
+                ctx.previous.get(competitor_key), ctx.previous.get(client_key)
+            )
+            if not now_undercut or was_undercut:
+                continue
+
+            competitor_price = ctx.current[competitor_key]["price"]
+            client_price = ctx.current[client_key]["price"]
+            gap_pct = round((1 - competitor_price / client_price) * 100, 1)
+            alerts.append(make_alert(
+                self.name,
+                competitor_id,
+                checkin,
+                f"{ctx.hotel_name(competitor_id)} à {competitor_price}€ le {checkin}, "
+                f"{gap_pct}% sous {ctx.hotel_name(client_id)} ({client_price}€)",
+                payload={
+                    "clientHotelId": client_id,
+                    "competitorPrice": competitor_price,
+                    "clientPrice": client_price,
+                    "gapPct": gap_pct,
+                },
+            ))
+        return alerts
+
+
+class SoldOutRule(AlertRule):
+    """Un concurrent disponible au run précédent devient complet"""
+
+    name = "competitor_sold_out"
+
+    def evaluate(self, ctx: AlertContext, key: str) -> List[Dict[str, Any]]:
+        hotel_id, checkin = split_key(key)
+        if hotel_id in ctx.client_ids:
+            return []
+
+        current = ctx.current.get(key)
+        previous = ctx.previous.get(key)
+        if not current or current.get("available"):
+            return []
+        if not previous or not previous.get("available"):
+            return []
+
+        return [make_alert(
+            self.name,
+            hotel_id,
+            checkin,
+            f"{ctx.hotel_name(hotel_id)} complet le {checkin} "
+            f"(était à {previous.get('price')}€)",
+            severity="info",
+            payload={"previousPrice": previous.get("price")},
+        )]
+
+
+def make_key(hotel_id: str, checkin: str) -> str:
+    """Clé de cache d'une date d'un hôtel"""
+    return f"{hotel_id}|{checkin}"
+
+
+def split_key(key: str) -> tuple:
+    """Inverse de make_key"""
+    hotel_id, checkin = key.split("|", 1)
+    return hotel_id, checkin
+
+
+def default_rules() -> List[AlertRule]:
+    """Règles actives par défaut"""
+    return [CompetitorUndercutRule(), SoldOutRule()]
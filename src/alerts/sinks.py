@@ -0,0 +1,86 @@
+"""
+Destinations des alertes (webhook, table Supabase, fichier JSONL)
+"""
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ALERT_SINKS, ALERT_WEBHOOK_URL, ALERT_FILE_PATH
+
+
+class AlertSink(ABC):
+    """Destination d'alertes: reçoit toutes les alertes d'un run en une fois"""
+
+    @abstractmethod
+    def emit(self, alerts: List[Dict[str, Any]]):
+        """Envoie les alertes du run (une exception est journalisée par l'appelant)"""
+
+
+class WebhookSink(AlertSink):
+    """POST JSON des alertes vers une URL (Slack, n8n, Next.js...)"""
+
+    def __init__(self, url: str, timeout: int = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def emit(self, alerts: List[Dict[str, Any]]):
+        import requests
+        response = requests.post(
+            self.url,
+            json={"alerts": alerts},
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+        print(f"✅ {len(alerts)} alerte(s) envoyée(s) au webhook")
+
+
+class StorageSink(AlertSink):
+    """Enregistre les alertes dans la table price_alerts"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def emit(self, alerts: List[Dict[str, Any]]):
+        self.storage.create_price_alerts_batch([dict(a) for a in alerts])
+
+
+class FileSink(AlertSink):
+    """Ajoute les alertes à un fichier JSON Lines"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def emit(self, alerts: List[Dict[str, Any]]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for alert in alerts:
+                f.write(json.dumps(alert, ensure_ascii=False) + "\n")
+
+
+def build_sinks_from_config(storage=None) -> List[AlertSink]:
+    """
+    Construit les sinks listés dans ALERT_SINKS (ex: "file,table,webhook")
+
+    Args:
+        storage: Client base de données pour le sink "table"
+    """
+    sinks: List[AlertSink] = []
+    for name in ALERT_SINKS:
+        if name == "webhook":
+            if ALERT_WEBHOOK_URL:
+                sinks.append(WebhookSink(ALERT_WEBHOOK_URL))
+            else:
+                print("⚠️ Sink webhook ignoré: ALERT_WEBHOOK_URL non défini")
+        elif name == "table":
+            if storage is not None:
+                sinks.append(StorageSink(storage))
+        elif name == "file":
+            sinks.append(FileSink(ALERT_FILE_PATH))
+        else:
+            print(f"⚠️ Sink d'alerte inconnu: {name}")
+    return sinks
@@ -4,14 +4,20 @@ Endpoint: POST /scrape-hotel avec {"url": "..."}
 """
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, PlainTextResponse
 from pydantic import BaseModel, HttpUrl
 from typing import Optional
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database.supabase_client import supabase_client
-from config import API_HOST, API_PORT
+from database import get_async_storage
+from config import API_HOST, API_PORT, METRICS_STATE_PATH, validate_settings
+from observability import render_prometheus
+from scrapers.photo_cache import PhotoCache
+
+# Vignettes versionnées par leur contenu (?v=...): gardées un an par les navigateurs et CDN
+PHOTO_CACHE_CONTROL = "public, max-age=31536000, immutable"
 
 app = FastAPI(
     title="Booking Scraper API",
@@ -44,6 +50,13 @@ class ScrapeHotelResponse(BaseModel):
     error: Optional[str] = None
 
 
+@app.on_event("shutdown")
+async def close_database_pools():
+    """Ferme les connexions keep-alive vers Supabase"""
+    from database.http_transport import aclose_http_clients
+    await aclose_http_clients()
+
+
 @app.get("/")
 async def root():
     """Health check"""
@@ -60,6 +73,30 @@ async def health():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    Métriques Prometheus: celles de l'API + le dernier snapshot
+    écrit par le scheduler (process séparé)
+    """
+    return PlainTextResponse(
+        render_prometheus(METRICS_STATE_PATH),
+        media_type="text/plain; version=0.0.4",
+    )
+
+
+@app.get("/photos/{key}/{size}.webp")
+async def hotel_photo(key: str, size: str):
+    """
+    Vignette WebP de la photo d'un hôtel (scrapers/photo_cache.py)
+    URL stockée dans hotels.photoUrl: /photos/fr-chateau-de-roussan/card.webp?v=...
+    """
+    path = PhotoCache().path(key, size)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Photo introuvable")
+    return FileResponse(path, media_type="image/webp", headers={"Cache-Control": PHOTO_CACHE_CONTROL})
+
+
 @app.post("/scrape-hotel", response_model=ScrapeHotelResponse)
 async def scrape_hotel(request: ScrapeHotelRequest):
     """
@@ -76,7 +113,7 @@ async def scrape_hotel(request: ScrapeHotelRequest):
         print(f"\n🔍 Requête de scraping: {request.url}")
         
         # Vérifier si l'hôtel existe déjà
-        existing_hotel = supabase_client.get_hotel_by_url(request.url)
+        existing_hotel = await get_async_storage().get_hotel_by_url(request.url)
         if existing_hotel:
             return ScrapeHotelResponse(
                 success=False,
@@ -87,7 +124,7 @@ async def scrape_hotel(request: ScrapeHotelRequest):
         
         # Import paresseux pour ne pas charger Playwright au démarrage du serveur
         from scrapers.hotel_info_scraper import scrape_hotel_info
-        hotel_data = scrape_hotel_info(request.url)
+        hotel_data = scrape_hotel_info(request.url, cache_photo=True)
         
         if not hotel_data:
             raise HTTPException(
@@ -100,7 +137,7 @@ async def scrape_hotel(request: ScrapeHotelRequest):
         hotel_data["isMonitored"] = request.isMonitored
         
         # Enregistrer dans Supabase
-        created_hotel = supabase_client.create_hotel(hotel_data)
+        created_hotel = await get_async_storage().create_hotel(hotel_data)
         
         if not created_hotel:
             raise HTTPException(
@@ -199,6 +236,7 @@ def extract(request: ExtractRequest):
 if __name__ == "__main__":
     import uvicorn
     
+    validate_settings()
     print(f"""
     ╔══════════════════════════════════════════════╗
     ║   🚀 Booking Scraper API                     ║
@@ -208,6 +246,8 @@ if __name__ == "__main__":
     📌 Endpoints disponibles:
        GET  /               - Info API
        GET  /health         - Health check
+       GET  /metrics        - Métriques Prometheus
+       GET  /photos/<hôtel>/<taille>.webp - Vignettes des photos d'hôtels
        POST /extract        - Extraire infos (Next.js, sans enregistrer)
        POST /scrape-hotel   - Scraper et enregistrer un hôtel
        POST /test-scrape    - Tester le scraping sans enregistrer
@@ -1,34 +1,170 @@
 """
 Configuration centrale du projet
+
+Importer ce module ne lit pas .env, ne valide rien et n'affiche rien.
+Les réglages sont construits au premier accès (get_settings(), ou
+`from config import X` résolu via __getattr__) puis figés pour le process:
+un module qui fait `from config import X` à son import (la plupart) lit
+l'environnement à ce moment-là et garde la valeur, valeurs par défaut
+des paramètres comprises. Un script qui ajuste os.environ (benchmarks)
+doit donc le faire avant d'importer le code du projet.
 """
+from dataclasses import dataclass, field, fields
+from typing import List, Optional
+import threading
 import os
-from dotenv import load_dotenv
 
-# Charger les variables d'environnement
-load_dotenv()
 
-# Supabase
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+def _env(name: str, default: Optional[str] = None) -> Optional[str]:
+    return os.getenv(name, default)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _is_production() -> bool:
+    return _env("ENVIRONMENT", "development") == "production"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Réglages du projet (lus depuis l'environnement à la construction)"""
+
+    # Supabase
+    SUPABASE_URL: Optional[str] = field(default_factory=lambda: _env("SUPABASE_URL"))
+    SUPABASE_SERVICE_KEY: Optional[str] = field(default_factory=lambda: _env("SUPABASE_SERVICE_KEY"))
+    # Stockage: "supabase" (production) ou "sqlite" (local, sans réseau)
+    STORAGE_BACKEND: str = field(default_factory=lambda: _env("STORAGE_BACKEND", "supabase").lower())
+    SQLITE_PATH: str = field(default_factory=lambda: _env("SQLITE_PATH", "data/tarifscope.db"))
+
+    # Nombre de lignes par requête d'insertion (PostgREST limite la taille des requêtes)
+    SNAPSHOT_BATCH_SIZE: int = field(default_factory=lambda: int(_env("SNAPSHOT_BATCH_SIZE", "500")))
+    # Courbes compactes (rate_curves) écrites en plus des lignes rate_snapshots
+    RATE_CURVES_ENABLED: bool = field(default_factory=lambda: _env("RATE_CURVES_ENABLED", "false").lower() == "true")
+    # Export Parquet de l'historique (database/parquet_export.py)
+    PARQUET_EXPORT_DIR: str = field(default_factory=lambda: _env("PARQUET_EXPORT_DIR", "data/parquet"))
+    PARQUET_COMPACT_MIN_FILES: int = field(default_factory=lambda: int(_env("PARQUET_COMPACT_MIN_FILES", "8")))
+
+    # Transport HTTP Supabase (pool keep-alive partagé par process)
+    SUPABASE_HTTP2: bool = field(default_factory=lambda: _env("SUPABASE_HTTP2", "true").lower() == "true")
+    SUPABASE_MAX_CONNECTIONS: int = field(default_factory=lambda: int(_env("SUPABASE_MAX_CONNECTIONS", "20")))
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = field(default_factory=lambda: int(_env("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", "10")))
+    SUPABASE_KEEPALIVE_EXPIRY_SECONDS: float = field(default_factory=lambda: float(_env("SUPABASE_KEEPALIVE_EXPIRY_SECONDS", "60")))
+    SUPABASE_TIMEOUT_SECONDS: float = field(default_factory=lambda: float(_env("SUPABASE_TIMEOUT_SECONDS", "15")))
+    SUPABASE_CONNECT_TIMEOUT_SECONDS: float = field(default_factory=lambda: float(_env("SUPABASE_CONNECT_TIMEOUT_SECONDS", "5")))
+    SUPABASE_MAX_RETRIES: int = field(default_factory=lambda: int(_env("SUPABASE_MAX_RETRIES", "3")))
+    SUPABASE_RETRY_BACKOFF_SECONDS: float = field(default_factory=lambda: float(_env("SUPABASE_RETRY_BACKOFF_SECONDS", "0.3")))
 
-# Environment
-ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
-IS_PRODUCTION = ENVIRONMENT == "production"
+    # Environment
+    ENVIRONMENT: str = field(default_factory=lambda: _env("ENVIRONMENT", "development"))
+    IS_PRODUCTION: bool = field(default_factory=_is_production)
 
-# API Configuration (Railway injecte PORT, sinon API_PORT ou 8000)
-API_HOST = os.getenv("API_HOST", "0.0.0.0")
-API_PORT = int(os.getenv("PORT") or os.getenv("API_PORT", "8000"))
+    # API Configuration (Railway injecte PORT, sinon API_PORT ou 8000)
+    API_HOST: str = field(default_factory=lambda: _env("API_HOST", "0.0.0.0"))
+    API_PORT: int = field(default_factory=lambda: int(_env("PORT") or _env("API_PORT", "8000")))
+    # Vignettes WebP des photos d'hôtels (scrapers/photo_cache.py, servies par GET /photos/...)
+    PHOTO_CACHE_ENABLED: bool = field(default_factory=lambda: _env("PHOTO_CACHE_ENABLED", "true").lower() == "true")
+    PHOTO_CACHE_DIR: str = field(default_factory=lambda: _env("PHOTO_CACHE_DIR", "data/photos"))
+    # URL publique de l'API préfixée aux vignettes (vide: photoUrl garde l'URL Booking)
+    PHOTO_PUBLIC_BASE_URL: str = field(default_factory=lambda: _env("PHOTO_PUBLIC_BASE_URL", ""))
+    PHOTO_WEBP_QUALITY: int = field(default_factory=lambda: int(_env("PHOTO_WEBP_QUALITY", "80")))
 
-# Scraping Configuration
-MIN_DELAY_SECONDS = int(os.getenv("MIN_DELAY_SECONDS", "30"))
-MAX_DELAY_SECONDS = int(os.getenv("MAX_DELAY_SECONDS", "60"))
-HEADLESS_MODE = os.getenv("HEADLESS_MODE", "true").lower() == "true"
+    # Scraping Configuration
+    MIN_DELAY_SECONDS: float = field(default_factory=lambda: float(_env("MIN_DELAY_SECONDS", "30")))
+    MAX_DELAY_SECONDS: float = field(default_factory=lambda: float(_env("MAX_DELAY_SECONDS", "60")))
+    HEADLESS_MODE: bool = field(default_factory=lambda: _env("HEADLESS_MODE", "true").lower() == "true")
+    # Pause après chargement de page (avant lecture du DOM) - 0 pour les benchmarks
+    PAGE_SETTLE_MIN_SECONDS: float = field(default_factory=lambda: float(_env("PAGE_SETTLE_MIN_SECONDS", "2")))
+    PAGE_SETTLE_MAX_SECONDS: float = field(default_factory=lambda: float(_env("PAGE_SETTLE_MAX_SECONDS", "4")))
+    # Nouvelles tentatives par date (timeout, blocage, parsing) en fin de passe de l'hôtel
+    DATE_MAX_ATTEMPTS: int = field(default_factory=lambda: int(_env("DATE_MAX_ATTEMPTS", "3")))
+    DATE_RETRY_BACKOFF_SECONDS: float = field(default_factory=lambda: float(_env("DATE_RETRY_BACKOFF_SECONDS", "60")))
+    DATE_RETRY_MAX_BACKOFF_SECONDS: float = field(default_factory=lambda: float(_env("DATE_RETRY_MAX_BACKOFF_SECONDS", "300")))
+    # Grille de scraping: horizon (jours), durées de séjour (nuits) et occupations (adultes)
+    SCRAPE_HORIZON_DAYS: int = field(default_factory=lambda: int(_env("SCRAPE_HORIZON_DAYS", "30")))
+    SCRAPE_LENGTHS_OF_STAY: List[int] = field(default_factory=lambda: _int_list(_env("SCRAPE_LENGTHS_OF_STAY", "1")))
+    SCRAPE_ADULTS: List[int] = field(default_factory=lambda: _int_list(_env("SCRAPE_ADULTS", "2")))
+    # Délai entre deux variantes (nuits, adultes) d'une même date d'arrivée: recherche affinée
+    SCRAPE_REFINE_DELAY_MIN_SECONDS: float = field(default_factory=lambda: float(_env("SCRAPE_REFINE_DELAY_MIN_SECONDS", "5")))
+    SCRAPE_REFINE_DELAY_MAX_SECONDS: float = field(default_factory=lambda: float(_env("SCRAPE_REFINE_DELAY_MAX_SECONDS", "15")))
+    # Hôtels scrapés en parallèle (un navigateur chacun): pendant qu'une identité attend, une autre navigue
+    # 1 par défaut (un seul Chromium); à relever seulement si la mémoire de l'instance le permet
+    SCRAPE_PARALLEL_HOTELS: int = field(default_factory=lambda: int(_env("SCRAPE_PARALLEL_HOTELS", "1")))
+    # Onglets d'un même contexte chargés en pipeline (navigations lancées ensemble, lues l'une après l'autre)
+    SCRAPE_TABS: int = field(default_factory=lambda: int(_env("SCRAPE_TABS", "1")))
+    # Hôtel client (isClient): cadence plus soutenue
+    SCRAPE_CLIENT_TABS: int = field(default_factory=lambda: int(_env("SCRAPE_CLIENT_TABS", "3")))
+    SCRAPE_MAX_TABS: int = field(default_factory=lambda: int(_env("SCRAPE_MAX_TABS", "4")))
+    # Tas JS d'un onglet au-delà duquel il est fermé et rouvert (0 = jamais)
+    SCRAPE_TAB_MAX_HEAP_MB: float = field(default_factory=lambda: float(_env("SCRAPE_TAB_MAX_HEAP_MB", "150")))
+    # Débit global par domaine, toutes identités confondues (seau à jetons; 0 = illimité)
+    POLITENESS_DOMAIN_RATE_PER_MINUTE: float = field(default_factory=lambda: float(_env("POLITENESS_DOMAIN_RATE_PER_MINUTE", "6")))
+    POLITENESS_DOMAIN_BURST: int = field(default_factory=lambda: int(_env("POLITENESS_DOMAIN_BURST", "2")))
+    # Page de blocage: rotations d'identité avant abandon de l'hôtel, puis reprise en fin de session
+    BLOCK_MAX_ROTATIONS: int = field(default_factory=lambda: int(_env("BLOCK_MAX_ROTATIONS", "1")))
+    HOTEL_MAX_RESCHEDULES: int = field(default_factory=lambda: int(_env("HOTEL_MAX_RESCHEDULES", "1")))
+    HOTEL_RESCHEDULE_DELAY_SECONDS: float = field(default_factory=lambda: float(_env("HOTEL_RESCHEDULE_DELAY_SECONDS", "300")))
+    # Proxies (un par contexte navigateur): liste séparée par des virgules et/ou fichier (une URL par ligne)
+    PROXY_LIST: List[str] = field(default_factory=lambda: [p.strip() for p in _env("PROXY_LIST", "").split(",") if p.strip()])
+    PROXY_FILE: Optional[str] = field(default_factory=lambda: _env("PROXY_FILE") or None)
+    PROXY_COOLDOWN_SECONDS: float = field(default_factory=lambda: float(_env("PROXY_COOLDOWN_SECONDS", "600")))
+    PROXY_MAX_COOLDOWN_SECONDS: float = field(default_factory=lambda: float(_env("PROXY_MAX_COOLDOWN_SECONDS", "7200")))
+    PROXY_MAX_CONSECUTIVE_FAILURES: int = field(default_factory=lambda: int(_env("PROXY_MAX_CONSECUTIVE_FAILURES", "3")))
+    # État navigateur (cookies, consentement) conservé par identité UA + proxy entre les sessions
+    BROWSER_STATE_ENABLED: bool = field(default_factory=lambda: _env("BROWSER_STATE_ENABLED", "true").lower() == "true")
+    BROWSER_STATE_DIR: str = field(default_factory=lambda: _env("BROWSER_STATE_DIR", "data/browser_state"))
+    BROWSER_STATE_MAX_AGE_HOURS: float = field(default_factory=lambda: float(_env("BROWSER_STATE_MAX_AGE_HOURS", "72")))
+    # Chien de garde mémoire: navigateur relancé (même identité) au-delà de ces seuils (0 = désactivé)
+    BROWSER_MAX_RSS_MB: float = field(default_factory=lambda: float(_env("BROWSER_MAX_RSS_MB", "300")))
+    BROWSER_RECYCLE_PAGES: int = field(default_factory=lambda: int(_env("BROWSER_RECYCLE_PAGES", "150")))
+    # Pages minimales depuis le (re)lancement avant un recyclage pour RSS ou plafond (évite les relances en boucle)
+    BROWSER_RECYCLE_MIN_PAGES: int = field(default_factory=lambda: int(_env("BROWSER_RECYCLE_MIN_PAGES", "10")))
+    # Plafond de tout le process (Python + navigateurs des hôtels en parallèle), sous la limite du conteneur
+    MEMORY_CEILING_MB: float = field(default_factory=lambda: float(_env("MEMORY_CEILING_MB", "450")))
+
+    # Session Times (random ranges in hours)
+    SESSION_1_START_HOUR: int = field(default_factory=lambda: int(_env("SESSION_1_START_HOUR", "8")))
+    SESSION_1_END_HOUR: int = field(default_factory=lambda: int(_env("SESSION_1_END_HOUR", "11")))
+    SESSION_2_START_HOUR: int = field(default_factory=lambda: int(_env("SESSION_2_START_HOUR", "14")))
+    SESSION_2_END_HOUR: int = field(default_factory=lambda: int(_env("SESSION_2_END_HOUR", "17")))
+    # Planification (scheduler/session_planner.py): heure de départ choisie pour finir dans la fenêtre
+    SESSION_PLANNING_ENABLED: bool = field(default_factory=lambda: _env("SESSION_PLANNING_ENABLED", "true").lower() == "true")
+    PLANNER_HISTORY_RUNS: int = field(default_factory=lambda: int(_env("PLANNER_HISTORY_RUNS", "20")))
+    PLANNER_ITERATIONS: int = field(default_factory=lambda: int(_env("PLANNER_ITERATIONS", "200")))
+    # Durée d'une page (chargement -> extraction) pour un hôtel sans historique
+    PLANNER_DEFAULT_PAGE_SECONDS: float = field(default_factory=lambda: float(_env("PLANNER_DEFAULT_PAGE_SECONDS", "8")))
+    # Navigateurs des premiers hôtels lancés (et page d'accueil chargée) quelques minutes avant la session
+    PREWARM_ENABLED: bool = field(default_factory=lambda: _env("PREWARM_ENABLED", "true").lower() == "true")
+    PREWARM_MINUTES: int = field(default_factory=lambda: int(_env("PREWARM_MINUTES", "3")))
+    # SIGTERM/SIGINT: dernière page, enregistrement et fermeture des navigateurs dans ce délai
+    SHUTDOWN_GRACE_SECONDS: float = field(default_factory=lambda: float(_env("SHUTDOWN_GRACE_SECONDS", "25")))
+
+    # Observabilité (logs JSON + snapshot des métriques du scheduler pour /metrics)
+    STRUCTURED_LOGS: bool = field(default_factory=lambda: _env("STRUCTURED_LOGS", "true" if _is_production() else "false").lower() == "true")
+    METRICS_STATE_PATH: str = field(default_factory=lambda: _env("METRICS_STATE_PATH", "data/metrics_scheduler.json"))
+    # Profilage d'un hôtel par session (cProfile + traces Playwright), aussi via --profile
+    PROFILE_SESSIONS: bool = field(default_factory=lambda: _env("PROFILE_SESSIONS", "false").lower() == "true")
+    PROFILE_DIR: str = field(default_factory=lambda: _env("PROFILE_DIR", "data/profiles"))
+    PROFILE_TRACE_PAGES: int = field(default_factory=lambda: int(_env("PROFILE_TRACE_PAGES", "5")))
+    PROFILE_TRACE_SNAPSHOTS: bool = field(default_factory=lambda: _env("PROFILE_TRACE_SNAPSHOTS", "false").lower() == "true")
+    PROFILE_TRACE_SCREENSHOTS: bool = field(default_factory=lambda: _env("PROFILE_TRACE_SCREENSHOTS", "false").lower() == "true")
+
+    # Alertes de prix (évaluées après chaque run)
+    ALERTS_ENABLED: bool = field(default_factory=lambda: _env("ALERTS_ENABLED", "true").lower() == "true")
+    ALERT_SINKS: List[str] = field(default_factory=lambda: [s.strip() for s in _env("ALERT_SINKS", "file,table").split(",") if s.strip()])
+    ALERT_WEBHOOK_URL: Optional[str] = field(default_factory=lambda: _env("ALERT_WEBHOOK_URL"))
+    ALERT_FILE_PATH: str = field(default_factory=lambda: _env("ALERT_FILE_PATH", "data/alerts.jsonl"))
+    ALERT_STATE_PATH: str = field(default_factory=lambda: _env("ALERT_STATE_PATH", "data/alert_state.json"))
+    ALERT_STATE_LOOKBACK_HOURS: int = field(default_factory=lambda: int(_env("ALERT_STATE_LOOKBACK_HOURS", "48")))
+    ALERT_UNDERCUT_THRESHOLD_PCT: float = field(default_factory=lambda: float(_env("ALERT_UNDERCUT_THRESHOLD_PCT", "10")))
+    ALERT_UNDERCUT_WITHIN_DAYS: int = field(default_factory=lambda: int(_env("ALERT_UNDERCUT_WITHIN_DAYS", "7")))
+
+    def validate(self):
+        """Lève ValueError si la configuration est inutilisable"""
+        if self.STORAGE_BACKEND == "supabase" and (not self.SUPABASE_URL or not self.SUPABASE_SERVICE_KEY):
+            raise ValueError("SUPABASE_URL et SUPABASE_SERVICE_KEY doivent être définis dans .env")
 
-# Session Times (random ranges in hours)
-SESSION_1_START_HOUR = int(os.getenv("SESSION_1_START_HOUR", "8"))
-SESSION_1_END_HOUR = int(os.getenv("SESSION_1_END_HOUR", "11"))
-SESSION_2_START_HOUR = int(os.getenv("SESSION_2_START_HOUR", "14"))
-SESSION_2_END_HOUR = int(os.getenv("SESSION_2_END_HOUR", "17"))
 
 # User Agents pour rotation
 USER_AGENTS = [
@@ -39,8 +175,37 @@ USER_AGENTS = [
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15",
 ]
 
-# Validation
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    raise ValueError("SUPABASE_URL et SUPABASE_SERVICE_KEY doivent être définis dans .env")
 
-print(f"✅ Configuration chargée - Environment: {ENVIRONMENT}")
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+_SETTING_NAMES = {f.name for f in fields(Settings)}
+
+
+def get_settings() -> Settings:
+    """Charge .env et construit les réglages au premier appel (mis en cache)"""
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                from dotenv import load_dotenv
+                load_dotenv()
+                _settings = Settings()
+    return _settings
+
+
+def validate_settings() -> Settings:
+    """
+    Vérifie la configuration au démarrage d'un process (API, scheduler)
+    Lève ValueError si elle est incomplète
+    """
+    settings = get_settings()
+    settings.validate()
+    print(f"✅ Configuration chargée - Environment: {settings.ENVIRONMENT}")
+    return settings
+
+
+def __getattr__(name: str):
+    # Compatibilité: `from config import SUPABASE_URL` lit le réglage à la demande
+    if name in _SETTING_NAMES:
+        return getattr(get_settings(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,61 @@
-from .supabase_client import supabase_client
+"""
+Accès au stockage: get_storage() retourne le backend choisi par STORAGE_BACKEND
+(supabase ou sqlite), construit au premier appel puis partagé.
+get_async_storage() en est l'équivalent awaitable pour les handlers FastAPI.
+"""
+import threading
 
-__all__ = ['supabase_client']
+_storage = None
+_async_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Retourne l'instance partagée du backend de stockage configuré"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = create_storage()
+    return _storage
+
+
+def create_storage(backend: str = None):
+    """
+    Construit un nouveau backend de stockage
+
+    Args:
+        backend: "supabase" ou "sqlite" (défaut: STORAGE_BACKEND)
+    """
+    from config import STORAGE_BACKEND
+    backend = (backend or STORAGE_BACKEND).lower()
+
+    if backend == "sqlite":
+        from .sqlite_backend import SQLiteStorage
+        return SQLiteStorage()
+    if backend == "supabase":
+        from .supabase_client import SupabaseClient
+        return SupabaseClient()
+    raise ValueError(f"STORAGE_BACKEND inconnu: {backend} (supabase ou sqlite)")
+
+
+def get_async_storage():
+    """
+    Retourne l'instance partagée du stockage asynchrone: client PostgREST
+    async pour Supabase, backend synchrone exécuté en thread pour SQLite
+    """
+    global _async_storage
+    if _async_storage is None:
+        from config import STORAGE_BACKEND
+        if STORAGE_BACKEND != "supabase":
+            from .async_client import AsyncStorageAdapter
+            _async_storage = AsyncStorageAdapter(get_storage())
+        else:
+            with _storage_lock:
+                if _async_storage is None:
+                    from .async_client import AsyncSupabaseClient
+                    _async_storage = AsyncSupabaseClient()
+    return _async_storage
+
+
+__all__ = ['get_storage', 'create_storage', 'get_async_storage']
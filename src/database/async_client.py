@@ -0,0 +1,101 @@
+"""
+Accès asynchrone au stockage pour les handlers FastAPI
+
+AsyncSupabaseClient parle à PostgREST via le pool httpx asynchrone partagé
+(pas de thread bloqué pendant l'aller-retour réseau). Pour le backend
+SQLite, AsyncStorageAdapter exécute les méthodes synchrones dans un thread.
+"""
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+import asyncio
+import functools
+import uuid
+import sys
+import os
+
+from postgrest import AsyncPostgrestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from observability import timed_call, inc
+from database.http_transport import get_async_http_client
+
+
+class AsyncSupabaseClient:
+    """Sous-ensemble asynchrone de SupabaseClient utilisé par l'API"""
+
+    def __init__(self):
+        if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+            raise ValueError("SUPABASE_URL et SUPABASE_SERVICE_KEY doivent être définis dans .env")
+        self.postgrest = AsyncPostgrestClient(
+            f"{SUPABASE_URL.rstrip('/')}/rest/v1",
+            headers={
+                "apikey": SUPABASE_SERVICE_KEY,
+                "Authorization": f"Bearer {SUPABASE_SERVICE_KEY}",
+            },
+        )
+        # Même principe que use_shared_session: une seule session par process
+        session = self.postgrest.session
+        shared = get_async_http_client(str(session.base_url), dict(session.headers))
+        self.postgrest.session = shared
+
+    @timed_call("db_read")
+    async def get_monitored_hotels(self) -> List[Dict[str, Any]]:
+        """Récupère tous les hôtels actifs (isMonitored=true)"""
+        try:
+            response = await self.postgrest.table("hotels") \
+                .select("*") \
+                .eq("isMonitored", True) \
+                .execute()
+            return response.data
+        except Exception as e:
+            print(f"❌ Erreur get_monitored_hotels: {e}")
+            inc("db_errors_total", op="get_monitored_hotels")
+            return []
+
+    @timed_call("db_read")
+    async def get_hotel_by_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Récupère un hôtel par son URL"""
+        try:
+            response = await self.postgrest.table("hotels") \
+                .select("*") \
+                .eq("url", url) \
+                .execute()
+            return response.data[0] if response.data else None
+        except Exception as e:
+            print(f"❌ Erreur get_hotel_by_url: {e}")
+            inc("db_errors_total", op="get_hotel_by_url")
+            return None
+
+    @timed_call("db_write")
+    async def create_hotel(self, hotel_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Crée un nouvel hôtel"""
+        try:
+            hotel_data["id"] = str(uuid.uuid4())
+            hotel_data["createdAt"] = datetime.now().isoformat()
+            hotel_data["updatedAt"] = datetime.now().isoformat()
+
+            response = await self.postgrest.table("hotels").insert(hotel_data).execute()
+            print(f"✅ Hôtel créé: {hotel_data.get('name')}")
+            return response.data[0] if response.data else None
+        except Exception as e:
+            print(f"❌ Erreur create_hotel: {e}")
+            inc("db_errors_total", op="create_hotel")
+            return None
+
+
+class AsyncStorageAdapter:
+    """Expose un backend synchrone (SQLite) avec des méthodes awaitables"""
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def __getattr__(self, name: str):
+        method = getattr(self.storage, name)
+        if not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call(*args, **kwargs):
+            return await asyncio.to_thread(method, *args, **kwargs)
+        return call
@@ -0,0 +1,171 @@
+"""
+Interface commune des backends de stockage (Supabase, SQLite local)
+Le reste du code ne dépend que de ces méthodes.
+"""
+from abc import ABC, abstractmethod
+from typing import Optional, List, Dict, Any, Set, Tuple
+from datetime import datetime, date
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SNAPSHOT_BATCH_SIZE
+from database.log_stats import summarize_hotel_timings
+
+# Colonnes du snapshot recopiées sur chaque ligne rate_snapshot_rooms
+ROOM_PARENT_COLUMNS = ("hotelId", "dateCheckin", "nights", "adults", "scrapedAt")
+
+
+def prepare_snapshot_rows(
+    snapshots: List[Dict[str, Any]],
+    scraped_at: str
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Prépare un batch de snapshots pour l'insertion
+
+    Attribue id et scrapedAt aux snapshots (l'appelant les réutilise,
+    ex: moteur d'alertes) et sépare les offres extraites du tableau des
+    chambres (clé "rooms") en lignes rate_snapshot_rooms.
+
+    Returns:
+        (lignes rate_snapshots, lignes rate_snapshot_rooms)
+    """
+    rows, room_rows = [], []
+    for snapshot in snapshots:
+        snapshot["id"] = str(uuid.uuid4())
+        snapshot["scrapedAt"] = scraped_at
+        row = {key: value for key, value in snapshot.items() if key != "rooms"}
+        rows.append(row)
+        for room in snapshot.get("rooms") or []:
+            room_row = {"id": str(uuid.uuid4()), "snapshotId": snapshot["id"]}
+            room_row.update({column: row.get(column) for column in ROOM_PARENT_COLUMNS})
+            room_row.update(room)
+            room_rows.append(room_row)
+    return rows, room_rows
+
+
+class StorageBackend(ABC):
+    """Opérations de stockage utilisées par les scrapers, l'API et le scheduler"""
+
+    # ============ HOTELS ============
+
+    @abstractmethod
+    def get_monitored_hotels(self) -> List[Dict[str, Any]]:
+        """Récupère tous les hôtels actifs (isMonitored=true)"""
+
+    @abstractmethod
+    def create_hotel(self, hotel_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Crée un nouvel hôtel"""
+
+    @abstractmethod
+    def update_hotel(self, hotel_id: str, updates: Dict[str, Any]) -> bool:
+        """Met à jour un hôtel"""
+
+    @abstractmethod
+    def get_hotel_by_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Récupère un hôtel par son URL"""
+
+    # ============ RATE SNAPSHOTS ============
+
+    @abstractmethod
+    def create_rate_snapshot(self, snapshot_data: Dict[str, Any]) -> bool:
+        """Crée un snapshot de prix"""
+
+    @abstractmethod
+    def create_rate_snapshots_batch(
+        self,
+        snapshots: List[Dict[str, Any]],
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+        created_ids: Optional[Set[str]] = None
+    ) -> int:
+        """
+        Crée plusieurs snapshots en batch, retourne le nombre créé
+
+        created_ids, si fourni, reçoit les id des snapshots effectivement
+        créés (un paquet en échec n'empêche pas l'écriture des autres)
+        """
+
+    @abstractmethod
+    def get_latest_snapshot(self, hotel_id: str, checkin_date: date) -> Optional[Dict[str, Any]]:
+        """Récupère le dernier snapshot pour un hôtel et une date"""
+
+    @abstractmethod
+    def get_latest_snapshots(
+        self,
+        hotel_ids: List[str],
+        checkin_dates: List[str],
+        since: datetime
+    ) -> List[Dict[str, Any]]:
+        """Snapshots récents de quelques hôtels/dates (cache des alertes)"""
+
+    @abstractmethod
+    def get_rate_snapshots_after(
+        self,
+        cursor: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Snapshots triés par (scrapedAt, id) strictement après le curseur
+        (pagination par clé; None = depuis le début)
+        """
+
+    # ============ RATE CURVES ============
+
+    @abstractmethod
+    def create_rate_curves_batch(self, curves: List[Dict[str, Any]]) -> int:
+        """Enregistre des courbes (voir database.rate_curves), ignore celles déjà présentes"""
+
+    @abstractmethod
+    def get_rate_curves(
+        self,
+        hotel_ids: List[str],
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Courbes de quelques hôtels (runs depuis since), plus récentes d'abord"""
+
+    # ============ PRICE ALERTS ============
+
+    @abstractmethod
+    def create_price_alerts_batch(self, alerts: List[Dict[str, Any]]) -> int:
+        """Enregistre les alertes de prix émises par un run"""
+
+    # ============ SCRAPER LOGS ============
+
+    @abstractmethod
+    def create_scraper_log(self, log_data: Dict[str, Any]) -> Optional[str]:
+        """Crée un log de scraping, retourne son id"""
+
+    @abstractmethod
+    def update_scraper_log(self, log_id: str, updates: Dict[str, Any]) -> bool:
+        """Met à jour un log de scraping"""
+
+    @abstractmethod
+    def create_scraper_hotel_logs_batch(self, log_id: str, hotel_runs: List[Dict[str, Any]]) -> int:
+        """Enregistre les lignes de performance par hôtel d'un run"""
+
+    @abstractmethod
+    def get_recent_hotel_logs(self, hotel_id: str, limit: int) -> List[Dict[str, Any]]:
+        """N dernières lignes scraper_hotel_logs d'un hôtel (plus récentes d'abord)"""
+
+    def get_hotel_scrape_percentiles(
+        self,
+        last_n_runs: int = 20,
+        hotel_ids: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        p50/p95 du temps de scraping par hôtel sur ses N derniers runs
+
+        Args:
+            last_n_runs: Nombre de runs récents par hôtel
+            hotel_ids: Hôtels à analyser (défaut: hôtels surveillés)
+
+        Returns:
+            Dict hotelId -> {runs, p50DurationMs, p95DurationMs, p50PageMs, p95PageMs, timeouts}
+        """
+        if hotel_ids is None:
+            hotel_ids = [h["id"] for h in self.get_monitored_hotels()]
+        return {
+            hotel_id: summarize_hotel_timings(self.get_recent_hotel_logs(hotel_id, last_n_runs))
+            for hotel_id in hotel_ids
+        }
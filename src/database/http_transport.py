@@ -0,0 +1,196 @@
+"""
+Transport HTTP partagé par les clients Supabase (PostgREST)
+
+Un seul pool de connexions keep-alive par process (API, scheduler),
+HTTP/2 si le paquet h2 est installé, timeouts explicites et nouvelles
+tentatives avec backoff exponentiel + gigue sur les erreurs transitoires.
+"""
+from typing import Dict, Optional
+import asyncio
+import random
+import threading
+import time
+import sys
+import os
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    SUPABASE_HTTP2,
+    SUPABASE_MAX_CONNECTIONS,
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+    SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+    SUPABASE_TIMEOUT_SECONDS,
+    SUPABASE_CONNECT_TIMEOUT_SECONDS,
+    SUPABASE_MAX_RETRIES,
+    SUPABASE_RETRY_BACKOFF_SECONDS,
+)
+from observability import inc
+
+# Méthodes sans effet de bord: rejouables quelle que soit l'erreur transitoire
+IDEMPOTENT_METHODS = {"GET", "HEAD"}
+# 429 / 503: requête refusée avant traitement (limite de débit, service indisponible)
+RETRYABLE_STATUS = {429, 503}
+# 502 / 504: la passerelle a pu abandonner après que PostgREST a appliqué l'écriture,
+# rejoués seulement pour les lectures (un POST rejoué dupliquerait les lignes)
+RETRYABLE_READ_STATUS = {502, 504}
+
+_clients: Dict[str, httpx.Client] = {}
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _http2_available() -> bool:
+    if not SUPABASE_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print("⚠️ SUPABASE_HTTP2 activé mais le paquet h2 est absent (pip install 'httpx[http2]'), HTTP/1.1 utilisé")
+        return False
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(SUPABASE_TIMEOUT_SECONDS, connect=SUPABASE_CONNECT_TIMEOUT_SECONDS)
+
+
+def backoff_delay(attempt: int, base: float = None) -> float:
+    """Backoff exponentiel avec gigue complète: uniforme dans [0, base * 2^attempt]"""
+    base = SUPABASE_RETRY_BACKOFF_SECONDS if base is None else base
+    return random.uniform(0, base * (2 ** attempt))
+
+
+def _should_retry(request: httpx.Request, error: Optional[Exception], response: Optional[httpx.Response]) -> bool:
+    """
+    Erreur de connexion: la requête n'est pas partie, toujours rejouable.
+    Timeout de lecture, 502/504: rejoués seulement pour les lectures (une
+    écriture a pu être appliquée, ses lignes ont des id neufs).
+    429/503: refus avant traitement, rejouables pour toute méthode.
+    """
+    idempotent = request.method in IDEMPOTENT_METHODS
+    if error is not None:
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return True
+        return idempotent and isinstance(error, httpx.TransportError)
+    if response is None:
+        return False
+    return response.status_code in RETRYABLE_STATUS or (idempotent and response.status_code in RETRYABLE_READ_STATUS)
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Transport httpx qui rejoue les erreurs transitoires avec gigue"""
+
+    def __init__(self, transport: httpx.BaseTransport, max_retries: int = SUPABASE_MAX_RETRIES):
+        self.transport = transport
+        self.max_retries = max_retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            error, response = None, None
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                error = e
+            if attempt >= self.max_retries or not _should_retry(request, error, response):
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                response.close()
+            inc("db_retries_total", method=request.method)
+            time.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Variante asynchrone de RetryTransport (handlers FastAPI)"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, max_retries: int = SUPABASE_MAX_RETRIES):
+        self.transport = transport
+        self.max_retries = max_retries
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            error, response = None, None
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                error = e
+            if attempt >= self.max_retries or not _should_retry(request, error, response):
+                if error is not None:
+                    raise error
+                return response
+            if response is not None:
+                await response.aclose()
+            inc("db_retries_total", method=request.method)
+            await asyncio.sleep(backoff_delay(attempt))
+            attempt += 1
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def get_http_client(base_url: str, headers: Dict[str, str]) -> httpx.Client:
+    """Client httpx partagé (un pool par URL PostgREST et par process)"""
+    with _clients_lock:
+        client = _clients.get(base_url)
+        if client is None:
+            http2 = _http2_available()
+            transport = httpx.HTTPTransport(http2=http2, limits=_limits())
+            client = httpx.Client(
+                base_url=base_url,
+                headers=headers,
+                timeout=_timeout(),
+                transport=RetryTransport(transport),
+            )
+            _clients[base_url] = client
+        return client
+
+
+def get_async_http_client(base_url: str, headers: Dict[str, str]) -> httpx.AsyncClient:
+    """Équivalent asynchrone de get_http_client (boucle asyncio de l'API)"""
+    with _clients_lock:
+        client = _async_clients.get(base_url)
+        if client is None:
+            http2 = _http2_available()
+            transport = httpx.AsyncHTTPTransport(http2=http2, limits=_limits())
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                headers=headers,
+                timeout=_timeout(),
+                transport=AsyncRetryTransport(transport),
+            )
+            _async_clients[base_url] = client
+        return client
+
+
+def close_http_clients():
+    """Ferme les pools synchrones (fin de process)"""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+async def aclose_http_clients():
+    """Ferme les pools asynchrones (arrêt de l'API)"""
+    with _clients_lock:
+        clients = list(_async_clients.values())
+        _async_clients.clear()
+    for client in clients:
+        await client.aclose()
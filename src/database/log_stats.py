@@ -0,0 +1,37 @@
+"""
+Agrégats de performance calculés à partir de scraper_hotel_logs
+"""
+from typing import List, Dict, Any, Optional, Sequence
+import math
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Percentile par rang le plus proche (None si aucune valeur)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_hotel_timings(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    p50/p95 de la durée totale et de la durée par page pour un hôtel
+
+    Args:
+        rows: Lignes scraper_hotel_logs d'un même hôtel
+    """
+    durations = [r["durationMs"] for r in rows if r.get("durationMs") is not None]
+    per_page = [
+        r["durationMs"] / r["pagesLoaded"]
+        for r in rows
+        if r.get("durationMs") is not None and r.get("pagesLoaded")
+    ]
+    return {
+        "runs": len(rows),
+        "p50DurationMs": percentile(durations, 50),
+        "p95DurationMs": percentile(durations, 95),
+        "p50PageMs": percentile(per_page, 50),
+        "p95PageMs": percentile(per_page, 95),
+        "timeouts": sum(r.get("timeouts") or 0 for r in rows),
+    }
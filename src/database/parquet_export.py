@@ -0,0 +1,262 @@
+"""
+Export incrémental de l'historique rate_snapshots en Parquet
+
+Les snapshots postérieurs au dernier export (watermark (scrapedAt, id),
+pagination par clé) sont écrits en fichiers Parquet compressés zstd,
+partitionnés par jour de scraping:
+
+    <PARQUET_EXPORT_DIR>/rate_snapshots/v<version>/scraped_date=2026-01-31/part-....parquet
+
+Le schéma est figé (_schema()) et versionné: changer ses colonnes
+impose d'incrémenter SCHEMA_VERSION, l'export repart alors de zéro dans
+un nouveau répertoire v<version> (l'ancien reste lisible). compact()
+fusionne les petits fichiers d'une partition (dédoublonnés par id).
+
+pyarrow est optionnel (pip install pyarrow), seul ce module en dépend.
+
+Usage:
+    python src/database/parquet_export.py
+    python src/database/parquet_export.py --compact-only
+"""
+from datetime import datetime, date, timezone
+from typing import Any, Dict, List
+import json
+import time
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PARQUET_EXPORT_DIR, PARQUET_COMPACT_MIN_FILES
+from observability import inc
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# À incrémenter à chaque changement de _schema()
+SCHEMA_VERSION = 1
+TABLE = "rate_snapshots"
+PARTITION = "scraped_date"
+COMPRESSION = "zstd"
+# Lignes gardées en mémoire avant écriture d'un fichier par partition
+FLUSH_ROWS = 200_000
+STATE_FILE = "_export_state.json"
+
+
+def _schema():
+    return pa.schema([
+        ("id", pa.string()),
+        ("hotelId", pa.string()),
+        ("dateCheckin", pa.date32()),
+        ("price", pa.float64()),
+        ("currency", pa.string()),
+        ("available", pa.bool_()),
+        ("outcome", pa.string()),
+        ("nights", pa.int16()),
+        ("adults", pa.int16()),
+        ("scrapedAt", pa.timestamp("us", tz="UTC")),
+    ], metadata={b"tarifscope.schema_version": str(SCHEMA_VERSION).encode()})
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("pyarrow est requis pour l'export Parquet (pip install pyarrow)")
+
+
+def parse_timestamp(value: Any) -> datetime:
+    """scrapedAt SQLite ("2026-01-31T06:00:00.123456") ou PostgREST ("...+00:00", "Z", fraction variable) en UTC"""
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).replace("Z", "+00:00").replace(" ", "T", 1)
+        # Python 3.9: fromisoformat n'accepte que 3 ou 6 chiffres de fraction
+        head, sep, tail = text.partition(".")
+        if sep:
+            digits = len(tail) - len(tail.lstrip("0123456789"))
+            text = f"{head}.{tail[:digits][:6].ljust(6, '0')}{tail[digits:]}"
+        parsed = datetime.fromisoformat(text)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _row(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Snapshot (format base) vers les types de _schema()"""
+    price = snapshot.get("price")
+    return {
+        "id": str(snapshot["id"]),
+        "hotelId": snapshot["hotelId"],
+        "dateCheckin": date.fromisoformat(str(snapshot["dateCheckin"])[:10]),
+        "price": float(price) if price is not None else None,
+        "currency": snapshot.get("currency"),
+        "available": bool(snapshot["available"]) if snapshot.get("available") is not None else None,
+        "outcome": snapshot.get("outcome"),
+        "nights": snapshot.get("nights"),
+        "adults": snapshot.get("adults"),
+        "scrapedAt": parse_timestamp(snapshot["scrapedAt"]),
+    }
+
+
+class ParquetExporter:
+    """Export incrémental et compaction d'un répertoire Parquet"""
+
+    def __init__(self, directory: str = PARQUET_EXPORT_DIR):
+        _require_pyarrow()
+        self.directory = directory
+        self.root = os.path.join(directory, TABLE, f"v{SCHEMA_VERSION}")
+        self.state_path = os.path.join(directory, STATE_FILE)
+        self.schema = _schema()
+
+    # ============ ÉTAT ============
+
+    def load_state(self) -> Dict[str, Any]:
+        """Watermark du dernier export; repart de zéro si la version du schéma a changé"""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        if state.get("schema_version") != SCHEMA_VERSION:
+            print(f"⚠️ Schéma v{state.get('schema_version')} -> v{SCHEMA_VERSION}: export complet dans {self.root}")
+            return {}
+        return state
+
+    def save_state(self, state: Dict[str, Any]):
+        """Écriture atomique (le watermark n'avance qu'après les fichiers)"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(state, schema_version=SCHEMA_VERSION), f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    # ============ ÉCRITURE ============
+
+    def partition_dir(self, day: str) -> str:
+        return os.path.join(self.root, f"{PARTITION}={day}")
+
+    def _write(self, path: str, table) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path, compression=COMPRESSION)
+        os.replace(tmp_path, path)
+
+    def _flush(self, buffers: Dict[str, List[Dict[str, Any]]]) -> int:
+        """Un fichier par partition tamponnée"""
+        written = 0
+        for day, rows in buffers.items():
+            table = pa.Table.from_pylist(rows, schema=self.schema)
+            name = f"part-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+            self._write(os.path.join(self.partition_dir(day), name), table)
+            written += len(rows)
+        buffers.clear()
+        return written
+
+    def export(self, storage, page_size: int = 1000, flush_rows: int = FLUSH_ROWS) -> int:
+        """
+        Exporte les snapshots postérieurs au watermark
+
+        page_size reste sous la limite de lignes PostgREST (1000 par défaut);
+        une page tronquée par le serveur ne fait que raccourcir le pas du curseur.
+
+        Returns:
+            Nombre de lignes exportées
+        """
+        state = self.load_state()
+        cursor = tuple(state["cursor"]) if state.get("cursor") else None
+        buffers: Dict[str, List[Dict[str, Any]]] = {}
+        buffered = 0
+        exported = 0
+        while True:
+            page = storage.get_rate_snapshots_after(cursor, page_size)
+            if not page:
+                break
+            for snapshot in page:
+                row = _row(snapshot)
+                buffers.setdefault(row["scrapedAt"].date().isoformat(), []).append(row)
+            buffered += len(page)
+            cursor = (page[-1]["scrapedAt"], page[-1]["id"])
+            if buffered >= flush_rows:
+                exported += self._flush(buffers)
+                buffered = 0
+                self.save_state({"cursor": cursor, "rows": state.get("rows", 0) + exported})
+                print(f"  📦 {exported} snapshot(s) exporté(s) jusqu'au {str(cursor[0])[:19]}")
+        if buffers:
+            exported += self._flush(buffers)
+            self.save_state({"cursor": cursor, "rows": state.get("rows", 0) + exported})
+        inc("parquet_rows_exported_total", exported)
+        return exported
+
+    # ============ COMPACTION ============
+
+    def compact(self, min_files: int = PARQUET_COMPACT_MIN_FILES) -> int:
+        """
+        Fusionne les partitions d'au moins min_files fichiers en un seul,
+        trié par (hotelId, dateCheckin, scrapedAt) et dédoublonné par id
+        (lignes réexportées après une interruption entre fichier et watermark)
+
+        Returns:
+            Nombre de partitions compactées
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        compacted = 0
+        for entry in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, entry)
+            files = sorted(
+                os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".parquet")
+            )
+            if len(files) < max(min_files, 2):
+                continue
+            table = pa.concat_tables(pq.read_table(path, schema=self.schema) for path in files)
+            rows = {row["id"]: row for row in table.to_pylist()}
+            merged = pa.Table.from_pylist(
+                sorted(rows.values(), key=lambda r: (r["hotelId"], r["dateCheckin"], r["scrapedAt"])),
+                schema=self.schema,
+            )
+            name = f"compacted-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.parquet"
+            self._write(os.path.join(directory, name), merged)
+            for path in files:
+                os.remove(path)
+            compacted += 1
+            print(f"  🗜️ {entry}: {len(files)} fichiers -> 1 ({merged.num_rows} lignes)")
+        return compacted
+
+
+def dataset(directory: str = PARQUET_EXPORT_DIR):
+    """Jeu de données pyarrow de la version courante (colonne scraped_date incluse)"""
+    _require_pyarrow()
+    import pyarrow.dataset as ds
+    return ds.dataset(
+        os.path.join(directory, TABLE, f"v{SCHEMA_VERSION}"),
+        format="parquet",
+        partitioning="hive",
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export incrémental rate_snapshots -> Parquet")
+    parser.add_argument("--dir", default=PARQUET_EXPORT_DIR, help="Répertoire de l'export")
+    parser.add_argument("--page-size", type=int, default=1000, help="Snapshots lus par requête")
+    parser.add_argument("--compact-only", action="store_true", help="Compacter sans exporter")
+    parser.add_argument("--min-files", type=int, default=PARQUET_COMPACT_MIN_FILES,
+                        help="Fichiers par partition à partir desquels compacter")
+    args = parser.parse_args()
+
+    try:
+        exporter = ParquetExporter(args.dir)
+    except ImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if not args.compact_only:
+        from database import get_storage
+        print(f"🔄 Export des snapshots vers {exporter.root}...")
+        count = exporter.export(get_storage(), page_size=args.page_size)
+        print(f"✅ {count} snapshot(s) exporté(s)")
+    partitions = exporter.compact(args.min_files)
+    print(f"✅ {partitions} partition(s) compactée(s)")
@@ -0,0 +1,283 @@
+"""
+Stockage compact des courbes de prix (table rate_curves)
+
+Une ligne par (hôtel, run, nuits, adultes) au lieu d'une ligne par date:
+tout l'horizon tient dans des tableaux binaires
+    prices      int32 little-endian, centimes (-1 = pas de prix)
+    available   bitmap, bit i = date startDate + i disponible
+    outcomes    un octet par date, code du résultat (0 = date hors grille)
+
+Les lecteurs (curve_prices, expand_curve, price_matrix) ne décodent que
+ce qui est demandé. convert_snapshots() remplit la table depuis
+rate_snapshots (pagination par clé, idempotent).
+
+Usage:
+    python src/database/rate_curves.py --since 2026-01-01
+"""
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from database.parquet_export import parse_timestamp
+from scrapers import outcomes
+from scrapers.price_parser import DEFAULT_CURRENCY
+from scrapers.scrape_grid import REFERENCE_ADULTS, REFERENCE_NIGHTS
+
+# Centimes d'une date sans prix (complet, échec, hors grille)
+NO_PRICE = -1
+# Colonnes binaires (BYTEA côté Postgres, BLOB côté SQLite)
+BINARY_COLUMNS = ("prices", "available", "outcomes")
+# Code (indice) de chaque résultat dans la colonne outcomes
+OUTCOME_CODES = (
+    None, outcomes.SUCCESS, outcomes.SOLD_OUT, outcomes.TIMEOUT,
+    outcomes.BLOCKED, outcomes.PARSE_ERROR, outcomes.ERROR,
+)
+# Une courbe par clé: (hotelId, scrapedAt, nights, adults)
+CURVE_KEY = ("hotelId", "scrapedAt", "nights", "adults")
+
+CurveKey = Tuple[str, str, int, int]
+
+# Écart maximal entre deux snapshots consécutifs d'un hôtel dans un même run (conversion de l'historique)
+RUN_GAP = timedelta(minutes=30)
+
+
+def _int32(values: Iterable[int]) -> bytes:
+    packed = array("i", values)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _from_int32(data: bytes) -> array:
+    values = array("i")
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _bitmap(flags: List[bool]) -> bytes:
+    packed = bytearray((len(flags) + 7) // 8)
+    for i, flag in enumerate(flags):
+        if flag:
+            packed[i >> 3] |= 1 << (i & 7)
+    return bytes(packed)
+
+
+def _bit(data: bytes, i: int) -> bool:
+    return bool(data[i >> 3] & (1 << (i & 7)))
+
+
+def to_bytes(value: Union[bytes, bytearray, memoryview, str, None]) -> bytes:
+    """Valeur d'une colonne binaire telle que renvoyée par SQLite (bytes) ou PostgREST ("\\x0a1b...")"""
+    if value is None:
+        return b""
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:] if value.startswith("\\x") else value)
+    return bytes(value)
+
+
+def to_bytea_hex(data: bytes) -> str:
+    """Littéral BYTEA accepté par PostgREST en JSON"""
+    return "\\x" + data.hex()
+
+
+def curve_key(snapshot: Dict[str, Any]) -> CurveKey:
+    return (
+        snapshot["hotelId"],
+        snapshot["scrapedAt"],
+        snapshot.get("nights") or REFERENCE_NIGHTS,
+        snapshot.get("adults") or REFERENCE_ADULTS,
+    )
+
+
+def pack_curve(snapshots: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Ligne rate_curves à partir des snapshots d'une même courbe (même
+    hôtel, run, nuits et adultes; scrapedAt déjà attribué)
+    """
+    hotel_id, scraped_at, nights, adults = curve_key(snapshots[0])
+    days = {date.fromisoformat(str(s["dateCheckin"])[:10]): s for s in snapshots}
+    start = min(days)
+    length = (max(days) - start).days + 1
+
+    cents = [NO_PRICE] * length
+    available = [False] * length
+    codes = bytearray(length)
+    currencies: Dict[str, int] = {}
+    for checkin, snapshot in days.items():
+        i = (checkin - start).days
+        if snapshot.get("price") is not None:
+            cents[i] = int(round(snapshot["price"] * 100))
+            currency = snapshot.get("currency") or DEFAULT_CURRENCY
+            currencies[currency] = currencies.get(currency, 0) + 1
+        available[i] = bool(snapshot.get("available"))
+        # Ancien snapshot sans outcome: déduit du prix
+        outcome = snapshot.get("outcome") or (outcomes.SUCCESS if snapshot.get("price") is not None else outcomes.SOLD_OUT)
+        codes[i] = OUTCOME_CODES.index(outcome) if outcome in OUTCOME_CODES else OUTCOME_CODES.index(outcomes.ERROR)
+
+    return {
+        "id": str(uuid.uuid4()),
+        "hotelId": hotel_id,
+        "scrapedAt": scraped_at,
+        "nights": nights,
+        "adults": adults,
+        "startDate": start.isoformat(),
+        "days": length,
+        "currency": max(currencies, key=currencies.get) if currencies else DEFAULT_CURRENCY,
+        "prices": _int32(cents),
+        "available": _bitmap(available),
+        "outcomes": bytes(codes),
+    }
+
+
+def curves_from_snapshots(snapshots: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Regroupe des snapshots (scrapedAt attribué) en lignes rate_curves"""
+    groups: Dict[CurveKey, List[Dict[str, Any]]] = {}
+    for snapshot in snapshots:
+        groups.setdefault(curve_key(snapshot), []).append(snapshot)
+    return [pack_curve(group) for group in groups.values()]
+
+
+def curve_prices(curve: Dict[str, Any]) -> List[Optional[float]]:
+    """Prix de chaque date de l'horizon (None = pas de prix)"""
+    return [None if c == NO_PRICE else c / 100 for c in _from_int32(to_bytes(curve["prices"]))]
+
+
+def curve_dates(curve: Dict[str, Any]) -> List[date]:
+    start = date.fromisoformat(str(curve["startDate"])[:10])
+    return [start + timedelta(days=i) for i in range(curve["days"])]
+
+
+def expand_curve(curve: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Snapshots équivalents à une courbe (format rate_snapshots, sans id),
+    dates hors grille exclues
+    """
+    prices = curve_prices(curve)
+    available = to_bytes(curve["available"])
+    codes = to_bytes(curve["outcomes"])
+    snapshots = []
+    for i, checkin in enumerate(curve_dates(curve)):
+        if not codes[i]:
+            continue
+        snapshots.append({
+            "hotelId": curve["hotelId"],
+            "dateCheckin": checkin.isoformat(),
+            "price": prices[i],
+            "currency": curve.get("currency") or DEFAULT_CURRENCY,
+            "available": _bit(available, i),
+            "outcome": OUTCOME_CODES[codes[i]],
+            "nights": curve.get("nights") or REFERENCE_NIGHTS,
+            "adults": curve.get("adults") or REFERENCE_ADULTS,
+            "scrapedAt": curve["scrapedAt"],
+        })
+    return snapshots
+
+
+def price_matrix(
+    curves: List[Dict[str, Any]],
+    nights: int = REFERENCE_NIGHTS,
+    adults: int = REFERENCE_ADULTS
+) -> Tuple[List[date], Dict[str, List[Optional[float]]]]:
+    """
+    Matrice hôtel x date pour une occupation (courbe la plus récente par hôtel)
+
+    Returns:
+        (dates, hotelId -> prix alignés sur dates)
+    """
+    latest: Dict[str, Dict[str, Any]] = {}
+    for curve in curves:
+        if (curve.get("nights") or REFERENCE_NIGHTS) != nights or (curve.get("adults") or REFERENCE_ADULTS) != adults:
+            continue
+        current = latest.get(curve["hotelId"])
+        if current is None or str(curve["scrapedAt"]) > str(current["scrapedAt"]):
+            latest[curve["hotelId"]] = curve
+    if not latest:
+        return [], {}
+
+    starts = {hotel_id: curve_dates(curve)[0] for hotel_id, curve in latest.items()}
+    first = min(starts.values())
+    last = max(starts[h] + timedelta(days=c["days"] - 1) for h, c in latest.items())
+    width = (last - first).days + 1
+    dates = [first + timedelta(days=i) for i in range(width)]
+
+    matrix = {}
+    for hotel_id, curve in latest.items():
+        offset = (starts[hotel_id] - first).days
+        row: List[Optional[float]] = [None] * width
+        row[offset:offset + curve["days"]] = curve_prices(curve)
+        matrix[hotel_id] = row
+    return dates, matrix
+
+
+def _flush_run(run: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Courbes d'un run, toutes datées du premier scrapedAt du run"""
+    scraped_at = run[0]["scrapedAt"]
+    return curves_from_snapshots([{**s, "scrapedAt": scraped_at} for s in run])
+
+
+def convert_snapshots(storage, since: Optional[str] = None, page_size: int = 5000) -> int:
+    """
+    Remplit rate_curves depuis rate_snapshots (runs à partir de since)
+
+    Les anciens snapshots portent chacun leur propre scrapedAt (horodatage
+    à l'insertion de chaque ligne): les snapshots consécutifs d'un hôtel
+    espacés de moins de RUN_GAP forment un run, daté de son premier
+    scrapedAt. Les snapshots sont lus par pages triées (scrapedAt, id); un
+    run n'est converti qu'une fois complet. Les courbes déjà présentes sont
+    ignorées (since doit tomber entre deux runs pour rejouer sans doublon).
+
+    Returns:
+        Nombre de courbes écrites
+    """
+    cursor = (since, "") if since else None
+    # hotelId -> (dernier scrapedAt, snapshots du run en cours)
+    runs: Dict[str, Tuple[datetime, List[Dict[str, Any]]]] = {}
+    written = 0
+    while True:
+        page = storage.get_rate_snapshots_after(cursor, page_size)
+        if not page:
+            break
+        cursor = (page[-1]["scrapedAt"], page[-1]["id"])
+        complete: List[Dict[str, Any]] = []
+        for snapshot in page:
+            scraped_at = parse_timestamp(snapshot["scrapedAt"])
+            last, run = runs.get(snapshot["hotelId"], (None, None))
+            if run and scraped_at - last > RUN_GAP:
+                complete.extend(_flush_run(run))
+                run = None
+            run = run or []
+            run.append(snapshot)
+            runs[snapshot["hotelId"]] = (scraped_at, run)
+        # Run terminé: plus aucun snapshot de l'hôtel possible à moins de RUN_GAP
+        horizon = parse_timestamp(cursor[0]) - RUN_GAP
+        for hotel_id, (last, run) in list(runs.items()):
+            if last < horizon:
+                complete.extend(_flush_run(run))
+                del runs[hotel_id]
+        if complete:
+            written += storage.create_rate_curves_batch(complete)
+        print(f"  📦 {written} courbe(s) jusqu'au {str(cursor[0])[:19]}")
+    remaining = [curve for _, run in runs.values() for curve in _flush_run(run)]
+    if remaining:
+        written += storage.create_rate_curves_batch(remaining)
+    return written
+
+
+if __name__ == "__main__":
+    import argparse
+    from database import get_storage
+
+    parser = argparse.ArgumentParser(description="Conversion rate_snapshots -> rate_curves")
+    parser.add_argument("--since", help="Premier scrapedAt à convertir (ISO, défaut: tout l'historique)")
+    parser.add_argument("--page-size", type=int, default=5000, help="Snapshots lus par requête")
+    args = parser.parse_args()
+
+    print("🔄 Conversion des snapshots en courbes...")
+    count = convert_snapshots(get_storage(), since=args.since, page_size=args.page_size)
+    print(f"✅ {count} courbe(s) écrite(s)")
@@ -0,0 +1,496 @@
+"""
+Backend de stockage SQLite local (même schéma que Supabase)
+Pour les backtests, benchmarks et analyses sans aller-retour réseau.
+"""
+from typing import Optional, List, Dict, Any, Iterable, Set, Tuple
+from datetime import datetime, date
+import json
+import sqlite3
+import threading
+import uuid
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SQLITE_PATH, SNAPSHOT_BATCH_SIZE
+from observability import timed_call, inc
+from database.base import StorageBackend, prepare_snapshot_rows
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hotels (
+  id TEXT PRIMARY KEY,
+  name TEXT NOT NULL,
+  location TEXT,
+  address TEXT,
+  url TEXT NOT NULL UNIQUE,
+  stars INTEGER,
+  "photoUrl" TEXT,
+  "isClient" INTEGER DEFAULT 0,
+  "isMonitored" INTEGER DEFAULT 1,
+  "createdAt" TEXT,
+  "updatedAt" TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_hotels_monitored ON hotels("isMonitored");
+
+CREATE TABLE IF NOT EXISTS rate_snapshots (
+  id TEXT PRIMARY KEY,
+  "hotelId" TEXT NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+  "dateCheckin" TEXT NOT NULL,
+  price REAL,
+  currency TEXT DEFAULT 'EUR',
+  available INTEGER DEFAULT 1,
+  outcome TEXT,
+  nights INTEGER DEFAULT 1,
+  adults INTEGER DEFAULT 2,
+  "scrapedAt" TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_rate_snapshots_hotel_date ON rate_snapshots("hotelId", "dateCheckin", "scrapedAt");
+CREATE INDEX IF NOT EXISTS idx_rate_snapshots_scraped ON rate_snapshots("scrapedAt");
+
+CREATE TABLE IF NOT EXISTS rate_snapshot_rooms (
+  id TEXT PRIMARY KEY,
+  "snapshotId" TEXT NOT NULL REFERENCES rate_snapshots(id) ON DELETE CASCADE,
+  "hotelId" TEXT NOT NULL,
+  "dateCheckin" TEXT NOT NULL,
+  nights INTEGER DEFAULT 1,
+  adults INTEGER DEFAULT 2,
+  "roomName" TEXT,
+  "ratePlan" TEXT,
+  price REAL,
+  "originalPrice" REAL,
+  currency TEXT DEFAULT 'EUR',
+  refundable INTEGER,
+  "breakfastIncluded" INTEGER DEFAULT 0,
+  "taxesIncluded" INTEGER,
+  position INTEGER,
+  "scrapedAt" TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_rate_snapshot_rooms_snapshot ON rate_snapshot_rooms("snapshotId");
+CREATE INDEX IF NOT EXISTS idx_rate_snapshot_rooms_hotel_date ON rate_snapshot_rooms("hotelId", "dateCheckin", "scrapedAt");
+
+CREATE TABLE IF NOT EXISTS rate_curves (
+  id TEXT PRIMARY KEY,
+  "hotelId" TEXT NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+  "scrapedAt" TEXT NOT NULL,
+  nights INTEGER DEFAULT 1,
+  adults INTEGER DEFAULT 2,
+  "startDate" TEXT NOT NULL,
+  days INTEGER NOT NULL,
+  currency TEXT DEFAULT 'EUR',
+  prices BLOB NOT NULL,
+  available BLOB NOT NULL,
+  outcomes BLOB NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rate_curves_run ON rate_curves("hotelId", "scrapedAt", nights, adults);
+
+CREATE TABLE IF NOT EXISTS scraper_logs (
+  id TEXT PRIMARY KEY,
+  status TEXT NOT NULL,
+  "hotelId" TEXT,
+  "snapshotsCreated" INTEGER DEFAULT 0,
+  error TEXT,
+  errors TEXT DEFAULT '[]',
+  "durationMs" INTEGER,
+  "hotelsTotal" INTEGER,
+  "hotelsCompleted" INTEGER,
+  "startedAt" TEXT,
+  "completedAt" TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scraper_logs_started ON scraper_logs("startedAt");
+
+CREATE TABLE IF NOT EXISTS scraper_hotel_logs (
+  id TEXT PRIMARY KEY,
+  "logId" TEXT NOT NULL REFERENCES scraper_logs(id) ON DELETE CASCADE,
+  "hotelId" TEXT,
+  "startedAt" TEXT NOT NULL,
+  "completedAt" TEXT,
+  "durationMs" INTEGER,
+  "pagesLoaded" INTEGER DEFAULT 0,
+  timeouts INTEGER DEFAULT 0,
+  errors INTEGER DEFAULT 0,
+  retries INTEGER DEFAULT 0,
+  rotations INTEGER DEFAULT 0,
+  aborted INTEGER DEFAULT 0,
+  "cellsPruned" INTEGER DEFAULT 0,
+  "bytesTransferred" INTEGER DEFAULT 0,
+  "unavailableDates" TEXT DEFAULT '[]',
+  "failedDates" TEXT DEFAULT '[]',
+  "dateTimings" TEXT DEFAULT '{}',
+  "errorMessages" TEXT DEFAULT '[]'
+);
+CREATE INDEX IF NOT EXISTS idx_scraper_hotel_logs_hotel_started ON scraper_hotel_logs("hotelId", "startedAt");
+
+CREATE TABLE IF NOT EXISTS price_alerts (
+  id TEXT PRIMARY KEY,
+  rule TEXT NOT NULL,
+  "hotelId" TEXT,
+  "dateCheckin" TEXT NOT NULL,
+  severity TEXT DEFAULT 'warning',
+  message TEXT NOT NULL,
+  payload TEXT DEFAULT '{}',
+  "createdAt" TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_price_alerts_created ON price_alerts("createdAt");
+"""
+
+# Colonnes ajoutées après la création du schéma: (table, colonne, déclaration)
+# appliquées aux fichiers existants à l'ouverture
+MIGRATIONS = [
+    ("rate_snapshots", "outcome", "TEXT"),
+    ("scraper_hotel_logs", "rotations", "INTEGER DEFAULT 0"),
+    ("scraper_hotel_logs", "aborted", "INTEGER DEFAULT 0"),
+    ("rate_snapshots", "nights", "INTEGER DEFAULT 1"),
+    ("rate_snapshots", "adults", "INTEGER DEFAULT 2"),
+    ("scraper_hotel_logs", "cellsPruned", "INTEGER DEFAULT 0"),
+    ("rate_snapshot_rooms", "taxesIncluded", "INTEGER"),
+    ("scraper_logs", "hotelsTotal", "INTEGER"),
+    ("scraper_logs", "hotelsCompleted", "INTEGER"),
+]
+
+# Colonnes JSONB côté Postgres, stockées en TEXT JSON
+JSON_COLUMNS = {
+    "scraper_logs": {"errors"},
+    "scraper_hotel_logs": {"unavailableDates", "failedDates", "dateTimings", "errorMessages"},
+    "price_alerts": {"payload"},
+}
+
+# Colonnes BOOLEAN côté Postgres, stockées en INTEGER
+BOOL_COLUMNS = {
+    "hotels": {"isClient", "isMonitored"},
+    "rate_snapshots": {"available"},
+    "rate_snapshot_rooms": {"refundable", "breakfastIncluded", "taxesIncluded"},
+    "scraper_hotel_logs": {"aborted"},
+}
+
+
+def _quote(column: str) -> str:
+    return '"' + column.replace('"', '""') + '"'
+
+
+class SQLiteStorage(StorageBackend):
+    """Stockage local dans un fichier SQLite (mode WAL)"""
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=OFF")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        print(f"✅ Stockage SQLite initialisé ({path})")
+
+    # ============ OUTILS ============
+
+    def _migrate(self):
+        """Ajoute les colonnes manquantes d'une base créée avec un schéma plus ancien"""
+        for table, column, declaration in MIGRATIONS:
+            existing = {row["name"] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {_quote(column)} {declaration}")
+        self.conn.commit()
+
+    def _encode(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        json_cols = JSON_COLUMNS.get(table, set())
+        encoded = {}
+        for key, value in row.items():
+            if key in json_cols or isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False, default=str)
+            elif isinstance(value, bool):
+                value = int(value)
+            elif isinstance(value, (datetime, date)):
+                value = value.isoformat()
+            encoded[key] = value
+        return encoded
+
+    def _decode(self, table: str, row: sqlite3.Row) -> Dict[str, Any]:
+        json_cols = JSON_COLUMNS.get(table, set())
+        bool_cols = BOOL_COLUMNS.get(table, set())
+        decoded = dict(row)
+        for key, value in decoded.items():
+            if value is None:
+                continue
+            if key in json_cols:
+                decoded[key] = json.loads(value)
+            elif key in bool_cols:
+                decoded[key] = bool(value)
+        return decoded
+
+    def _insert(self, table: str, rows: Iterable[Dict[str, Any]], ignore_duplicates: bool = False) -> int:
+        """
+        Insère des lignes (colonnes prises sur la première ligne de chaque groupe)
+        ignore_duplicates: lignes en conflit avec une contrainte d'unicité ignorées
+        """
+        rows = [self._encode(table, r) for r in rows]
+        if not rows:
+            return 0
+        count = 0
+        with self._lock, self.conn:
+            groups: Dict[tuple, List[Dict[str, Any]]] = {}
+            for row in rows:
+                groups.setdefault(tuple(row.keys()), []).append(row)
+            for columns, group in groups.items():
+                sql = "INSERT {}INTO {} ({}) VALUES ({})".format(
+                    "OR IGNORE " if ignore_duplicates else "",
+                    table,
+                    ", ".join(_quote(c) for c in columns),
+                    ", ".join("?" for _ in columns),
+                )
+                cursor = self.conn.executemany(sql, [tuple(r[c] for c in columns) for r in group])
+                count += cursor.rowcount if ignore_duplicates else len(group)
+        return count
+
+    def _update(self, table: str, row_id: str, updates: Dict[str, Any]) -> int:
+        updates = self._encode(table, updates)
+        if not updates:
+            return 0
+        sql = "UPDATE {} SET {} WHERE id = ?".format(
+            table, ", ".join(f"{_quote(c)} = ?" for c in updates)
+        )
+        with self._lock, self.conn:
+            cursor = self.conn.execute(sql, (*updates.values(), row_id))
+            return cursor.rowcount
+
+    def _select(self, table: str, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._decode(table, r) for r in rows]
+
+    # ============ HOTELS ============
+
+    @timed_call("db_read")
+    def get_monitored_hotels(self) -> List[Dict[str, Any]]:
+        """Récupère tous les hôtels actifs (isMonitored=true)"""
+        return self._select("hotels", 'SELECT * FROM hotels WHERE "isMonitored" = 1 ORDER BY "createdAt"')
+
+    @timed_call("db_write")
+    def create_hotel(self, hotel_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Crée un nouvel hôtel"""
+        try:
+            hotel_data["id"] = str(uuid.uuid4())
+            hotel_data["createdAt"] = datetime.now().isoformat()
+            hotel_data["updatedAt"] = datetime.now().isoformat()
+            self._insert("hotels", [hotel_data])
+            print(f"✅ Hôtel créé: {hotel_data.get('name')}")
+            return dict(hotel_data)
+        except Exception as e:
+            print(f"❌ Erreur create_hotel: {e}")
+            inc("db_errors_total", op="create_hotel")
+            return None
+
+    @timed_call("db_write")
+    def update_hotel(self, hotel_id: str, updates: Dict[str, Any]) -> bool:
+        """Met à jour un hôtel"""
+        try:
+            updates["updatedAt"] = datetime.now().isoformat()
+            self._update("hotels", hotel_id, updates)
+            print(f"✅ Hôtel mis à jour: {hotel_id}")
+            return True
+        except Exception as e:
+            print(f"❌ Erreur update_hotel: {e}")
+            inc("db_errors_total", op="update_hotel")
+            return False
+
+    @timed_call("db_read")
+    def get_hotel_by_url(self, url: str) -> Optional[Dict[str, Any]]:
+        """Récupère un hôtel par son URL"""
+        rows = self._select("hotels", "SELECT * FROM hotels WHERE url = ? LIMIT 1", (url,))
+        return rows[0] if rows else None
+
+    # ============ RATE SNAPSHOTS ============
+
+    @timed_call("db_write")
+    def create_rate_snapshot(self, snapshot_data: Dict[str, Any]) -> bool:
+        """Crée un snapshot de prix"""
+        return self.create_rate_snapshots_batch([snapshot_data]) == 1
+
+    @timed_call("db_write")
+    def create_rate_snapshots_batch(
+        self,
+        snapshots: List[Dict[str, Any]],
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+        created_ids: Optional[Set[str]] = None
+    ) -> int:
+        """
+        Crée plusieurs snapshots (une transaction par paquet), et leurs
+        offres de chambres (clé "rooms") dans rate_snapshot_rooms
+
+        created_ids, si fourni, reçoit les id des snapshots créés
+        """
+        if not snapshots:
+            return 0
+
+        rows, room_rows = prepare_snapshot_rows(snapshots, datetime.now().isoformat())
+
+        batch_size = max(1, batch_size)
+        created_ids = set() if created_ids is None else created_ids
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            try:
+                self._insert("rate_snapshots", chunk)
+                created_ids.update(row["id"] for row in chunk)
+            except Exception as e:
+                print(f"❌ Erreur create_rate_snapshots_batch: {e}")
+                inc("db_errors_total", op="create_rate_snapshots_batch")
+
+        count = len(created_ids)
+        inc("db_rows_written_total", count, table="rate_snapshots")
+        print(f"✅ {count} snapshots créés")
+
+        room_rows = [row for row in room_rows if row["snapshotId"] in created_ids]
+        rooms_count = 0
+        for start in range(0, len(room_rows), batch_size):
+            try:
+                rooms_count += self._insert("rate_snapshot_rooms", room_rows[start:start + batch_size])
+            except Exception as e:
+                print(f"❌ Erreur insertion rate_snapshot_rooms: {e}")
+                inc("db_errors_total", op="create_rate_snapshot_rooms")
+        if rooms_count:
+            inc("db_rows_written_total", rooms_count, table="rate_snapshot_rooms")
+            print(f"✅ {rooms_count} offres de chambres créées")
+        return count
+
+    @timed_call("db_read")
+    def get_latest_snapshot(self, hotel_id: str, checkin_date: date) -> Optional[Dict[str, Any]]:
+        """Récupère le dernier snapshot pour un hôtel et une date"""
+        rows = self._select(
+            "rate_snapshots",
+            'SELECT * FROM rate_snapshots WHERE "hotelId" = ? AND "dateCheckin" = ? '
+            'ORDER BY "scrapedAt" DESC LIMIT 1',
+            (hotel_id, checkin_date.isoformat()),
+        )
+        return rows[0] if rows else None
+
+    @timed_call("db_read")
+    def get_latest_snapshots(
+        self,
+        hotel_ids: List[str],
+        checkin_dates: List[str],
+        since: datetime
+    ) -> List[Dict[str, Any]]:
+        """Snapshots récents de quelques hôtels/dates"""
+        if not hotel_ids or not checkin_dates:
+            return []
+        sql = (
+            'SELECT id, "hotelId", "dateCheckin", price, available, outcome, nights, adults, "scrapedAt" '
+            'FROM rate_snapshots '
+            'WHERE "hotelId" IN ({}) AND "dateCheckin" IN ({}) AND "scrapedAt" >= ? '
+            'ORDER BY "scrapedAt" DESC'
+        ).format(", ".join("?" * len(hotel_ids)), ", ".join("?" * len(checkin_dates)))
+        return self._select("rate_snapshots", sql, (*hotel_ids, *checkin_dates, since.isoformat()))
+
+    @timed_call("db_read")
+    def get_rate_snapshots_after(
+        self,
+        cursor: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Snapshots triés par (scrapedAt, id) après le curseur"""
+        scraped_at, snapshot_id = cursor or ("", "")
+        return self._select(
+            "rate_snapshots",
+            'SELECT * FROM rate_snapshots WHERE ("scrapedAt", id) > (?, ?) '
+            'ORDER BY "scrapedAt", id LIMIT ?',
+            (scraped_at, snapshot_id, limit),
+        )
+
+    # ============ RATE CURVES ============
+
+    @timed_call("db_write")
+    def create_rate_curves_batch(self, curves: List[Dict[str, Any]]) -> int:
+        """Enregistre des courbes, ignore celles déjà présentes (même hôtel, run, occupation)"""
+        if not curves:
+            return 0
+        try:
+            count = self._insert("rate_curves", curves, ignore_duplicates=True)
+            inc("db_rows_written_total", count, table="rate_curves")
+            return count
+        except Exception as e:
+            print(f"❌ Erreur create_rate_curves_batch: {e}")
+            inc("db_errors_total", op="create_rate_curves_batch")
+            return 0
+
+    @timed_call("db_read")
+    def get_rate_curves(
+        self,
+        hotel_ids: List[str],
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Courbes de quelques hôtels, plus récentes d'abord"""
+        if not hotel_ids:
+            return []
+        sql = 'SELECT * FROM rate_curves WHERE "hotelId" IN ({}) AND "scrapedAt" >= ? ORDER BY "scrapedAt" DESC'.format(
+            ", ".join("?" * len(hotel_ids))
+        )
+        return self._select("rate_curves", sql, (*hotel_ids, since.isoformat() if since else ""))
+
+    # ============ PRICE ALERTS ============
+
+    @timed_call("db_write")
+    def create_price_alerts_batch(self, alerts: List[Dict[str, Any]]) -> int:
+        """Enregistre les alertes de prix émises par un run"""
+        try:
+            for alert in alerts:
+                alert["id"] = str(uuid.uuid4())
+            return self._insert("price_alerts", alerts)
+        except Exception as e:
+            print(f"❌ Erreur create_price_alerts_batch: {e}")
+            inc("db_errors_total", op="create_price_alerts_batch")
+            return 0
+
+    # ============ SCRAPER LOGS ============
+
+    @timed_call("db_write")
+    def create_scraper_log(self, log_data: Dict[str, Any]) -> Optional[str]:
+        """Crée un log de scraping"""
+        try:
+            log_id = str(uuid.uuid4())
+            log_data["id"] = log_id
+            log_data["startedAt"] = datetime.now().isoformat()
+            self._insert("scraper_logs", [log_data])
+            return log_id
+        except Exception as e:
+            print(f"❌ Erreur create_scraper_log: {e}")
+            inc("db_errors_total", op="create_scraper_log")
+            return None
+
+    @timed_call("db_write")
+    def update_scraper_log(self, log_id: str, updates: Dict[str, Any]) -> bool:
+        """Met à jour un log de scraping"""
+        try:
+            updates["completedAt"] = datetime.now().isoformat()
+            self._update("scraper_logs", log_id, updates)
+            return True
+        except Exception as e:
+            print(f"❌ Erreur update_scraper_log: {e}")
+            inc("db_errors_total", op="update_scraper_log")
+            return False
+
+    @timed_call("db_write")
+    def create_scraper_hotel_logs_batch(self, log_id: str, hotel_runs: List[Dict[str, Any]]) -> int:
+        """Enregistre les lignes de performance par hôtel d'un run"""
+        if not log_id or not hotel_runs:
+            return 0
+        try:
+            rows = [dict(run, id=str(uuid.uuid4()), logId=log_id) for run in hotel_runs]
+            count = self._insert("scraper_hotel_logs", rows)
+            inc("db_rows_written_total", count, table="scraper_hotel_logs")
+            return count
+        except Exception as e:
+            print(f"❌ Erreur create_scraper_hotel_logs_batch: {e}")
+            inc("db_errors_total", op="create_scraper_hotel_logs_batch")
+            return 0
+
+    @timed_call("db_read")
+    def get_recent_hotel_logs(self, hotel_id: str, limit: int) -> List[Dict[str, Any]]:
+        """N dernières lignes scraper_hotel_logs d'un hôtel"""
+        return self._select(
+            "scraper_hotel_logs",
+            'SELECT * FROM scraper_hotel_logs WHERE "hotelId" = ? ORDER BY "startedAt" DESC LIMIT ?',
+            (hotel_id, limit),
+        )
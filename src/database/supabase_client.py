@@ -2,7 +2,7 @@
 Client Supabase pour interagir avec la base de données
 """
 from supabase import create_client, Client
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Set, Tuple
 from datetime import datetime, date
 import uuid
 import sys
@@ -10,18 +10,39 @@ import os
 
 # Ajouter le répertoire parent au path pour importer config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import SUPABASE_URL, SUPABASE_SERVICE_KEY
+from config import SUPABASE_URL, SUPABASE_SERVICE_KEY, SNAPSHOT_BATCH_SIZE
+from observability import timed_call, inc
+from database.base import StorageBackend, prepare_snapshot_rows
+from database.http_transport import get_http_client
+from database.rate_curves import BINARY_COLUMNS, CURVE_KEY, to_bytea_hex
 
 
-class SupabaseClient:
+def use_shared_session(postgrest) -> None:
+    """
+    Remplace la session httpx créée par postgrest par le pool partagé du
+    process (keep-alive, HTTP/2, retries): toutes les instances réutilisent
+    les mêmes connexions chaudes
+    """
+    session = postgrest.session
+    shared = get_http_client(str(session.base_url), dict(session.headers))
+    if shared is not session:
+        session.close()
+        postgrest.session = shared
+
+
+class SupabaseClient(StorageBackend):
     """Client pour interagir avec Supabase"""
     
     def __init__(self):
+        if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+            raise ValueError("SUPABASE_URL et SUPABASE_SERVICE_KEY doivent être définis dans .env")
         self.client: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+        use_shared_session(self.client.postgrest)
         print("✅ Client Supabase initialisé")
     
     # ============ HOTELS ============
     
+    @timed_call("db_read")
     def get_monitored_hotels(self) -> List[Dict[str, Any]]:
         """Récupère tous les hôtels actifs (isMonitored=true)"""
         try:
@@ -32,8 +53,10 @@ class SupabaseClient:
             return response.data
         except Exception as e:
             print(f"❌ Erreur get_monitored_hotels: {e}")
+            inc("db_errors_total", op="get_monitored_hotels")
             return []
     
+    @timed_call("db_write")
     def create_hotel(self, hotel_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Crée un nouvel hôtel"""
         try:
@@ -46,8 +69,10 @@ class SupabaseClient:
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"❌ Erreur create_hotel: {e}")
+            inc("db_errors_total", op="create_hotel")
             return None
     
+    @timed_call("db_write")
     def update_hotel(self, hotel_id: str, updates: Dict[str, Any]) -> bool:
         """Met à jour un hôtel"""
         try:
@@ -60,8 +85,10 @@ class SupabaseClient:
             return True
         except Exception as e:
             print(f"❌ Erreur update_hotel: {e}")
+            inc("db_errors_total", op="update_hotel")
             return False
     
+    @timed_call("db_read")
     def get_hotel_by_url(self, url: str) -> Optional[Dict[str, Any]]:
         """Récupère un hôtel par son URL"""
         try:
@@ -72,10 +99,12 @@ class SupabaseClient:
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"❌ Erreur get_hotel_by_url: {e}")
+            inc("db_errors_total", op="get_hotel_by_url")
             return None
     
     # ============ RATE SNAPSHOTS ============
     
+    @timed_call("db_write")
     def create_rate_snapshot(self, snapshot_data: Dict[str, Any]) -> bool:
         """Crée un snapshot de prix"""
         try:
@@ -86,23 +115,63 @@ class SupabaseClient:
             return True
         except Exception as e:
             print(f"❌ Erreur create_rate_snapshot: {e}")
+            inc("db_errors_total", op="create_rate_snapshot")
             return False
     
-    def create_rate_snapshots_batch(self, snapshots: List[Dict[str, Any]]) -> int:
-        """Crée plusieurs snapshots en batch"""
-        try:
-            for snapshot in snapshots:
-                snapshot["id"] = str(uuid.uuid4())
-                snapshot["scrapedAt"] = datetime.now().isoformat()
-            
-            response = self.client.table("rate_snapshots").insert(snapshots).execute()
-            count = len(response.data) if response.data else 0
-            print(f"✅ {count} snapshots créés")
-            return count
-        except Exception as e:
-            print(f"❌ Erreur create_rate_snapshots_batch: {e}")
+    @timed_call("db_write")
+    def create_rate_snapshots_batch(
+        self,
+        snapshots: List[Dict[str, Any]],
+        batch_size: int = SNAPSHOT_BATCH_SIZE,
+        created_ids: Optional[Set[str]] = None
+    ) -> int:
+        """
+        Crée plusieurs snapshots en batch
+        
+        Les snapshots sont envoyés par paquets de batch_size lignes: un paquet
+        en échec n'empêche pas l'écriture des autres. Les offres du tableau
+        des chambres (clé "rooms") vont dans rate_snapshot_rooms, pour les
+        seuls snapshots effectivement créés, dont les id sont ajoutés à
+        created_ids s'il est fourni.
+        
+        Returns:
+            Nombre de snapshots effectivement créés
+        """
+        if not snapshots:
             return 0
+        
+        rows, room_rows = prepare_snapshot_rows(snapshots, datetime.now().isoformat())
+        
+        batch_size = max(1, batch_size)
+        created_ids = set() if created_ids is None else created_ids
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            try:
+                response = self.client.table("rate_snapshots").insert(chunk).execute()
+                created_ids.update(row["id"] for row in response.data or [])
+            except Exception as e:
+                print(f"❌ Erreur create_rate_snapshots_batch: {e}")
+                inc("db_errors_total", op="create_rate_snapshots_batch")
+        
+        count = len(created_ids)
+        inc("db_rows_written_total", count, table="rate_snapshots")
+        print(f"✅ {count} snapshots créés")
+        
+        room_rows = [row for row in room_rows if row["snapshotId"] in created_ids]
+        rooms_count = 0
+        for start in range(0, len(room_rows), batch_size):
+            try:
+                response = self.client.table("rate_snapshot_rooms").insert(room_rows[start:start + batch_size]).execute()
+                rooms_count += len(response.data) if response.data else 0
+            except Exception as e:
+                print(f"❌ Erreur insertion rate_snapshot_rooms: {e}")
+                inc("db_errors_total", op="create_rate_snapshot_rooms")
+        if rooms_count:
+            inc("db_rows_written_total", rooms_count, table="rate_snapshot_rooms")
+            print(f"✅ {rooms_count} offres de chambres créées")
+        return count
     
+    @timed_call("db_read")
     def get_latest_snapshot(self, hotel_id: str, checkin_date: date) -> Optional[Dict[str, Any]]:
         """Récupère le dernier snapshot pour un hôtel et une date"""
         try:
@@ -116,10 +185,125 @@ class SupabaseClient:
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"❌ Erreur get_latest_snapshot: {e}")
+            inc("db_errors_total", op="get_latest_snapshot")
             return None
     
+    @timed_call("db_read")
+    def get_latest_snapshots(
+        self,
+        hotel_ids: List[str],
+        checkin_dates: List[str],
+        since: datetime
+    ) -> List[Dict[str, Any]]:
+        """
+        Récupère les snapshots récents de quelques hôtels/dates
+        (utilisé pour réchauffer le cache du moteur d'alertes)
+        """
+        if not hotel_ids or not checkin_dates:
+            return []
+        try:
+            response = self.client.table("rate_snapshots") \
+                .select("id, hotelId, dateCheckin, price, available, outcome, nights, adults, scrapedAt") \
+                .in_("hotelId", hotel_ids) \
+                .in_("dateCheckin", checkin_dates) \
+                .gte("scrapedAt", since.isoformat()) \
+                .order("scrapedAt", desc=True) \
+                .execute()
+            return response.data or []
+        except Exception as e:
+            print(f"❌ Erreur get_latest_snapshots: {e}")
+            inc("db_errors_total", op="get_latest_snapshots")
+            return []
+    
+    @timed_call("db_read")
+    def get_rate_snapshots_after(
+        self,
+        cursor: Optional[Tuple[str, str]],
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """Snapshots triés par (scrapedAt, id) après le curseur (pagination par clé)"""
+        try:
+            query = self.client.table("rate_snapshots").select("*")
+            if cursor:
+                scraped_at, snapshot_id = cursor
+                query = query.or_(
+                    f'scrapedAt.gt."{scraped_at}",and(scrapedAt.eq."{scraped_at}",id.gt."{snapshot_id}")'
+                )
+            response = query.order("scrapedAt").order("id").limit(limit).execute()
+            return response.data or []
+        except Exception as e:
+            print(f"❌ Erreur get_rate_snapshots_after: {e}")
+            inc("db_errors_total", op="get_rate_snapshots_after")
+            return []
+    
+    # ============ RATE CURVES ============
+    
+    @timed_call("db_write")
+    def create_rate_curves_batch(self, curves: List[Dict[str, Any]]) -> int:
+        """
+        Enregistre des courbes en une requête (colonnes binaires envoyées en
+        littéraux BYTEA); une courbe déjà présente pour le même hôtel, run et
+        occupation est ignorée
+        """
+        if not curves:
+            return 0
+        try:
+            rows = [
+                {key: to_bytea_hex(value) if key in BINARY_COLUMNS else value for key, value in curve.items()}
+                for curve in curves
+            ]
+            response = self.client.table("rate_curves") \
+                .upsert(rows, on_conflict=",".join(CURVE_KEY), ignore_duplicates=True) \
+                .execute()
+            count = len(response.data) if response.data else 0
+            inc("db_rows_written_total", count, table="rate_curves")
+            return count
+        except Exception as e:
+            print(f"❌ Erreur create_rate_curves_batch: {e}")
+            inc("db_errors_total", op="create_rate_curves_batch")
+            return 0
+    
+    @timed_call("db_read")
+    def get_rate_curves(
+        self,
+        hotel_ids: List[str],
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Courbes de quelques hôtels, plus récentes d'abord (colonnes binaires en "\\x...")"""
+        if not hotel_ids:
+            return []
+        try:
+            query = self.client.table("rate_curves").select("*").in_("hotelId", hotel_ids)
+            if since:
+                query = query.gte("scrapedAt", since.isoformat())
+            response = query.order("scrapedAt", desc=True).execute()
+            return response.data or []
+        except Exception as e:
+            print(f"❌ Erreur get_rate_curves: {e}")
+            inc("db_errors_total", op="get_rate_curves")
+            return []
+    
+    # ============ PRICE ALERTS ============
+    
+    @timed_call("db_write")
+    def create_price_alerts_batch(self, alerts: List[Dict[str, Any]]) -> int:
+        """Enregistre les alertes de prix émises par un run"""
+        if not alerts:
+            return 0
+        try:
+            for alert in alerts:
+                alert["id"] = str(uuid.uuid4())
+            
+            response = self.client.table("price_alerts").insert(alerts).execute()
+            return len(response.data) if response.data else 0
+        except Exception as e:
+            print(f"❌ Erreur create_price_alerts_batch: {e}")
+            inc("db_errors_total", op="create_price_alerts_batch")
+            return 0
+    
     # ============ SCRAPER LOGS ============
     
+    @timed_call("db_write")
     def create_scraper_log(self, log_data: Dict[str, Any]) -> Optional[str]:
         """Crée un log de scraping"""
         try:
@@ -131,8 +315,10 @@ class SupabaseClient:
             return log_id
         except Exception as e:
             print(f"❌ Erreur create_scraper_log: {e}")
+            inc("db_errors_total", op="create_scraper_log")
             return None
     
+    @timed_call("db_write")
     def update_scraper_log(self, log_id: str, updates: Dict[str, Any]) -> bool:
         """Met à jour un log de scraping"""
         try:
@@ -144,8 +330,44 @@ class SupabaseClient:
             return True
         except Exception as e:
             print(f"❌ Erreur update_scraper_log: {e}")
+            inc("db_errors_total", op="update_scraper_log")
             return False
 
-
-# Instance globale
-supabase_client = SupabaseClient()
+    
+    @timed_call("db_write")
+    def create_scraper_hotel_logs_batch(self, log_id: str, hotel_runs: List[Dict[str, Any]]) -> int:
+        """Enregistre en une requête les lignes de performance par hôtel d'un run"""
+        if not log_id or not hotel_runs:
+            return 0
+        try:
+            rows = []
+            for run in hotel_runs:
+                row = dict(run)
+                row["id"] = str(uuid.uuid4())
+                row["logId"] = log_id
+                rows.append(row)
+            
+            response = self.client.table("scraper_hotel_logs").insert(rows).execute()
+            count = len(response.data) if response.data else 0
+            inc("db_rows_written_total", count, table="scraper_hotel_logs")
+            return count
+        except Exception as e:
+            print(f"❌ Erreur create_scraper_hotel_logs_batch: {e}")
+            inc("db_errors_total", op="create_scraper_hotel_logs_batch")
+            return 0
+    
+    @timed_call("db_read")
+    def get_recent_hotel_logs(self, hotel_id: str, limit: int) -> List[Dict[str, Any]]:
+        """N dernières lignes scraper_hotel_logs d'un hôtel"""
+        try:
+            response = self.client.table("scraper_hotel_logs") \
+                .select("durationMs, pagesLoaded, timeouts, startedAt") \
+                .eq("hotelId", hotel_id) \
+                .order("startedAt", desc=True) \
+                .limit(limit) \
+                .execute()
+            return response.data or []
+        except Exception as e:
+            print(f"❌ Erreur get_recent_hotel_logs: {e}")
+            inc("db_errors_total", op="get_recent_hotel_logs")
+            return []
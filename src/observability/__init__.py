@@ -0,0 +1,12 @@
+from .metrics import registry, timed, timed_call, inc, observe, render_prometheus
+from .events import log_event
+
+__all__ = [
+    'registry',
+    'timed',
+    'timed_call',
+    'inc',
+    'observe',
+    'render_prometheus',
+    'log_event',
+]
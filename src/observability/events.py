@@ -0,0 +1,25 @@
+"""
+Logs structurés JSON (une ligne par événement) à côté des print existants
+"""
+from datetime import datetime
+import json
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import STRUCTURED_LOGS
+
+
+def log_event(event: str, **fields):
+    """
+    Écrit un événement JSON sur stdout si STRUCTURED_LOGS est actif
+
+    Args:
+        event: Type d'événement (stage, date_result, session...)
+        **fields: Champs additionnels (hotel, stage, duration_ms...)
+    """
+    if not STRUCTURED_LOGS:
+        return
+    record = {"ts": datetime.now().isoformat(), "event": event}
+    record.update(fields)
+    print(json.dumps(record, ensure_ascii=False, default=str), flush=True)
@@ -0,0 +1,242 @@
+"""
+Métriques en mémoire (compteurs + histogrammes) exposées au format Prometheus
+Le scheduler et l'API tournent dans deux process: le scheduler écrit un
+snapshot JSON que l'API fusionne dans /metrics.
+"""
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, Optional, Tuple, List
+import inspect
+import json
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from observability.events import log_event
+
+# Bornes des histogrammes de durée (secondes): de la requête DB à la session
+DURATION_BUCKETS = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1800, 3600,
+)
+
+# Description des métriques connues (lignes # HELP)
+METRIC_HELP = {
+    "scrape_stage_duration_seconds": "Durée de chaque étape du scraping",
+    "scrape_dates_total": "Dates scrapées par hôtel et par résultat",
+    "scrape_bytes_total": "Octets reçus par le navigateur",
+    "scrape_pages_total": "Pages chargées par hôtel",
+    "scrape_date_retries_total": "Dates remises en file pour une nouvelle tentative",
+    "scrape_cells_pruned_total": "Cellules de la grille déduites complètes sans chargement",
+    "scrape_rooms_total": "Offres (chambre x conditions) extraites du tableau des chambres",
+    "browser_rotations_total": "Changements d'identité navigateur après une page de blocage",
+    "scrape_hotels_aborted_total": "Hôtels abandonnés pour blocage persistant",
+    "scrape_hotels_rescheduled_total": "Hôtels reprogrammés en fin de session",
+    "scrape_consent_clicks_total": "Bandeaux cookies acceptés",
+    "proxy_requests_total": "Pages chargées par proxy et par résultat",
+    "proxy_latency_seconds": "Durée du chargement de page (goto) par proxy",
+    "proxy_cooldowns_total": "Mises en quarantaine de proxies (blocage ou échecs répétés)",
+    "proxy_pool_exhausted_total": "Tirages alors que tous les proxies étaient en quarantaine",
+    "browser_tabs_opened_total": "Onglets supplémentaires ouverts dans un contexte (chargement en pipeline)",
+    "browser_tabs_recycled_total": "Onglets rouverts pour dépassement de SCRAPE_TAB_MAX_HEAP_MB",
+    "browser_recycles_total": "Navigateurs relancés par le chien de garde mémoire (RSS, pages, plafond)",
+    "browser_prewarm_total": "Navigateurs préchauffés avant une session (ready, failed, unused)",
+    "browser_state_reused_total": "Contextes ouverts avec les cookies sauvegardés de l'identité",
+    "browser_state_saved_total": "États navigateur (cookies, localStorage) sauvegardés",
+    "browser_state_discarded_total": "États navigateur jetés après un blocage",
+    "browser_state_expired_total": "États navigateur expirés (BROWSER_STATE_MAX_AGE_HOURS)",
+    "politeness_domain_throttled_total": "Navigations retardées par le débit maximal du domaine",
+    "db_rows_written_total": "Lignes écrites en base",
+    "db_errors_total": "Erreurs d'appel à la base",
+    "db_retries_total": "Requêtes PostgREST rejouées (erreur transitoire)",
+    "parquet_rows_exported_total": "Snapshots exportés en Parquet (export incrémental)",
+    "photo_cache_total": "Photos d'hôtels mises en cache en vignettes WebP (stored, failed)",
+    "scrape_sessions_total": "Sessions de scraping par statut",
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items() if v is not None))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = [
+        '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in items
+    ]
+    return "{" + ",".join(escaped) + "}"
+
+
+class MetricsRegistry:
+    """Registre thread-safe de compteurs et d'histogrammes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Dict[str, Any]]] = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Incrémente un compteur"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Ajoute une observation à un histogramme"""
+        key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0}
+                series[key] = hist
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    hist["buckets"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    # ============ SNAPSHOT ============
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": [
+                    {"name": name, "labels": dict(key), "value": value}
+                    for name, series in self.counters.items()
+                    for key, value in series.items()
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(key), **hist}
+                    for name, series in self.histograms.items()
+                    for key, hist in series.items()
+                ],
+            }
+
+    def merge_dict(self, data: Dict[str, Any]):
+        """Ajoute les valeurs d'un snapshot (autre process) à ce registre"""
+        for item in data.get("counters", []):
+            self.inc(item["name"], item["value"], **item["labels"])
+        with self._lock:
+            for item in data.get("histograms", []):
+                key = _label_key(item["labels"])
+                series = self.histograms.setdefault(item["name"], {})
+                hist = series.setdefault(
+                    key, {"buckets": [0] * len(DURATION_BUCKETS), "sum": 0.0, "count": 0}
+                )
+                hist["buckets"] = [a + b for a, b in zip(hist["buckets"], item["buckets"])]
+                hist["sum"] += item["sum"]
+                hist["count"] += item["count"]
+
+    def dump(self, path: str):
+        """Écrit un snapshot JSON (écriture atomique)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+    # ============ EXPOSITION ============
+
+    def render(self) -> str:
+        """Format texte Prometheus 0.0.4"""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                if name in METRIC_HELP:
+                    lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self.histograms.items()):
+                if name in METRIC_HELP:
+                    lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in series.items():
+                    for bound, count in zip(DURATION_BUCKETS, hist["buckets"]):
+                        lines.append(
+                            f"{name}_bucket{_format_labels(key, ('le', str(bound)))} {count}"
+                        )
+                    lines.append(
+                        f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {hist['count']}"
+                    )
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist['sum']}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+
+# Registre global du process
+registry = MetricsRegistry()
+
+
+def inc(name: str, value: float = 1, **labels):
+    registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    registry.observe(name, value, **labels)
+
+
+@contextmanager
+def timed(stage: str, **labels):
+    """
+    Mesure la durée d'une étape (browser_launch, goto, selector_wait,
+    extraction, delay, db_write...) et émet un événement JSON
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        registry.observe("scrape_stage_duration_seconds", duration, stage=stage, **labels)
+        log_event("stage", stage=stage, duration_ms=round(duration * 1000, 1), status=status, **labels)
+
+
+def timed_call(stage: str):
+    """Décorateur: mesure une méthode avec op=<nom de la fonction> (sync ou async)"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with timed(stage, op=func.__name__):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage, op=func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def render_prometheus(snapshot_path: Optional[str] = None) -> str:
+    """
+    Rend les métriques du process, fusionnées avec le snapshot
+    écrit par un autre process (scheduler) si fourni
+    """
+    if not snapshot_path or not os.path.exists(snapshot_path):
+        return registry.render()
+
+    merged = MetricsRegistry()
+    merged.merge_dict(registry.to_dict())
+    try:
+        with open(snapshot_path, "r", encoding="utf-8") as f:
+            merged.merge_dict(json.load(f))
+    except Exception as e:
+        print(f"⚠️ Snapshot de métriques illisible: {e}")
+    return merged.render()
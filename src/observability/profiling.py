@@ -0,0 +1,203 @@
+"""
+Mode profilage d'une session de scraping (run_price_scraper.py --profile)
+
+Un seul hôtel par session est profilé (tournant d'un jour à l'autre), pour
+que le mode puisse rester actif en production:
+- cProfile sur le thread de cet hôtel (côté Python: parsing, DB, attentes)
+- trace Playwright (réseau; DOM et captures désactivés par défaut) sur les
+  PROFILE_TRACE_PAGES premiers chargements de page de cet hôtel
+- résumé des durées par étape (histogramme scrape_stage_duration_seconds)
+  de toute la session et de l'hôtel profilé
+
+Tout est écrit dans un répertoire de run:
+    <PROFILE_DIR>/<AAAAMMJJ-HHMMSS>-s<session>/
+        cprofile.pstats   (snakeviz, pstats)
+        cprofile.txt      (40 fonctions les plus coûteuses, temps cumulé)
+        traces/*.zip      (npx playwright show-trace ...)
+        stages.json
+"""
+from contextlib import contextmanager
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+import cProfile
+import io
+import json
+import pstats
+import re
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PROFILE_DIR, PROFILE_TRACE_PAGES, PROFILE_TRACE_SNAPSHOTS, PROFILE_TRACE_SCREENSHOTS
+from observability.metrics import registry, DURATION_BUCKETS
+
+StageTotals = Dict[Tuple[str, Optional[str]], Dict[str, Any]]
+
+
+def _stage_totals() -> StageTotals:
+    """(étape, hôtel) -> nombre, somme et buckets, copiés du registre"""
+    totals: StageTotals = {}
+    for item in registry.to_dict()["histograms"]:
+        if item["name"] != "scrape_stage_duration_seconds":
+            continue
+        key = (item["labels"].get("stage", "?"), item["labels"].get("hotel"))
+        entry = totals.setdefault(key, {"count": 0, "sum": 0.0, "buckets": [0] * len(DURATION_BUCKETS)})
+        entry["count"] += item["count"]
+        entry["sum"] += item["sum"]
+        entry["buckets"] = [a + b for a, b in zip(entry["buckets"], item["buckets"])]
+    return totals
+
+
+def _bucket_percentile(buckets: List[int], count: int, pct: float) -> Optional[float]:
+    """Borne supérieure du bucket qui contient le percentile (None au-delà du dernier)"""
+    rank = count * pct / 100
+    for bound, cumulative in zip(DURATION_BUCKETS, buckets):
+        if cumulative >= rank:
+            return bound
+    return None
+
+
+def _summarize(before: StageTotals, after: StageTotals, hotel: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Durées par étape entre deux relevés (toutes les séries, ou celles d'un hôtel)"""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for (stage, stage_hotel), entry in after.items():
+        if hotel is not None and stage_hotel != hotel:
+            continue
+        previous = before.get((stage, stage_hotel), {"count": 0, "sum": 0.0, "buckets": [0] * len(DURATION_BUCKETS)})
+        total = merged.setdefault(stage, {"count": 0, "sum": 0.0, "buckets": [0] * len(DURATION_BUCKETS)})
+        total["count"] += entry["count"] - previous["count"]
+        total["sum"] += entry["sum"] - previous["sum"]
+        total["buckets"] = [t + a - b for t, a, b in zip(total["buckets"], entry["buckets"], previous["buckets"])]
+
+    summary = {}
+    for stage, total in sorted(merged.items(), key=lambda item: -item[1]["sum"]):
+        if not total["count"]:
+            continue
+        summary[stage] = {
+            "count": total["count"],
+            "total_s": round(total["sum"], 3),
+            "mean_ms": round(total["sum"] / total["count"] * 1000, 1),
+            "p95_le_s": _bucket_percentile(total["buckets"], total["count"], 95),
+        }
+    return summary
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "-", text).strip("-")[:60] or "page"
+
+
+class SessionProfiler:
+    """Profilage d'une session: choisit l'hôtel, le profile et écrit le répertoire de run"""
+
+    def __init__(
+        self,
+        session_number: Optional[int] = None,
+        directory: str = PROFILE_DIR,
+        trace_pages: int = PROFILE_TRACE_PAGES
+    ):
+        self.session_number = session_number
+        suffix = f"-s{session_number}" if session_number else ""
+        self.run_dir = os.path.join(directory, datetime.now().strftime("%Y%m%d-%H%M%S") + suffix)
+        self.trace_pages = trace_pages
+        self.hotel_id: Optional[str] = None
+        self.hotel_name: Optional[str] = None
+        self.traces: List[str] = []
+        self._profile: Optional[cProfile.Profile] = None
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._before = _stage_totals()
+
+    def select(self, hotels: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Hôtel profilé: un par session, différent d'un jour à l'autre"""
+        if not hotels:
+            return None
+        hotel = hotels[(date.today().toordinal() + (self.session_number or 0)) % len(hotels)]
+        self.hotel_id, self.hotel_name = hotel['id'], hotel['name']
+        print(f"🔬 Profilage: {hotel['name']} -> {self.run_dir}")
+        return hotel
+
+    def is_profiled(self, hotel: Dict[str, Any]) -> bool:
+        return self.hotel_id is not None and hotel.get('id') == self.hotel_id
+
+    @contextmanager
+    def hotel(self, hotel: Dict[str, Any]):
+        """cProfile sur le thread courant pendant le scraping de l'hôtel profilé"""
+        if not self.is_profiled(hotel):
+            yield
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Un autre profileur est déjà actif (Python 3.12+: un seul à la fois)
+            print(f"⚠️ cProfile indisponible: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._profile = profile
+
+    @contextmanager
+    def page(self, hotel: Dict[str, Any], context, label: str):
+        """Trace Playwright d'un chargement de page (les PROFILE_TRACE_PAGES premiers de l'hôtel profilé)"""
+        with self._lock:
+            traced = self.is_profiled(hotel) and context is not None and len(self.traces) < self.trace_pages
+            if traced:
+                path = os.path.join(self.run_dir, "traces", f"{len(self.traces) + 1:02d}-{_slug(label)}.zip")
+                self.traces.append(path)
+        if not traced:
+            yield
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            context.tracing.start(
+                title=f"{hotel['name']} {label}",
+                screenshots=PROFILE_TRACE_SCREENSHOTS,
+                snapshots=PROFILE_TRACE_SNAPSHOTS,
+            )
+        except Exception as e:
+            print(f"⚠️ Trace Playwright non démarrée: {e}")
+            yield
+            return
+        try:
+            yield
+        finally:
+            try:
+                # Contexte d'origine: une rotation pendant la page l'a peut-être fermé
+                context.tracing.stop(path=path)
+            except Exception as e:
+                print(f"⚠️ Trace Playwright perdue ({label}): {e}")
+
+    def finish(self) -> Optional[str]:
+        """Écrit cProfile, le résumé par étape et affiche les étapes les plus coûteuses"""
+        try:
+            os.makedirs(self.run_dir, exist_ok=True)
+            after = _stage_totals()
+            summary = {
+                "session": self.session_number,
+                "profiled_hotel": self.hotel_name,
+                "wall_s": round(time.perf_counter() - self._started, 1),
+                "traces": [os.path.basename(path) for path in self.traces if os.path.exists(path)],
+                "stages": _summarize(self._before, after),
+                "profiled_hotel_stages": _summarize(self._before, after, hotel=self.hotel_name) if self.hotel_name else {},
+            }
+            if self._profile is not None:
+                self._profile.dump_stats(os.path.join(self.run_dir, "cprofile.pstats"))
+                report = io.StringIO()
+                pstats.Stats(self._profile, stream=report).sort_stats("cumulative").print_stats(40)
+                with open(os.path.join(self.run_dir, "cprofile.txt"), "w", encoding="utf-8") as f:
+                    f.write(report.getvalue())
+            with open(os.path.join(self.run_dir, "stages.json"), "w", encoding="utf-8") as f:
+                json.dump(summary, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            print(f"⚠️ Impossible d'écrire le profilage: {e}")
+            return None
+
+        print(f"\n🔬 Profilage ({self.hotel_name}): {self.run_dir}")
+        for stage, entry in list(summary["stages"].items())[:8]:
+            print(f"   • {stage:<16} {entry['total_s']:>9.1f}s  {entry['count']:>5}x  moy {entry['mean_ms']:.0f} ms")
+        return self.run_dir
@@ -3,21 +3,30 @@ Système de scheduling automatique avec horaires aléatoires
 Exécute le scraping 2x/jour à des heures variables
 """
 import schedule
-import time
 import random
 from datetime import datetime
+from typing import Any, Callable, Dict, Optional
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from scheduler.run_price_scraper import run_price_scraping
+from scheduler.session_planner import plan_session, session_hotels
+from scrapers.cancellation import get_cancellation_token, install_signal_handlers
 from config import (
     SESSION_1_START_HOUR,
     SESSION_1_END_HOUR,
     SESSION_2_START_HOUR,
-    SESSION_2_END_HOUR
+    SESSION_2_END_HOUR,
+    SESSION_PLANNING_ENABLED,
+    PREWARM_ENABLED,
+    PREWARM_MINUTES,
+    validate_settings,
 )
 
+# Navigateurs préchauffés en attente de leur session (numéro -> BrowserPrewarmer)
+_prewarmed: Dict[int, Any] = {}
+
 
 def get_random_time_in_range(start_hour: int, end_hour: int) -> str:
     """
@@ -35,27 +44,86 @@ def get_random_time_in_range(start_hour: int, end_hour: int) -> str:
     return f"{hour:02d}:{minute:02d}"
 
 
+def get_session_time(session_number: int, start_hour: int, end_hour: int) -> str:
+    """
+    Heure aléatoire de la session, assez tôt pour qu'elle finisse dans sa
+    fenêtre (durée p90 simulée par le planificateur)
+    
+    Sans planification (désactivée ou en erreur): toute la fenêtre
+    """
+    if not SESSION_PLANNING_ENABLED:
+        return get_random_time_in_range(start_hour, end_hour)
+    try:
+        plan = plan_session(session_number)
+    except Exception as e:
+        print(f"⚠️ Planification de la session {session_number} impossible: {e}")
+        return get_random_time_in_range(start_hour, end_hour)
+    
+    latest = min(plan["latest_start_minute"], end_hour * 60 - 1)
+    minutes = random.randint(start_hour * 60, latest)
+    print(f"📐 Session {session_number}: durée estimée {plan['duration_s']['p50'] // 60} min "
+          f"(p90 {plan['duration_s']['p90'] // 60} min), départ au plus tard {latest // 60:02d}:{latest % 60:02d}")
+    if plan["duration_s"]["p90"] > (end_hour - start_hour) * 3600:
+        print(f"⚠️ Session {session_number} plus longue que sa fenêtre {start_hour}h-{end_hour}h: départ en début de fenêtre")
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _minutes_before(at: str, minutes: int) -> Optional[str]:
+    """"HH:MM" moins quelques minutes (None si cela tombe la veille)"""
+    hour, minute = (int(part) for part in at.split(":"))
+    total = hour * 60 + minute - minutes
+    return f"{total // 60:02d}:{total % 60:02d}" if total >= 0 else None
+
+
+def prewarm_session(session_number: int):
+    """Préchauffe les navigateurs des premiers hôtels de la session (PREWARM_MINUTES avant)"""
+    stale = _prewarmed.pop(session_number, None)
+    if stale is not None:
+        stale.close()
+    try:
+        # Import paresseux: Playwright est chargé ici, avant le déclenchement
+        from database import get_storage
+        from scrapers.prewarm import BrowserPrewarmer
+        hotels = session_hotels(get_storage().get_monitored_hotels(), session_number)
+        if hotels:
+            _prewarmed[session_number] = BrowserPrewarmer(hotels).start()
+    except Exception as e:
+        print(f"⚠️ Préchauffage de la session {session_number} impossible: {e}")
+
+
+def _schedule_session(session_number: int, at: str, job: Callable):
+    """Programme la session (et son préchauffage) chaque jour à l'heure donnée"""
+    tag = f"session{session_number}"
+    schedule.clear(tag)
+    schedule.every().day.at(at).do(job).tag(tag)
+    prewarm_at = _minutes_before(at, PREWARM_MINUTES) if PREWARM_ENABLED else None
+    if prewarm_at:
+        schedule.every().day.at(prewarm_at).do(prewarm_session, session_number).tag(tag)
+
+
 def schedule_session_1():
     """Exécute la session 1 (3 premiers hôtels)"""
     print(f"\n⏰ DÉCLENCHEMENT SESSION 1 - {datetime.now().strftime('%H:%M:%S')}")
-    run_price_scraping(session_number=1)
+    run_price_scraping(session_number=1, prewarmed=_prewarmed.pop(1, None))
+    if get_cancellation_token().cancelled:
+        return
     
     # Programmer la prochaine session 1 pour demain
-    next_time = get_random_time_in_range(SESSION_1_START_HOUR, SESSION_1_END_HOUR)
-    schedule.clear('session1')
-    schedule.every().day.at(next_time).do(schedule_session_1).tag('session1')
+    next_time = get_session_time(1, SESSION_1_START_HOUR, SESSION_1_END_HOUR)
+    _schedule_session(1, next_time, schedule_session_1)
     print(f"✅ Session 1 terminée. Prochaine exécution: demain à {next_time}")
 
 
 def schedule_session_2():
     """Exécute la session 2 (3 hôtels suivants)"""
     print(f"\n⏰ DÉCLENCHEMENT SESSION 2 - {datetime.now().strftime('%H:%M:%S')}")
-    run_price_scraping(session_number=2)
+    run_price_scraping(session_number=2, prewarmed=_prewarmed.pop(2, None))
+    if get_cancellation_token().cancelled:
+        return
     
     # Programmer la prochaine session 2 pour demain
-    next_time = get_random_time_in_range(SESSION_2_START_HOUR, SESSION_2_END_HOUR)
-    schedule.clear('session2')
-    schedule.every().day.at(next_time).do(schedule_session_2).tag('session2')
+    next_time = get_session_time(2, SESSION_2_START_HOUR, SESSION_2_END_HOUR)
+    _schedule_session(2, next_time, schedule_session_2)
     print(f"✅ Session 2 terminée. Prochaine exécution: demain à {next_time}")
 
 
@@ -74,8 +142,8 @@ def initialize_scheduler():
     """)
     
     # Générer horaires pour aujourd'hui
-    session1_time = get_random_time_in_range(SESSION_1_START_HOUR, SESSION_1_END_HOUR)
-    session2_time = get_random_time_in_range(SESSION_2_START_HOUR, SESSION_2_END_HOUR)
+    session1_time = get_session_time(1, SESSION_1_START_HOUR, SESSION_1_END_HOUR)
+    session2_time = get_session_time(2, SESSION_2_START_HOUR, SESSION_2_END_HOUR)
     
     # Vérifier si l'heure est déjà passée aujourd'hui
     now = datetime.now()
@@ -94,21 +162,34 @@ def initialize_scheduler():
         print(f"✅ Session 2 programmée aujourd'hui à {session2_time}")
     
     # Programmer les tâches
-    schedule.every().day.at(session1_time).do(schedule_session_1).tag('session1')
-    schedule.every().day.at(session2_time).do(schedule_session_2).tag('session2')
+    _schedule_session(1, session1_time, schedule_session_1)
+    _schedule_session(2, session2_time, schedule_session_2)
     
     print(f"\n🚀 Scheduler démarré - En attente des prochaines exécutions...")
     print(f"{'='*60}\n")
 
 
 def run_scheduler():
-    """Boucle principale du scheduler"""
+    """
+    Boucle principale du scheduler
+    
+    SIGTERM/SIGINT (redéploiement, Ctrl+C): une session en cours s'arrête
+    après ses pages en cours et enregistre sa collecte, puis la boucle se
+    termine; un second signal arrête tout immédiatement.
+    """
+    cancellation = get_cancellation_token()
+    install_signal_handlers()
     initialize_scheduler()
     
     try:
-        while True:
+        while not cancellation.cancelled:
             schedule.run_pending()
-            time.sleep(60)  # Vérifier toutes les minutes
+            cancellation.sleep(60)  # Vérifier toutes les minutes
+        
+        for stale in _prewarmed.values():
+            stale.close()
+        print(f"\n\n⏹️ Scheduler arrêté ({cancellation.reason})")
+        sys.exit(0)
             
     except KeyboardInterrupt:
         print("\n\n⏹️ Scheduler arrêté par l'utilisateur")
@@ -135,6 +216,8 @@ if __name__ == "__main__":
     )
     
     args = parser.parse_args()
+    validate_settings()
+    install_signal_handlers()
     
     if args.session:
         # Mode one-shot: exécuter une session et arrêter
@@ -150,6 +233,8 @@ if __name__ == "__main__":
         print("="*60)
         run_price_scraping(session_number=1)
         
+        if get_cancellation_token().cancelled:
+            sys.exit(0)
         print("\n" + "="*60)
         print("SESSION 2")
         print("="*60)
@@ -5,20 +5,77 @@ Peut être appelé manuellement ou par le cron job
 import sys
 import os
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from scrapers.price_scraper import scrape_multiple_hotels
-from database.supabase_client import supabase_client
+from database import get_storage
+from alerts import evaluate_new_snapshots
+from observability import registry, timed, inc, log_event
+from config import METRICS_STATE_PATH, RATE_CURVES_ENABLED, PROFILE_SESSIONS
+from scheduler.session_planner import session_hotels
+from scrapers.cancellation import get_cancellation_token, install_signal_handlers
 
 
-def run_price_scraping(session_number: int = None, hotel_limit: int = None) -> Dict[str, Any]:
+def _elapsed_ms(started_at: datetime) -> int:
+    return int((datetime.now() - started_at).total_seconds() * 1000)
+
+
+def run_price_scraping(
+    session_number: int = None,
+    hotel_limit: int = None,
+    profile: Optional[bool] = None,
+    prewarmed=None
+) -> Dict[str, Any]:
+    """
+    Exécute une session de scraping en mesurant sa durée
+    Les métriques du process sont écrites dans METRICS_STATE_PATH pour /metrics
+    
+    profile (défaut: PROFILE_SESSIONS): profile un hôtel de la session
+    (cProfile, traces Playwright, résumé par étape dans PROFILE_DIR)
+    prewarmed: BrowserPrewarmer démarré par le scheduler avant l'heure de
+    la session (navigateurs fermés à la fin s'ils n'ont pas servi)
+    
+    Sur SIGTERM/SIGINT (install_signal_handlers), la session s'arrête après
+    les pages en cours et enregistre ce qui a été collecté (statut cancelled)
+    """
+    result = {"success": False}
+    profiler = None
+    if PROFILE_SESSIONS if profile is None else profile:
+        from observability.profiling import SessionProfiler
+        profiler = SessionProfiler(session_number)
+    try:
+        with timed("session", session=session_number):
+            result = _run_price_scraping(session_number, hotel_limit, profiler, prewarmed)
+        return result
+    finally:
+        if prewarmed is not None:
+            prewarmed.close()
+        if profiler is not None:
+            result["profile_dir"] = profiler.finish()
+        status = "cancelled" if result.get("cancelled") else "success" if result.get("success") else "error"
+        inc("scrape_sessions_total", status=status)
+        log_event("session_done", session=session_number, status=status,
+                  snapshots=result.get("snapshots_count", 0))
+        try:
+            registry.dump(METRICS_STATE_PATH)
+        except Exception as e:
+            print(f"⚠️ Impossible d'écrire les métriques: {e}")
+
+
+def _run_price_scraping(
+    session_number: int = None,
+    hotel_limit: int = None,
+    profiler=None,
+    prewarmed=None
+) -> Dict[str, Any]:
     """
     Exécute le scraping des prix pour les hôtels actifs
     
     Args:
         session_number: 1 ou 2 (pour diviser en 2 sessions) - None = tous
         hotel_limit: Limite le nombre d'hôtels (pour tests)
+        profiler: SessionProfiler (mode --profile) ou None
+        prewarmed: BrowserPrewarmer (navigateurs préchauffés) ou None
         
     Returns:
         Statistiques d'exécution
@@ -29,8 +86,11 @@ def run_price_scraping(session_number: int = None, hotel_limit: int = None) -> D
         print(f"📍 Session {session_number}/2")
     print(f"{'='*70}\n")
     
-    # Créer un log dans Supabase
-    log_id = supabase_client.create_scraper_log({
+    started_at = datetime.now()
+    storage = get_storage()
+    
+    # Créer un log de scraping
+    log_id = storage.create_scraper_log({
         "status": "running",
         "hotelId": None,
         "snapshotsCreated": 0,
@@ -38,11 +98,11 @@ def run_price_scraping(session_number: int = None, hotel_limit: int = None) -> D
     
     try:
         # Récupérer les hôtels actifs
-        all_hotels = supabase_client.get_monitored_hotels()
+        all_hotels = storage.get_monitored_hotels()
         
         if not all_hotels:
             print("⚠️ Aucun hôtel actif trouvé dans la base")
-            supabase_client.update_scraper_log(log_id, {
+            storage.update_scraper_log(log_id, {
                 "status": "completed",
                 "error": "No active hotels found"
             })
@@ -55,14 +115,12 @@ def run_price_scraping(session_number: int = None, hotel_limit: int = None) -> D
         print(f"✅ {len(all_hotels)} hôtel(s) actif(s) trouvé(s)")
         
         # Filtrer selon la session
+        hotels_to_scrape = session_hotels(all_hotels, session_number)
         if session_number == 1:
-            hotels_to_scrape = all_hotels[:3]  # 3 premiers
             print(f"📋 Session 1: Scraping des 3 premiers hôtels")
         elif session_number == 2:
-            hotels_to_scrape = all_hotels[3:6]  # 3 suivants
             print(f"📋 Session 2: Scraping des 3 hôtels suivants")
         else:
-            hotels_to_scrape = all_hotels  # Tous
             print(f"📋 Scraping de tous les hôtels")
         
         # Limiter pour tests
@@ -75,20 +133,61 @@ def run_price_scraping(session_number: int = None, hotel_limit: int = None) -> D
         for i, hotel in enumerate(hotels_to_scrape, 1):
             print(f"  {i}. {hotel['name']}")
         
-        # Lancer le scraping
-        stats, snapshots = scrape_multiple_hotels(hotels_to_scrape)
+        # Lancer le scraping (import paresseux: Playwright n'est chargé qu'ici)
+        from scrapers.price_scraper import scrape_multiple_hotels
+        stats, snapshots = scrape_multiple_hotels(hotels_to_scrape, profiler=profiler, prewarmed=prewarmed)
         
-        # Enregistrer les snapshots dans Supabase
+        cancelled = stats["cancelled"]
+        if cancelled:
+            remaining = get_cancellation_token().remaining()
+            print(f"\n⏹️ Session interrompue: {stats['completed_hotels']}/{stats['total_hotels']} hôtel(s) terminé(s), "
+                  f"enregistrement de ce qui a été collecté ({remaining:.0f}s avant l'échéance)")
+        
+        # Enregistrer les snapshots dans Supabase (aussi après un arrêt: rien de scrapé n'est perdu)
         if snapshots:
-            print(f"\n💾 Enregistrement de {len(snapshots)} snapshots dans Supabase...")
-            saved_count = supabase_client.create_rate_snapshots_batch(snapshots)
+            print(f"\n💾 Enregistrement de {len(snapshots)} snapshots en base...")
+            created_ids = set()
+            saved_count = storage.create_rate_snapshots_batch(snapshots, created_ids=created_ids)
             print(f"✅ {saved_count} snapshots enregistrés")
+            saved_snapshots = [s for s in snapshots if s["id"] in created_ids]
+            if len(saved_snapshots) < len(snapshots):
+                print(f"⚠️ {len(snapshots) - len(saved_snapshots)} snapshot(s) non enregistré(s): ignorés par les alertes")
+            
+            # Même run en courbes compactes (scrapedAt attribué par l'insertion)
+            if RATE_CURVES_ENABLED:
+                from database.rate_curves import curves_from_snapshots
+                curves_count = storage.create_rate_curves_batch(curves_from_snapshots(snapshots))
+                print(f"✅ {curves_count} courbe(s) enregistrée(s)")
+            
+            # Alertes: évaluées sur les seuls snapshots de ce run effectivement enregistrés
+            if saved_snapshots:
+                evaluate_new_snapshots(all_hotels, saved_snapshots, storage=storage)
+        
+        # Lignes de performance par hôtel (une seule requête)
+        storage.create_scraper_hotel_logs_batch(log_id, stats["hotel_runs"])
         
-        # Mettre à jour le log
-        supabase_client.update_scraper_log(log_id, {
-            "status": "success",
+        # Mettre à jour le log (progression conservée si la session a été interrompue)
+        log_update = {
+            "status": "cancelled" if cancelled else "success",
             "snapshotsCreated": len(snapshots),
-        })
+            "errors": stats["errors"],
+            "durationMs": _elapsed_ms(started_at),
+            "hotelsTotal": stats["total_hotels"],
+            "hotelsCompleted": stats["completed_hotels"],
+        }
+        if cancelled:
+            log_update["error"] = f"Arrêt demandé ({get_cancellation_token().reason})"
+        storage.update_scraper_log(log_id, log_update)
+        
+        if cancelled:
+            print(f"⏹️ Session annulée: {len(snapshots)} snapshots enregistrés, log marqué cancelled")
+            return {
+                "success": False,
+                "cancelled": True,
+                "message": "Session interrompue par un arrêt demandé",
+                "stats": stats,
+                "snapshots_count": len(snapshots)
+            }
         
         # Résumé
         print(f"\n{'='*70}")
@@ -116,9 +215,10 @@ def run_price_scraping(session_number: int = None, hotel_limit: int = None) -> D
         print(f"\n❌ {error_msg}")
         
         # Logger l'erreur
-        supabase_client.update_scraper_log(log_id, {
+        storage.update_scraper_log(log_id, {
             "status": "error",
-            "error": error_msg
+            "error": error_msg,
+            "durationMs": _elapsed_ms(started_at),
         })
         
         return {
@@ -148,18 +248,38 @@ if __name__ == "__main__":
         action="store_true",
         help="Mode test (1 seul hôtel)"
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=None,
+        help="Profiler un hôtel de la session (cProfile, traces Playwright, résumé par étape)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Simuler la session (durée, pages, risque de débordement) sans scraper"
+    )
     
     args = parser.parse_args()
+    # SIGTERM (redéploiement): fin de page, enregistrement, fermeture des navigateurs
+    install_signal_handlers()
+    
+    # Planification seule: aucun navigateur lancé, aucune écriture
+    if args.dry_run:
+        from scheduler.session_planner import plan_session, print_plan
+        print_plan(plan_session(session_number=args.session, hotel_limit=1 if args.test else args.limit))
+        sys.exit(0)
     
     # Mode test
     if args.test:
         print("🧪 MODE TEST")
-        result = run_price_scraping(session_number=None, hotel_limit=1)
+        result = run_price_scraping(session_number=None, hotel_limit=1, profile=args.profile)
     else:
         result = run_price_scraping(
             session_number=args.session,
-            hotel_limit=args.limit
+            hotel_limit=args.limit,
+            profile=args.profile
         )
     
-    # Exit code selon le résultat
-    sys.exit(0 if result["success"] else 1)
+    # Exit code selon le résultat (un arrêt demandé n'est pas un échec)
+    sys.exit(0 if result["success"] or result.get("cancelled") else 1)
@@ -0,0 +1,338 @@
+"""
+Planification d'une session de scraping sans lancer de navigateur
+
+Simule la session (Monte-Carlo) à partir de la liste des hôtels surveillés,
+de la grille et des délais de la configuration, et des durées de page
+historiques (scraper_hotel_logs.dateTimings): hôtels en parallèle
+(SCRAPE_PARALLEL_HOTELS), délai par identité, débit du domaine (seau à
+jetons), onglets, cellules élaguées, passes de rattrapage et reprises.
+
+Le rapport donne la durée attendue (p50/p90), les pages chargées et le
+risque de déborder de la fenêtre de la session (SESSION_x_END_HOUR) ou de
+chevaucher la session 2; le scheduler s'en sert pour choisir une heure de
+départ qui laisse le temps de finir (latest_start_minute).
+
+Usage:
+    python src/scheduler/run_price_scraper.py --session 1 --dry-run
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import random
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    MIN_DELAY_SECONDS,
+    MAX_DELAY_SECONDS,
+    SCRAPE_REFINE_DELAY_MIN_SECONDS,
+    SCRAPE_REFINE_DELAY_MAX_SECONDS,
+    SCRAPE_PARALLEL_HOTELS,
+    SCRAPE_TABS,
+    SCRAPE_CLIENT_TABS,
+    SCRAPE_MAX_TABS,
+    POLITENESS_DOMAIN_RATE_PER_MINUTE,
+    POLITENESS_DOMAIN_BURST,
+    DATE_MAX_ATTEMPTS,
+    HOTEL_MAX_RESCHEDULES,
+    HOTEL_RESCHEDULE_DELAY_SECONDS,
+    SESSION_1_START_HOUR,
+    SESSION_1_END_HOUR,
+    SESSION_2_START_HOUR,
+    SESSION_2_END_HOUR,
+    PLANNER_HISTORY_RUNS,
+    PLANNER_ITERATIONS,
+    PLANNER_DEFAULT_PAGE_SECONDS,
+)
+from database.log_stats import percentile
+from scrapers import outcomes
+from scrapers.scrape_grid import GridCell, ScrapeGrid, SoldOutPruner
+
+# Lancement du navigateur et ouverture du contexte (par hôtel)
+BROWSER_LAUNCH_SECONDS = 3.0
+# Durées de page historiques en dessous desquelles on garde la valeur par défaut
+MIN_TIMING_SAMPLES = 5
+# Hôtels par session (session 1: les premiers, session 2: les suivants)
+SESSION_HOTELS = 3
+
+SESSION_WINDOWS = {
+    1: (SESSION_1_START_HOUR, SESSION_1_END_HOUR),
+    2: (SESSION_2_START_HOUR, SESSION_2_END_HOUR),
+}
+
+
+def session_hotels(all_hotels: List[Dict[str, Any]], session_number: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Hôtels d'une session (None = tous)"""
+    if session_number == 1:
+        return all_hotels[:SESSION_HOTELS]
+    if session_number == 2:
+        return all_hotels[SESSION_HOTELS:SESSION_HOTELS * 2]
+    return all_hotels
+
+
+def hotel_profile(hotel: Dict[str, Any], logs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Comportement attendu d'un hôtel d'après ses derniers runs
+
+    Returns:
+        page_seconds (échantillons), prune_rate, retry_rate, abort_rate, runs
+    """
+    page_seconds: List[float] = []
+    pruned = retried = cells = aborted = 0
+    for log in logs:
+        timings = log.get("dateTimings") or {}
+        page_seconds.extend(ms / 1000 for ms in timings.values() if ms)
+        # Cellules du run: chargées (une durée chacune) + élaguées
+        run_cells = len(timings) + (log.get("cellsPruned") or 0)
+        cells += run_cells
+        pruned += log.get("cellsPruned") or 0
+        retried += log.get("retries") or 0
+        aborted += 1 if log.get("aborted") else 0
+    return {
+        "hotel": hotel,
+        "runs": len(logs),
+        "page_seconds": page_seconds if len(page_seconds) >= MIN_TIMING_SAMPLES else [],
+        "prune_rate": pruned / cells if cells else 0.0,
+        "retry_rate": retried / cells if cells else 0.0,
+        "abort_rate": aborted / len(logs) if logs else 0.0,
+        "tabs": max(1, min(SCRAPE_CLIENT_TABS if hotel.get('isClient') else SCRAPE_TABS, SCRAPE_MAX_TABS)),
+    }
+
+
+def _batches(cells: List[GridCell], size: int) -> List[List[GridCell]]:
+    """Lots chargés ensemble (même règle que le scraper: pas de cellule dépendante dans un lot)"""
+    batches: List[List[GridCell]] = []
+    for cell in cells:
+        current = batches[-1] if batches else None
+        if (
+            current is not None and len(current) < size
+            and not any(SoldOutPruner.depends_on(cell, other) for other in current)
+        ):
+            current.append(cell)
+        else:
+            batches.append([cell])
+    return batches
+
+
+class _DomainBucket:
+    """Seau à jetons du domaine en temps simulé"""
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = max(0.0, rate_per_minute) / 60
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = 0.0
+
+    def take(self, at: float) -> float:
+        """Réserve un jeton à partir de `at`; retourne l'instant où il est obtenu"""
+        if self.rate <= 0:
+            return at
+        at = max(at, self.updated)
+        self.tokens = min(self.capacity, self.tokens + (at - self.updated) * self.rate)
+        self.updated = at
+        if self.tokens < 1:
+            wait = (1 - self.tokens) / self.rate
+            at += wait
+            self.tokens += wait * self.rate
+            self.updated = at
+        self.tokens -= 1
+        return at
+
+
+class _HotelRun:
+    """Déroulé simulé d'un hôtel: tours (lot de pages) avec leur délai"""
+
+    def __init__(self, profile: Dict[str, Any], cells: List[GridCell], rng: random.Random, started: float):
+        self.profile = profile
+        self.rng = rng
+        loaded = [c for c in cells if c.is_reference or rng.random() >= profile["prune_rate"]]
+        self.turns: List[Tuple[float, List[GridCell]]] = []
+        previous: Optional[GridCell] = None
+        for batch in _batches(loaded, profile["tabs"]):
+            self.turns.append((self._gap(previous, batch[0]), batch))
+            previous = batch[-1]
+        # Passe de rattrapage: cellules en échec rejouable, après un backoff
+        retries = sum(1 for _ in loaded if rng.random() < profile["retry_rate"])
+        if retries and DATE_MAX_ATTEMPTS > 1:
+            backoff = outcomes.retry_backoff_seconds(1)
+            for k, batch in enumerate(_batches(rng.sample(loaded, retries), profile["tabs"])):
+                self.turns.append(((backoff if k == 0 else rng.uniform(MIN_DELAY_SECONDS, MAX_DELAY_SECONDS)), batch))
+        self.index = 0
+        self.ready_at = started + BROWSER_LAUNCH_SECONDS
+        self.pages = 0
+
+    def _gap(self, previous: Optional[GridCell], cell: GridCell) -> float:
+        if previous is None:
+            return 0.0
+        if previous.checkin == cell.checkin:
+            return self.rng.uniform(SCRAPE_REFINE_DELAY_MIN_SECONDS, SCRAPE_REFINE_DELAY_MAX_SECONDS)
+        return self.rng.uniform(MIN_DELAY_SECONDS, MAX_DELAY_SECONDS)
+
+    def _page_seconds(self) -> float:
+        samples = self.profile["page_seconds"]
+        if samples:
+            return self.rng.choice(samples)
+        return PLANNER_DEFAULT_PAGE_SECONDS * self.rng.uniform(0.6, 1.4)
+
+    @property
+    def finished(self) -> bool:
+        return self.index >= len(self.turns)
+
+    def next_navigation(self) -> float:
+        """Instant où le prochain tour peut partir (délai de l'identité écoulé)"""
+        return self.ready_at + self.turns[self.index][0]
+
+    def play(self, bucket: _DomainBucket) -> float:
+        """Joue le prochain tour: un jeton par page, onglets chargés en parallèle"""
+        _, batch = self.turns[self.index]
+        at = self.next_navigation()
+        ends = []
+        for _ in batch:
+            at = bucket.take(at)
+            ends.append(at + self._page_seconds())
+        self.ready_at = max(ends)
+        self.pages += len(batch)
+        self.index += 1
+        return self.ready_at
+
+
+def simulate_session(
+    profiles: List[Dict[str, Any]],
+    cells: List[GridCell],
+    rng: random.Random,
+    parallel: int = SCRAPE_PARALLEL_HOTELS
+) -> Tuple[float, int]:
+    """
+    Une session simulée
+
+    Returns:
+        (durée en secondes, pages chargées)
+    """
+    bucket = _DomainBucket(POLITENESS_DOMAIN_RATE_PER_MINUTE, POLITENESS_DOMAIN_BURST)
+    workers = max(1, min(parallel, len(profiles)))
+    queue = list(profiles)
+    active = [_HotelRun(queue.pop(0), cells, rng, 0.0) for _ in range(workers)]
+    end = pages = 0
+    aborted: List[Dict[str, Any]] = []
+    while active:
+        run = min(active, key=lambda r: r.next_navigation() if not r.finished else r.ready_at)
+        if not run.finished:
+            run.play(bucket)
+            continue
+        # Hôtel terminé: le thread prend le suivant
+        active.remove(run)
+        end = max(end, run.ready_at)
+        pages += run.pages
+        if rng.random() < run.profile["abort_rate"]:
+            aborted.append(run.profile)
+        if queue:
+            active.append(_HotelRun(queue.pop(0), cells, rng, run.ready_at))
+
+    # Reprise des hôtels bloqués: pause, puis les cellules restées sans résultat (~la moitié)
+    if aborted and HOTEL_MAX_RESCHEDULES:
+        restart = end + rng.uniform(HOTEL_RESCHEDULE_DELAY_SECONDS, HOTEL_RESCHEDULE_DELAY_SECONDS * 1.5)
+        remaining = cells[len(cells) // 2:]
+        rerun = simulate_session(aborted, remaining, rng, parallel)
+        end = restart + rerun[0]
+        pages += rerun[1]
+    return end, pages
+
+
+def plan_session(
+    session_number: Optional[int] = None,
+    hotel_limit: Optional[int] = None,
+    storage=None,
+    iterations: int = PLANNER_ITERATIONS,
+    hotels: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Simule une session et résume la distribution de sa durée
+
+    Returns:
+        Dict: hotels, cells, pages, duration_s (p50/p90/p99), window,
+        overrun_risk, session2_overlap_risk, latest_start_minute, per_hotel
+    """
+    if hotels is None:
+        if storage is None:
+            from database import get_storage
+            storage = get_storage()
+        hotels = session_hotels(storage.get_monitored_hotels(), session_number)
+    if hotel_limit:
+        hotels = hotels[:hotel_limit]
+    cells = ScrapeGrid.from_config().cells()
+
+    profiles = [
+        hotel_profile(hotel, storage.get_recent_hotel_logs(hotel['id'], PLANNER_HISTORY_RUNS) if storage else [])
+        for hotel in hotels
+    ]
+    rng = random.Random()
+    durations: List[float] = []
+    page_counts: List[int] = []
+    for _ in range(max(1, iterations)):
+        duration, pages = simulate_session(profiles, cells, rng) if profiles else (0.0, 0)
+        durations.append(duration)
+        page_counts.append(pages)
+
+    plan: Dict[str, Any] = {
+        "session": session_number,
+        "hotels": len(hotels),
+        "cells": len(cells) * len(hotels),
+        "iterations": len(durations),
+        "pages": round(sum(page_counts) / len(page_counts)),
+        "duration_s": {
+            "p50": round(percentile(durations, 50)),
+            "p90": round(percentile(durations, 90)),
+            "p99": round(percentile(durations, 99)),
+        },
+        "per_hotel": [
+            {
+                "name": p["hotel"]['name'],
+                "runs": p["runs"],
+                "tabs": p["tabs"],
+                "page_s_p50": round(percentile(p["page_seconds"], 50), 1) if p["page_seconds"] else None,
+                "prune_rate": round(p["prune_rate"], 2),
+                "retry_rate": round(p["retry_rate"], 2),
+                "abort_rate": round(p["abort_rate"], 2),
+            }
+            for p in profiles
+        ],
+    }
+
+    window = SESSION_WINDOWS.get(session_number)
+    if window:
+        start_hour, end_hour = window
+        # Départ tiré uniformément dans la fenêtre (comme le scheduler)
+        starts = [rng.uniform(start_hour * 60, end_hour * 60) for _ in durations]
+        finishes = [s + d / 60 for s, d in zip(starts, durations)]
+        plan["window"] = f"{start_hour}h-{end_hour}h"
+        plan["overrun_risk"] = round(sum(f > end_hour * 60 for f in finishes) / len(finishes), 3)
+        if session_number == 1:
+            plan["session2_overlap_risk"] = round(
+                sum(f > SESSION_2_START_HOUR * 60 for f in finishes) / len(finishes), 3
+            )
+        # Départ le plus tardif pour finir dans la fenêtre 9 fois sur 10
+        plan["latest_start_minute"] = max(
+            start_hour * 60, end_hour * 60 - math.ceil(plan["duration_s"]["p90"] / 60)
+        )
+    return plan
+
+
+def print_plan(plan: Dict[str, Any]):
+    """Rapport lisible d'un plan de session"""
+    duration = plan["duration_s"]
+    label = f"session {plan['session']}" if plan["session"] else "tous les hôtels"
+    print(f"\n📐 PLAN ({label}, {plan['iterations']} simulations)")
+    print(f"   • Hôtels: {plan['hotels']}, cellules: {plan['cells']}, pages attendues: {plan['pages']}")
+    print(f"   • Durée: p50 {duration['p50'] / 60:.0f} min, p90 {duration['p90'] / 60:.0f} min, "
+          f"p99 {duration['p99'] / 60:.0f} min")
+    for hotel in plan["per_hotel"]:
+        page = f"{hotel['page_s_p50']}s/page" if hotel["page_s_p50"] is not None else \
+            f"{PLANNER_DEFAULT_PAGE_SECONDS}s/page (défaut)"
+        print(f"     - {hotel['name']}: {hotel['runs']} run(s), {page}, {hotel['tabs']} onglet(s), "
+              f"élagage {hotel['prune_rate']:.0%}, reprises {hotel['retry_rate']:.0%}, abandons {hotel['abort_rate']:.0%}")
+    if "window" in plan:
+        latest = plan["latest_start_minute"]
+        print(f"   • Fenêtre {plan['window']}: risque de débordement {plan['overrun_risk']:.0%}")
+        if "session2_overlap_risk" in plan:
+            print(f"   • Risque de chevauchement avec la session 2: {plan['session2_overlap_risk']:.0%}")
+        print(f"   • Départ au plus tard: {latest // 60:02d}:{latest % 60:02d} (p90 dans la fenêtre)")
@@ -1,4 +1,22 @@
-from .hotel_info_scraper import scrape_hotel_info
-from .price_scraper import scrape_hotel_prices, scrape_multiple_hotels
+"""
+Scrapers Booking.com
+Les fonctions sont importées à la demande: importer le package
+(ex: scrapers.run_stats) ne charge pas Playwright.
+"""
+import importlib
+
+_EXPORTS = {
+    'scrape_hotel_info': '.hotel_info_scraper',
+    'scrape_hotel_prices': '.price_scraper',
+    'scrape_multiple_hotels': '.price_scraper',
+}
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        module = importlib.import_module(_EXPORTS[name], __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = ['scrape_hotel_info', 'scrape_hotel_prices', 'scrape_multiple_hotels']
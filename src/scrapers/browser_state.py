@@ -0,0 +1,75 @@
+"""
+État navigateur persistant (cookies, consentement, localStorage)
+
+Un fichier storage_state Playwright par identité (User-Agent + proxy):
+un contexte qui reprend une identité connue repart avec ses cookies, le
+bandeau cookies déjà accepté et l'historique d'un visiteur récurrent.
+Les états plus vieux que BROWSER_STATE_MAX_AGE_HOURS sont ignorés et
+supprimés; l'état d'une identité bloquée n'est jamais conservé.
+"""
+from typing import List, Optional
+import hashlib
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import USER_AGENTS, BROWSER_STATE_DIR, BROWSER_STATE_MAX_AGE_HOURS
+from observability import inc
+
+
+class BrowserStateStore:
+    """Fichiers storage_state rangés par identité dans un répertoire"""
+
+    def __init__(self, directory: str = BROWSER_STATE_DIR, max_age_hours: float = BROWSER_STATE_MAX_AGE_HOURS):
+        self.directory = directory
+        self.max_age_seconds = max_age_hours * 3600
+
+    def path_for(self, user_agent: str, proxy: Optional[str] = None) -> str:
+        """Fichier de l'identité (nom haché: ni UA ni proxy en clair)"""
+        key = hashlib.sha1(f"{user_agent}|{proxy or 'direct'}".encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, user_agent: str, proxy: Optional[str] = None) -> Optional[str]:
+        """Chemin de l'état s'il existe et n'a pas expiré, sinon None"""
+        path = self.path_for(user_agent, proxy)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+        if age > self.max_age_seconds:
+            self._remove(path)
+            inc("browser_state_expired_total")
+            return None
+        return path
+
+    def user_agents_with_state(self, proxy: Optional[str] = None) -> List[str]:
+        """User-Agents qui ont un état valide derrière ce proxy"""
+        return [ua for ua in USER_AGENTS if self.load(ua, proxy)]
+
+    def save(self, context, user_agent: str, proxy: Optional[str] = None) -> bool:
+        """Enregistre cookies + localStorage du contexte (écriture atomique)"""
+        path = self.path_for(user_agent, proxy)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            context.storage_state(path=tmp_path)
+            os.replace(tmp_path, path)
+            inc("browser_state_saved_total")
+            return True
+        except Exception as e:
+            print(f"⚠️ Erreur sauvegarde état navigateur: {e}")
+            self._remove(tmp_path)
+            return False
+
+    def discard(self, user_agent: str, proxy: Optional[str] = None):
+        """Oublie l'état d'une identité (bloquée: cookies marqués)"""
+        if self._remove(self.path_for(user_agent, proxy)):
+            inc("browser_state_discarded_total")
+
+    def _remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,114 @@
+"""
+Annulation coopérative d'une session de scraping (SIGTERM, SIGINT)
+
+Le handler de signal ne fait que lever un drapeau (aucun verrou: il
+peut interrompre le thread principal n'importe où). Le reste du code le
+consulte:
+- la boucle de scraping s'arrête après la page en cours
+- les attentes (délais, backoff, politesse) sont écourtées
+- les timeouts Playwright de la page en cours sont bornés par l'échéance
+- la session enregistre ce qui a été collecté et ferme les navigateurs
+
+Tout doit tenir dans SHUTDOWN_GRACE_SECONDS, à régler sous le délai
+entre SIGTERM et SIGKILL de l'hébergeur. Un second signal arrête le
+process immédiatement (KeyboardInterrupt).
+"""
+from typing import Optional
+import signal
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SHUTDOWN_GRACE_SECONDS
+
+# Granularité des attentes interruptibles
+POLL_SECONDS = 0.25
+# Part de l'échéance gardée pour l'enregistrement et la fermeture des navigateurs
+FLUSH_RESERVE_SECONDS = 5.0
+# Timeout minimal laissé à la page en cours (ms)
+MIN_PAGE_TIMEOUT_MS = 1000
+
+
+class CancellationToken:
+    """Drapeau d'annulation du process, sûr dans un handler de signal"""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        # Échéance (monotonic) fixée à l'annulation
+        self.deadline: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def cancel(self, reason: str = "cancel", grace: float = SHUTDOWN_GRACE_SECONDS):
+        """Demande l'arrêt (la première demande fixe l'échéance)"""
+        if self.reason is None:
+            self.deadline = time.monotonic() + max(0.0, grace)
+            self.reason = reason
+
+    def reset(self):
+        self.reason = None
+        self.deadline = None
+
+    def remaining(self) -> Optional[float]:
+        """Secondes avant l'échéance (None sans annulation)"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def sleep(self, seconds: float) -> bool:
+        """
+        time.sleep écourté par l'annulation
+
+        Returns:
+            False si l'attente a été interrompue
+        """
+        end = time.monotonic() + max(0.0, seconds)
+        while not self.cancelled:
+            left = end - time.monotonic()
+            if left <= 0:
+                return True
+            time.sleep(min(POLL_SECONDS, left))
+        return False
+
+    def timeout_ms(self, default_ms: int) -> int:
+        """Timeout Playwright: default_ms, borné par l'échéance une fois l'arrêt demandé"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default_ms
+        budget_ms = int((remaining - FLUSH_RESERVE_SECONDS) * 1000)
+        return max(MIN_PAGE_TIMEOUT_MS, min(default_ms, budget_ms))
+
+
+_token = CancellationToken()
+
+
+def get_cancellation_token() -> CancellationToken:
+    """Jeton partagé par le process (tous les hôtels, toutes les sessions)"""
+    return _token
+
+
+def _handle_signal(signum, frame):
+    name = signal.Signals(signum).name
+    if _token.cancelled:
+        # Second signal: arrêt immédiat
+        raise KeyboardInterrupt
+    _token.cancel(name)
+    print(f"\n⏹️ {name} reçu: arrêt après la page en cours (échéance {SHUTDOWN_GRACE_SECONDS:.0f}s)")
+
+
+def install_signal_handlers() -> bool:
+    """
+    Redirige SIGTERM et SIGINT vers le jeton d'annulation
+
+    Returns:
+        False hors du thread principal (handlers inchangés)
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, _handle_signal)
+    return True
@@ -3,6 +3,7 @@ Scraper 1: Récupération des informations d'un hôtel Booking.com
 Usage: Appelé manuellement via API quand on ajoute un concurrent
 """
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeout
+from urllib.parse import urljoin
 import re
 import sys
 import os
@@ -10,17 +11,45 @@ from typing import Optional, Dict, Any
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from scrapers.stealth_config import create_stealth_browser, close_browser, random_delay
+from scrapers.photo_cache import cache_hotel_photo, public_base_url_set, MAX_SOURCE_BYTES
+from config import PAGE_SETTLE_MIN_SECONDS, PAGE_SETTLE_MAX_SECONDS, PHOTO_CACHE_ENABLED
 
 
-def scrape_hotel_info(booking_url: str) -> Optional[Dict[str, Any]]:
+def _cache_photo(page: Page, booking_url: str, photo_url: str) -> Optional[str]:
+    """
+    Télécharge la photo principale (même contexte navigateur que la page)
+    et la met en cache en vignettes WebP
+
+    Returns:
+        URL de la vignette servie par l'API, None si le cache est impossible
+    """
+    try:
+        response = page.context.request.get(urljoin(page.url, photo_url), timeout=15000)
+        if not response.ok:
+            print(f"  ⚠️ Photo non téléchargée (HTTP {response.status})")
+            return None
+        image = response.body()
+    except Exception as e:
+        print(f"  ⚠️ Photo non téléchargée: {e}")
+        return None
+    if len(image) > MAX_SOURCE_BYTES:
+        print(f"  ⚠️ Photo trop lourde ({len(image) // 1024} Ko), URL Booking conservée")
+        return None
+    return cache_hotel_photo(booking_url, image)
+
+
+def scrape_hotel_info(booking_url: str, cache_photo: bool = False) -> Optional[Dict[str, Any]]:
     """
     Scrape les informations d'un hôtel depuis Booking.com
     
     Args:
         booking_url: URL complète de l'hôtel sur Booking.com
+        cache_photo: Mettre la photo en cache (hôtel enregistré ensuite);
+            False pour un simple aperçu, sans écriture dans PHOTO_CACHE_DIR
         
     Returns:
         Dict avec: name, location, address, stars, photoUrl
+        (vignette WebP servie par l'API si cache_photo et PHOTO_CACHE_ENABLED, sinon URL Booking)
         None si erreur
     """
     print(f"🔍 Scraping infos pour: {booking_url}")
@@ -30,7 +59,7 @@ def scrape_hotel_info(booking_url: str) -> Optional[Dict[str, Any]]:
     try:
         # Aller sur la page de l'hôtel
         page.goto(booking_url, wait_until="domcontentloaded", timeout=30000)
-        random_delay(2, 4)
+        random_delay(PAGE_SETTLE_MIN_SECONDS, PAGE_SETTLE_MAX_SECONDS, stage="settle_delay")
         
         # Attendre que le contenu se charge
         page.wait_for_selector('h2[data-testid="title"]', timeout=15000)
@@ -104,6 +133,14 @@ def scrape_hotel_info(booking_url: str) -> Optional[Dict[str, Any]]:
             if photo_url:
                 hotel_info["photoUrl"] = photo_url
                 print(f"  ✅ Photo récupérée")
+                # Téléchargée une fois: le dashboard ne dépend plus du CDN Booking (liens qui expirent)
+                cached_url = (
+                    _cache_photo(page, booking_url, photo_url)
+                    if cache_photo and PHOTO_CACHE_ENABLED and public_base_url_set() else None
+                )
+                if cached_url:
+                    hotel_info["photoUrl"] = cached_url
+                    print(f"  ✅ Vignettes en cache: {cached_url}")
         except Exception as e:
             print(f"  ⚠️ Photo non trouvée: {e}")
         
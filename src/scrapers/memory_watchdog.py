@@ -0,0 +1,157 @@
+"""
+Chien de garde mémoire des navigateurs Playwright
+
+Chromium grossit au fil des pages d'une longue session; sur un conteneur
+de 512 Mo, le process est tué (OOM) en plein scraping. Après chaque lot
+de pages, la RSS de l'arbre du navigateur (driver Playwright + Chromium
+et ses renderers, lue dans /proc) est comparée aux seuils: au-delà, le
+navigateur est relancé avec la même identité (BrowserSession.recycle).
+
+Le plafond du process concerne tous les navigateurs (hôtels en parallèle):
+seul le plus gros est relancé, pas chacun d'eux après chaque lot.
+"""
+from typing import List, Optional
+import threading
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import BROWSER_MAX_RSS_MB, BROWSER_RECYCLE_PAGES, BROWSER_RECYCLE_MIN_PAGES, MEMORY_CEILING_MB
+
+# Raisons de recyclage (label des métriques)
+REASON_RSS = "rss"
+REASON_PAGES = "pages"
+REASON_CEILING = "ceiling"
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return 0
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    try:
+        for tid in os.listdir(task_dir):
+            try:
+                with open(f"{task_dir}/{tid}/children", "r") as f:
+                    children.extend(int(c) for c in f.read().split())
+            except (FileNotFoundError, ProcessLookupError):
+                continue
+    except (FileNotFoundError, PermissionError):
+        pass
+    return children
+
+
+def process_tree_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """RSS cumulée d'un process et de ses descendants (Mo), None hors Linux"""
+    if not os.path.isdir("/proc"):
+        return None
+    total_kb = 0
+    stack = [pid or os.getpid()]
+    seen = set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        total_kb += _rss_kb(current)
+        stack.extend(_children(current))
+    return total_kb / 1024
+
+
+def driver_pid(playwright) -> Optional[int]:
+    """PID du driver Playwright (parent de Chromium), None si introuvable"""
+    try:
+        return playwright._impl_obj._connection._transport._proc.pid
+    except AttributeError:
+        return None
+
+
+# Chiens de garde des navigateurs ouverts du process (plafond commun)
+_active: List["MemoryWatchdog"] = []
+_active_lock = threading.Lock()
+
+
+class MemoryWatchdog:
+    """
+    Décide quand recycler un navigateur
+
+    Seuils (0 = désactivé): RSS de l'arbre du navigateur, pages chargées
+    depuis le lancement, RSS de tout le process (plafond du conteneur,
+    hôtels en parallèle compris: seul le plus gros navigateur est relancé).
+    RSS et plafond n'agissent qu'après min_pages pages depuis le lancement,
+    pour qu'un navigateur juste relancé ne le soit pas à nouveau.
+    """
+
+    def __init__(
+        self,
+        max_rss_mb: float = BROWSER_MAX_RSS_MB,
+        recycle_pages: int = BROWSER_RECYCLE_PAGES,
+        ceiling_mb: float = MEMORY_CEILING_MB,
+        min_pages: int = BROWSER_RECYCLE_MIN_PAGES
+    ):
+        self.max_rss_mb = max_rss_mb
+        self.recycle_pages = recycle_pages
+        self.ceiling_mb = ceiling_mb
+        self.min_pages = max(1, min_pages)
+        self.root_pid: Optional[int] = None
+        self.pages = 0
+        self.last_rss_mb: Optional[float] = None
+        self.peak_rss_mb: Optional[float] = None
+
+    def attach(self, root_pid: Optional[int]):
+        """Nouveau navigateur: compteur de pages remis à zéro, compté dans le plafond commun"""
+        self.root_pid = root_pid
+        self.pages = 0
+        with _active_lock:
+            if self not in _active:
+                _active.append(self)
+
+    def detach(self):
+        """Navigateur fermé: ne compte plus pour le plafond commun"""
+        with _active_lock:
+            if self in _active:
+                _active.remove(self)
+
+    def _is_largest(self) -> bool:
+        """True si ce navigateur est le plus gros des navigateurs ouverts (dernières mesures)"""
+        with _active_lock:
+            others = [w for w in _active if w is not self]
+        rss = self.last_rss_mb or 0
+        # À égalité (ex: PID du driver inconnu, RSS du process entier), le plus ancien en pages
+        return all((w.last_rss_mb or 0, w.pages) <= (rss, self.pages) for w in others)
+
+    def check(self, pages: int = 0) -> Optional[str]:
+        """
+        Compte les pages chargées et mesure la mémoire
+
+        Returns:
+            Raison du recyclage (rss, pages, ceiling) ou None
+        """
+        self.pages += pages
+        # Sans PID du driver, l'arbre du process entier fait office de borne
+        rss = process_tree_rss_mb(self.root_pid)
+        self.last_rss_mb = rss
+        if rss is not None:
+            self.peak_rss_mb = max(self.peak_rss_mb or 0, rss)
+        if not self.pages:
+            return None
+        if self.recycle_pages and self.pages >= self.recycle_pages:
+            return REASON_PAGES
+        if self.pages < self.min_pages:
+            return None
+        if self.max_rss_mb and rss is not None and rss > self.max_rss_mb:
+            return REASON_RSS
+        if self.ceiling_mb:
+            total = process_tree_rss_mb() if self.root_pid is not None else rss
+            if total is not None and total > self.ceiling_mb and self._is_largest():
+                return REASON_CEILING
+        return None
@@ -0,0 +1,59 @@
+"""
+Classes de résultat d'une date scrapée et politique de nouvelle tentative
+
+success / sold_out sont définitifs; timeout, blocked, parse_error et error
+sont rejoués en fin de passe de l'hôtel avec un backoff croissant.
+"""
+from typing import Optional
+import random
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DATE_RETRY_BACKOFF_SECONDS, DATE_RETRY_MAX_BACKOFF_SECONDS
+
+SUCCESS = "success"
+SOLD_OUT = "sold_out"
+TIMEOUT = "timeout"
+BLOCKED = "blocked"
+PARSE_ERROR = "parse_error"
+ERROR = "error"
+
+DEFINITIVE_OUTCOMES = {SUCCESS, SOLD_OUT}
+RETRYABLE_OUTCOMES = {TIMEOUT, BLOCKED, PARSE_ERROR, ERROR}
+
+# Indices d'une page de blocage / CAPTCHA à la place de la fiche hôtel
+BLOCK_URL_MARKERS = ("captcha", "/challenge", "px-captcha")
+BLOCK_SELECTORS = (
+    "#px-captcha",
+    'iframe[src*="captcha"]',
+    "form#challenge-form",
+)
+
+# Message "aucune disponibilité" affiché par Booking quand l'hôtel est complet
+SOLD_OUT_SELECTORS = (
+    '[data-testid="property-sold-out-alert"]',
+    "#no_availability_msg",
+    ".sold-out-message",
+)
+
+# Tableau des chambres: présent mais sans prix lisible = échec de parsing
+ROOM_TABLE_SELECTOR = "#hprt-table"
+
+
+def is_retryable(outcome: Optional[str]) -> bool:
+    return outcome in RETRYABLE_OUTCOMES
+
+
+def is_definitive(outcome: Optional[str]) -> bool:
+    """True si le snapshot reflète l'état réel de l'hôtel (None = ancien snapshot)"""
+    return outcome is None or outcome in DEFINITIVE_OUTCOMES
+
+
+def retry_backoff_seconds(round_number: int) -> float:
+    """
+    Pause avant la passe de rattrapage n (1, 2, ...): exponentielle
+    plafonnée, avec gigue pour ne pas revenir à intervalle fixe
+    """
+    ceiling = min(DATE_RETRY_MAX_BACKOFF_SECONDS, DATE_RETRY_BACKOFF_SECONDS * (2 ** (round_number - 1)))
+    return random.uniform(ceiling / 2, ceiling)
@@ -0,0 +1,93 @@
+"""
+Détection des pages de blocage / CAPTCHA / consentement juste après page.goto
+et disjoncteur qui décide de changer d'identité ou d'abandonner l'hôtel
+"""
+from typing import Optional
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import BLOCK_MAX_ROTATIONS
+from observability import inc
+from scrapers import outcomes
+
+# Statuts HTTP renvoyés par Booking quand il refuse la requête
+BLOCK_STATUS_CODES = {403, 429}
+
+# Titres des pages de challenge (anti-bot Booking / CDN)
+BLOCK_TITLE_MARKERS = (
+    "access denied",
+    "just a moment",
+    "attention required",
+    "vérifions que vous êtes",
+    "are you a robot",
+)
+
+# Bandeau cookies (OneTrust) à accepter pour accéder aux prix
+CONSENT_SELECTORS = (
+    "#onetrust-accept-btn-handler",
+    'button[data-gdpr-consent="accept"]',
+)
+
+
+def is_block_page(page, response=None) -> bool:
+    """Page de CAPTCHA / blocage servie à la place de la fiche hôtel"""
+    if response is not None and response.status in BLOCK_STATUS_CODES:
+        return True
+    url = (page.url or "").lower()
+    if any(marker in url for marker in outcomes.BLOCK_URL_MARKERS):
+        return True
+    try:
+        title = (page.title() or "").lower()
+    except Exception:
+        title = ""
+    if any(marker in title for marker in BLOCK_TITLE_MARKERS):
+        return True
+    return any(page.locator(selector).count() > 0 for selector in outcomes.BLOCK_SELECTORS)
+
+
+def accept_consent(page, **labels) -> bool:
+    """Clique sur "Accepter" si le bandeau cookies est affiché; True si cliqué"""
+    for selector in CONSENT_SELECTORS:
+        button = page.locator(selector)
+        try:
+            if button.count() > 0 and button.first.is_visible():
+                button.first.click(timeout=3000)
+                inc("scrape_consent_clicks_total", **labels)
+                return True
+        except Exception:
+            continue
+    return False
+
+
+class BlockCircuitBreaker:
+    """
+    Réagit aux pages de blocage d'un hôtel
+
+    Un blocage déclenche une rotation d'identité (nouveau contexte: UA,
+    cookies, proxy) et la même date est retentée aussitôt. Au-delà de
+    max_rotations rotations pour l'hôtel, le blocage suivant ouvre le
+    disjoncteur: l'hôtel est abandonné plutôt que de charger ses 30 dates.
+    """
+
+    CONTINUE = "continue"
+    ROTATE = "rotate"
+    ABORT = "abort"
+
+    def __init__(self, max_rotations: int = BLOCK_MAX_ROTATIONS):
+        self.max_rotations = max_rotations
+        self.rotations = 0
+        self.blocks = 0
+        self.is_open = False
+
+    def record(self, outcome: Optional[str]) -> str:
+        """Enregistre le résultat d'une page et retourne l'action à mener"""
+        if outcome != outcomes.BLOCKED:
+            return self.CONTINUE
+
+        self.blocks += 1
+        if self.rotations >= self.max_rotations:
+            self.is_open = True
+            return self.ABORT
+        self.rotations += 1
+        return self.ROTATE
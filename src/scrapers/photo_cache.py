@@ -0,0 +1,211 @@
+"""
+Cache des photos d'hôtels en vignettes WebP
+
+La photo principale est téléchargée une seule fois (lors du scraping des
+infos de l'hôtel) et réduite en vignettes WebP, rangées par hôtel:
+
+    <PHOTO_CACHE_DIR>/<clé hôtel>/<taille>.webp
+
+La clé vient de l'URL Booking (pays + slug: fr-chateau-de-roussan), connue
+avant la création de l'hôtel en base. L'API les sert (GET /photos/...)
+avec un cache navigateur d'un an: l'URL stockée dans hotels.photoUrl
+porte l'empreinte du contenu (?v=...), une nouvelle photo change l'URL.
+Cette URL doit être absolue (PHOTO_PUBLIC_BASE_URL, le dashboard n'est pas
+servi par l'API): sans elle, photoUrl garde l'URL Booking.
+
+Pillow est optionnel (pip install Pillow); sans lui, photoUrl garde l'URL
+Booking d'origine.
+
+Usage (hôtels enregistrés avec une URL Booking):
+    python src/scrapers/photo_cache.py --backfill
+"""
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+import hashlib
+import re
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PHOTO_CACHE_DIR, PHOTO_PUBLIC_BASE_URL, PHOTO_WEBP_QUALITY
+from observability import inc
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+# Taille -> boîte maximale (largeur, hauteur) en pixels, ratio conservé, jamais agrandie
+PHOTO_SIZES: Dict[str, Tuple[int, int]] = {
+    "thumb": (160, 120),
+    "card": (480, 360),
+}
+# Taille référencée par hotels.photoUrl
+DEFAULT_SIZE = "card"
+# Photos plus lourdes refusées (l'original Booking fait quelques centaines de Ko)
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+KEY_PATTERN = re.compile(r"^[a-z0-9][a-z0-9-]{0,119}$")
+
+
+def _require_pillow():
+    if Image is None:
+        raise ImportError("Pillow est requis pour les vignettes WebP (pip install Pillow)")
+
+
+def hotel_photo_key(booking_url: str) -> str:
+    """
+    Clé de cache d'un hôtel d'après son URL Booking
+    https://www.booking.com/hotel/fr/chateau-de-roussan.fr.html -> fr-chateau-de-roussan
+    """
+    parts = [p for p in urlsplit(booking_url).path.lower().split("/") if p]
+    if len(parts) >= 3 and parts[0] == "hotel":
+        slug = parts[2].split(".")[0]
+        key = re.sub(r"[^a-z0-9]+", "-", f"{parts[1]}-{slug}").strip("-")[:120]
+        if KEY_PATTERN.match(key):
+            return key
+    # URL inattendue: empreinte stable
+    return "h-" + hashlib.sha1(booking_url.encode("utf-8")).hexdigest()[:16]
+
+
+def render_thumbnails(image: bytes, quality: int = PHOTO_WEBP_QUALITY) -> Dict[str, bytes]:
+    """Vignettes WebP de chaque taille de PHOTO_SIZES"""
+    _require_pillow()
+    if len(image) > MAX_SOURCE_BYTES:
+        raise ValueError(f"photo trop lourde ({len(image) // 1024} Ko)")
+    with Image.open(BytesIO(image)) as source:
+        # Orientation EXIF appliquée, transparence aplatie (photos JPEG côté Booking)
+        picture = ImageOps.exif_transpose(source).convert("RGB")
+    thumbnails = {}
+    for size, box in PHOTO_SIZES.items():
+        resized = picture.copy()
+        resized.thumbnail(box, Image.LANCZOS)
+        out = BytesIO()
+        resized.save(out, format="WEBP", quality=quality, method=6)
+        thumbnails[size] = out.getvalue()
+    return thumbnails
+
+
+def public_base_url_set() -> bool:
+    """True si PHOTO_PUBLIC_BASE_URL est renseignée (sinon photoUrl garde l'URL Booking)"""
+    if PHOTO_PUBLIC_BASE_URL.strip():
+        return True
+    print("  ⚠️ PHOTO_PUBLIC_BASE_URL vide: photoUrl garde l'URL Booking (URL de l'API requise)")
+    return False
+
+
+def public_url(key: str, version: str, size: str = DEFAULT_SIZE) -> str:
+    """URL de la vignette servie par l'API (préfixée par PHOTO_PUBLIC_BASE_URL)"""
+    return f"{PHOTO_PUBLIC_BASE_URL.rstrip('/')}/photos/{key}/{size}.webp?v={version}"
+
+
+class PhotoCache:
+    """Vignettes WebP rangées par hôtel dans un répertoire"""
+
+    def __init__(self, directory: str = PHOTO_CACHE_DIR):
+        self.directory = directory
+
+    def path(self, key: str, size: str) -> Optional[str]:
+        """Fichier d'une vignette (None si clé ou taille invalide: pas de chemin arbitraire)"""
+        if not KEY_PATTERN.match(key) or size not in PHOTO_SIZES:
+            return None
+        return os.path.join(self.directory, key, f"{size}.webp")
+
+    def store(self, key: str, image: bytes) -> str:
+        """
+        Écrit les vignettes d'une photo (écriture atomique, remplace les précédentes)
+
+        Returns:
+            Version (empreinte du contenu) à mettre dans l'URL publique
+        """
+        thumbnails = render_thumbnails(image)
+        for size, data in thumbnails.items():
+            path = self.path(key, size)
+            if path is None:
+                raise ValueError(f"clé de photo invalide: {key}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return hashlib.sha1(thumbnails[DEFAULT_SIZE]).hexdigest()[:10]
+
+
+def cache_hotel_photo(booking_url: str, image: bytes, cache: Optional[PhotoCache] = None) -> Optional[str]:
+    """
+    Met en cache la photo d'un hôtel
+
+    Returns:
+        URL publique de la vignette DEFAULT_SIZE, None si impossible
+        (PHOTO_PUBLIC_BASE_URL vide, Pillow absent, image illisible):
+        l'appelant garde l'URL d'origine
+    """
+    if not public_base_url_set():
+        return None
+    key = hotel_photo_key(booking_url)
+    try:
+        version = (cache or PhotoCache()).store(key, image)
+    except Exception as e:
+        print(f"  ⚠️ Vignettes non créées ({key}): {e}")
+        inc("photo_cache_total", status="failed")
+        return None
+    inc("photo_cache_total", status="stored")
+    return public_url(key, version)
+
+
+def is_cached_url(photo_url: Optional[str]) -> bool:
+    return bool(photo_url) and "/photos/" in photo_url and "?v=" in photo_url
+
+
+def backfill(storage, cache: Optional[PhotoCache] = None) -> int:
+    """
+    Met en cache les photos des hôtels enregistrés avec l'URL Booking
+    (téléchargée si elle est encore valide) et met à jour hotels.photoUrl
+
+    Returns:
+        Nombre d'hôtels mis à jour
+    """
+    import httpx
+
+    if not public_base_url_set():
+        return 0
+    updated = 0
+    for hotel in storage.get_monitored_hotels():
+        source = hotel.get("photoUrl")
+        if not source or is_cached_url(source) or not source.startswith("http"):
+            continue
+        try:
+            response = httpx.get(source, timeout=20, follow_redirects=True)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"  ⚠️ {hotel['name']}: photo inaccessible ({e})")
+            continue
+        photo_url = cache_hotel_photo(hotel["url"], response.content, cache)
+        if photo_url and storage.update_hotel(hotel["id"], {"photoUrl": photo_url}):
+            updated += 1
+            print(f"  ✅ {hotel['name']}: {photo_url}")
+    return updated
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vignettes WebP des photos d'hôtels")
+    parser.add_argument("--backfill", action="store_true",
+                        help="Mettre en cache les photos des hôtels encore liées à Booking")
+    parser.add_argument("--dir", default=PHOTO_CACHE_DIR, help="Répertoire du cache")
+    args = parser.parse_args()
+
+    try:
+        _require_pillow()
+    except ImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.backfill:
+        from database import get_storage
+        print(f"🔄 Mise en cache des photos dans {args.dir}...")
+        count = backfill(get_storage(), PhotoCache(args.dir))
+        print(f"✅ {count} hôtel(s) mis à jour")
+    else:
+        parser.print_help()
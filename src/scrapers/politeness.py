@@ -0,0 +1,157 @@
+"""
+Ordonnanceur de politesse: quand la prochaine navigation peut partir
+
+Deux contraintes, partagées par tous les threads du process:
+- par identité (contexte navigateur = un visiteur): un délai aléatoire
+  entre la fin d'une page et la navigation suivante (cadence humaine);
+- par domaine: un seau à jetons (débit moyen + petite rafale) qui borne
+  le nombre de pages demandées au site, toutes identités confondues.
+
+Pendant qu'une identité "lit" sa page, une autre peut naviguer: le temps
+de session tend vers la somme des chargements de page au lieu de la
+somme des délais.
+"""
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlsplit
+import random
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import POLITENESS_DOMAIN_RATE_PER_MINUTE, POLITENESS_DOMAIN_BURST
+from observability import timed, inc
+from scrapers.cancellation import get_cancellation_token
+
+
+class TokenBucket:
+    """Seau à jetons (appelé sous le verrou de l'ordonnanceur)"""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        else:
+            self.tokens = self.capacity
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Secondes avant qu'un jeton soit disponible (0 = tout de suite)"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+def domain_of(url: str) -> str:
+    """Domaine de politesse d'une URL (www.booking.com -> booking.com)"""
+    host = (urlsplit(url).hostname or url).lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class PolitenessScheduler:
+    """Cadence par identité et débit par domaine (thread-safe)"""
+
+    def __init__(
+        self,
+        domain_rate_per_minute: float = POLITENESS_DOMAIN_RATE_PER_MINUTE,
+        domain_burst: int = POLITENESS_DOMAIN_BURST
+    ):
+        self.domain_rate = max(0.0, domain_rate_per_minute) / 60
+        self.domain_burst = domain_burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        # identité -> fin de sa dernière page (monotonic)
+        self._last_done: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, domain: str) -> TokenBucket:
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            bucket = self._buckets[domain] = TokenBucket(self.domain_rate, self.domain_burst)
+        return bucket
+
+    def acquire(self, url: str, identity: str, min_gap: float = 0, max_gap: float = 0) -> float:
+        """
+        Bloque jusqu'à ce que la navigation soit permise, puis la réserve:
+        un délai tiré dans [min_gap, max_gap] depuis la dernière page de
+        l'identité, et un jeton du domaine
+
+        Un arrêt demandé (SIGTERM) écourte l'attente sans rien réserver:
+        l'appelant vérifie le jeton d'annulation avant de naviguer.
+
+        Returns:
+            Secondes attendues
+        """
+        cancellation = get_cancellation_token()
+        domain = domain_of(url)
+        gap = random.uniform(min_gap, max(min_gap, max_gap))
+        started = time.monotonic()
+        throttled = False
+        while not cancellation.cancelled:
+            with self._lock:
+                now = time.monotonic()
+                last_done = self._last_done.get(identity)
+                identity_wait = last_done + gap - now if last_done is not None else 0.0
+                domain_wait = self._bucket(domain).wait_time(now)
+                if identity_wait <= 0 and domain_wait <= 0:
+                    self._bucket(domain).take()
+                    break
+            if identity_wait <= 0:
+                throttled = True
+            cancellation.sleep(max(0.01, identity_wait, domain_wait))
+        if throttled:
+            inc("politeness_domain_throttled_total", domain=domain)
+        return time.monotonic() - started
+
+    def done(self, identity: str):
+        """Fin de page de l'identité: point de départ de son prochain délai"""
+        with self._lock:
+            self._last_done[identity] = time.monotonic()
+
+    def forget(self, identity: str):
+        """Identité abandonnée (contexte fermé)"""
+        with self._lock:
+            self._last_done.pop(identity, None)
+
+    @contextmanager
+    def turn(
+        self,
+        url: str,
+        identity: str,
+        min_gap: float = 0,
+        max_gap: float = 0,
+        stage: str = "delay"
+    ) -> Iterator[None]:
+        """
+        Attend le tour de l'identité (attente mesurée sous `stage`), laisse
+        l'appelant charger sa page, puis note la fin de page
+        """
+        with timed(stage):
+            self.acquire(url, identity, min_gap, max_gap)
+        try:
+            yield
+        finally:
+            self.done(identity)
+
+
+_scheduler: Optional[PolitenessScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_politeness_scheduler() -> PolitenessScheduler:
+    """Ordonnanceur partagé par le process (tous les hôtels, toutes les sessions)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = PolitenessScheduler()
+        return _scheduler
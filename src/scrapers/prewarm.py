@@ -0,0 +1,180 @@
+"""
+Préchauffage des navigateurs avant une session planifiée
+
+Quelques minutes avant l'heure de la session, un thread par hôtel de la
+première vague (SCRAPE_PARALLEL_HOTELS) importe Playwright, lance
+Chromium, ouvre le contexte de l'identité et charge la page d'accueil de
+Booking: DNS, connexions TLS, cache HTTP des ressources statiques et
+bandeau cookies sont réglés avant le déclenchement.
+
+Playwright (API synchrone) est lié au thread qui l'a démarré: chaque
+navigateur préchauffé reste dans son thread, qui scrape ensuite son hôtel
+puis les hôtels restants de la file (BrowserPrewarmer.run), comme un
+thread de _scrape_hotels_parallel.
+"""
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import queue
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SCRAPE_PARALLEL_HOTELS
+from observability import timed, inc
+from scrapers.stealth_config import BrowserSession
+from scrapers.page_guard import accept_consent, is_block_page
+from scrapers.politeness import get_politeness_scheduler
+from scrapers import outcomes
+
+# Un job de session: (hôtel, cellules) -> résultat, avec la session préchauffée ou None
+HotelJob = Tuple[Dict[str, Any], Any]
+JobRunner = Callable[[Dict[str, Any], Any, Optional[BrowserSession]], Any]
+
+
+def origin_of(url: str) -> str:
+    """https://www.booking.com/hotel/fr/x.html -> https://www.booking.com/"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def warm_up(session: BrowserSession, url: str):
+    """Charge la page d'accueil du site dans le contexte de l'identité (tour de politesse compris)"""
+    scheduler = get_politeness_scheduler()
+    identity = session.identity
+    try:
+        with scheduler.turn(url, identity, stage="prewarm_delay"):
+            response = session.page.goto(url, wait_until="domcontentloaded", timeout=30000)
+            blocked = is_block_page(session.page, response)
+            if not blocked:
+                accept_consent(session.page, **session.labels)
+    finally:
+        scheduler.forget(identity)
+    if blocked:
+        # Identité grillée avant même la session: une autre prend sa place
+        session.report(outcomes.BLOCKED)
+        session.rotate()
+
+
+class _Lane:
+    """Thread d'un navigateur préchauffé (préchauffage, puis jobs de la session)"""
+
+    def __init__(self, hotel: Dict[str, Any]):
+        self.hotel = hotel
+        self.session: Optional[BrowserSession] = None
+        self.ready = threading.Event()
+        self.warm_seconds: Optional[float] = None
+        self._work: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name=f"prewarm-{hotel['id']}", daemon=True)
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            with timed("browser_prewarm", hotel=self.hotel['name']):
+                self.session = BrowserSession(hotel=self.hotel['name']).start()
+                warm_up(self.session, origin_of(self.hotel['url']))
+            self.warm_seconds = time.perf_counter() - started
+            inc("browser_prewarm_total", status="ready")
+            print(f"🔥 {self.hotel['name']}: navigateur prêt en {self.warm_seconds:.1f}s")
+        except Exception as e:
+            print(f"⚠️ Préchauffage {self.hotel['name']} impossible: {e}")
+            inc("browser_prewarm_total", status="failed")
+            self._close_session()
+        finally:
+            self.ready.set()
+
+        work = self._work.get()
+        if work is None:
+            if self.session is not None:
+                inc("browser_prewarm_total", status="unused")
+            self._close_session()
+            return
+        own_job, jobs, runner, results = work
+        try:
+            if own_job is not None:
+                index, (hotel, cells) = own_job
+                # La session appartient désormais au job (fermée par le scraper)
+                session, self.session = self.session, None
+                self._execute(results[index], runner, hotel, cells, session)
+            while True:
+                try:
+                    index, (hotel, cells) = jobs.get_nowait()
+                except queue.Empty:
+                    break
+                self._execute(results[index], runner, hotel, cells, None)
+        finally:
+            self._close_session()
+
+    @staticmethod
+    def _execute(future: Future, runner: JobRunner, hotel, cells, session: Optional[BrowserSession]):
+        try:
+            future.set_result(runner(hotel, cells, session))
+        except BaseException as e:
+            future.set_exception(e)
+
+    def _close_session(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
+
+
+class BrowserPrewarmer:
+    """
+    Navigateurs préchauffés pour les premiers hôtels d'une session
+
+    start() lance le préchauffage en arrière-plan; run() exécute les jobs
+    de la session sur les threads préchauffés (un job préchauffé par
+    thread, puis la file); close() libère ce qui n'a pas servi.
+    """
+
+    def __init__(self, hotels: List[Dict[str, Any]], workers: int = SCRAPE_PARALLEL_HOTELS):
+        self.lanes = [_Lane(hotel) for hotel in hotels[:max(1, workers)]]
+        self._used = False
+
+    def start(self) -> "BrowserPrewarmer":
+        print(f"🔥 Préchauffage de {len(self.lanes)} navigateur(s): {', '.join(l.hotel['name'] for l in self.lanes)}")
+        for lane in self.lanes:
+            lane.thread.start()
+        return self
+
+    @property
+    def ready_count(self) -> int:
+        return sum(1 for lane in self.lanes if lane.ready.is_set() and lane.session is not None)
+
+    def run(self, jobs: List[HotelJob], runner: JobRunner) -> List[Any]:
+        """
+        Exécute les jobs (hôtel, cellules) sur les threads préchauffés
+
+        Un hôtel préchauffé dont le navigateur n'est pas encore prêt est
+        attendu; s'il a échoué, il est scrapé à froid sur le même thread.
+
+        Returns:
+            Résultats de runner, dans l'ordre de jobs
+        """
+        if self._used:
+            raise RuntimeError("BrowserPrewarmer déjà utilisé")
+        self._used = True
+        results: List[Future] = [Future() for _ in jobs]
+        shared: "queue.Queue[Tuple[int, HotelJob]]" = queue.Queue()
+        owned: Dict[str, Tuple[int, HotelJob]] = {}
+        lane_ids = {lane.hotel['id'] for lane in self.lanes}
+        for index, job in enumerate(jobs):
+            if job[0]['id'] in lane_ids and job[0]['id'] not in owned:
+                owned[job[0]['id']] = (index, job)
+            else:
+                shared.put((index, job))
+
+        for lane in self.lanes:
+            lane._work.put((owned.get(lane.hotel['id']), shared, runner, results))
+        return [future.result() for future in results]
+
+    def close(self):
+        """Ferme les navigateurs qui n'ont pas servi (session annulée, hôtel retiré)"""
+        if not self._used:
+            self._used = True
+            for lane in self.lanes:
+                lane._work.put(None)
+        for lane in self.lanes:
+            lane.thread.join(timeout=30)
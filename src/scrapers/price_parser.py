@@ -0,0 +1,153 @@
+"""
+Lecture des prix affichés par Booking, quelle que soit la locale
+
+"€ 1.250", "1 250,50 €", "US$1,250.50", "CHF 1'250.–": séparateurs de
+milliers (point, virgule, espaces insécables fines, apostrophe), décimales
+à 1 ou 2 chiffres, symbole ou code ISO de la devise, mention "taxes
+comprises". Expressions précompilées: appelé pour chaque ligne de chaque
+tableau des chambres.
+"""
+from dataclasses import dataclass
+from typing import Optional
+import re
+
+# Devise de la fiche quand le texte n'en affiche aucune (site Booking FR)
+DEFAULT_CURRENCY = "EUR"
+
+# Symboles -> code ISO (les plus longs d'abord: "US$" avant "$")
+CURRENCY_SYMBOLS = {
+    "US$": "USD",
+    "CA$": "CAD",
+    "AU$": "AUD",
+    "A$": "AUD",
+    "C$": "CAD",
+    "R$": "BRL",
+    "HK$": "HKD",
+    "NZ$": "NZD",
+    "€": "EUR",
+    "$": "USD",
+    "£": "GBP",
+    "¥": "JPY",
+    "₹": "INR",
+    "₩": "KRW",
+    "₺": "TRY",
+    "zł": "PLN",
+    "Kč": "CZK",
+    "Fr.": "CHF",
+}
+CURRENCY_CODES = {
+    "EUR", "USD", "GBP", "CHF", "JPY", "CAD", "AUD", "NZD", "BRL", "HKD", "INR", "KRW", "TRY",
+    "PLN", "CZK", "SEK", "NOK", "DKK", "HUF", "RON", "MAD", "AED", "CNY", "MXN", "ZAR",
+}
+
+# Espaces de mise en forme des nombres (insécable, fine insécable, fine, chiffre)
+_SPACES = str.maketrans({"\xa0": " ", "\u202f": " ", "\u2009": " ", "\u2007": " ", "\u2019": "'"})
+
+# Montant: groupes de 3 chiffres séparés (milliers), ou chiffres seuls, puis
+# 1 à 2 décimales. Une partie de 3 chiffres après un séparateur unique est
+# toujours un groupe de milliers ("1.250" = 1250): aucun prix n'a 3 décimales.
+AMOUNT_PATTERN = re.compile(
+    r"(?<![\d.,])(?:\d{1,3}(?:[ '.,]\d{3})+|\d+)(?:[.,]\d{1,2})?(?![\d])"
+)
+_DECIMALS_PATTERN = re.compile(r"[.,](\d{1,2})$")
+_NON_DIGITS_PATTERN = re.compile(r"\D")
+CURRENCY_PATTERN = re.compile(
+    "|".join(
+        [re.escape(symbol) for symbol in sorted(CURRENCY_SYMBOLS, key=len, reverse=True)]
+        + [r"\b(?:" + "|".join(sorted(CURRENCY_CODES)) + r")\b"]
+    )
+)
+
+TAXES_INCLUDED_PATTERN = re.compile(
+    r"taxes?\s+(?:et\s+frais\s+)?(?:compris|incluses?)|\bttc\b|"
+    r"(?:includes|incl\.?)\s+taxes|taxes\s+(?:and\s+(?:fees|charges)\s+)?included",
+    re.IGNORECASE,
+)
+TAXES_EXCLUDED_PATTERN = re.compile(
+    r"\+[^+]{0,25}?tax|hors\s+taxes|\bht\b|taxes?\s+(?:et\s+frais\s+)?non\s+compris|"
+    r"(?:excludes|excl\.?)\s+taxes",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class ParsedPrice:
+    """Prix lu dans un texte affiché"""
+
+    amount: float
+    currency: Optional[str] = None
+    taxes_included: Optional[bool] = None
+
+
+def _normalize(text: str) -> str:
+    return text.translate(_SPACES)
+
+
+def _to_float(token: str) -> float:
+    decimals = _DECIMALS_PATTERN.search(token)
+    if decimals:
+        integer = _NON_DIGITS_PATTERN.sub("", token[:decimals.start()])
+        return float(f"{integer or 0}.{decimals.group(1)}")
+    return float(_NON_DIGITS_PATTERN.sub("", token))
+
+
+def detect_currency(text: str) -> Optional[str]:
+    """Code ISO de la devise affichée (symbole ou code), None si absente"""
+    match = CURRENCY_PATTERN.search(_normalize(text))
+    if not match:
+        return None
+    return CURRENCY_SYMBOLS.get(match.group(), match.group())
+
+
+def taxes_included(text: str) -> Optional[bool]:
+    """True / False selon la mention des taxes, None si le texte n'en dit rien"""
+    if TAXES_EXCLUDED_PATTERN.search(text):
+        return False
+    if TAXES_INCLUDED_PATTERN.search(text):
+        return True
+    return None
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """
+    Montant d'un prix affiché (ex: "€ 1.250" -> 1250.0), None si illisible
+
+    Si le texte contient plusieurs nombres ("2 nuits, 2 adultes : 300 €"),
+    retient celui qui touche la devise.
+    """
+    if not text:
+        return None
+    text = _normalize(text)
+    matches = list(AMOUNT_PATTERN.finditer(text))
+    if not matches:
+        return None
+    match = matches[0]
+    if len(matches) > 1:
+        currency = CURRENCY_PATTERN.search(text)
+        if currency:
+            match = min(matches, key=lambda m: min(
+                abs(m.start() - currency.end()), abs(currency.start() - m.end())
+            ))
+    return _to_float(match.group().strip())
+
+
+def parse_price(text: str, context: str = "") -> Optional[ParsedPrice]:
+    """
+    Montant, devise et mention des taxes d'un prix affiché
+
+    Args:
+        text: Texte de l'élément prix
+        context: Texte voisin (ex: ligne du tableau) où chercher la devise
+            et la mention des taxes absentes du prix lui-même
+
+    Returns:
+        ParsedPrice, ou None si aucun montant lisible
+    """
+    amount = parse_amount(text)
+    if amount is None:
+        return None
+    return ParsedPrice(
+        amount=amount,
+        currency=detect_currency(text) or (detect_currency(context) if context else None),
+        taxes_included=taxes_included(f"{text} {context}"),
+    )
@@ -1,30 +1,192 @@
 """
-Scraper 2: Récupération des prix pour les 30 prochains jours
+Scraper 2: Récupération des prix sur la grille (dates x nuits x adultes)
 Usage: Exécuté automatiquement 2x/jour (2 sessions de 3 hôtels)
 """
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeout
-from datetime import datetime, timedelta, date
-from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Tuple
 import sys
 import os
-import re
+import random
+import time
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from scrapers.stealth_config import create_stealth_browser, close_browser, random_delay
-from config import MIN_DELAY_SECONDS, MAX_DELAY_SECONDS
+from scrapers.stealth_config import BrowserSession, random_delay, tab_heap_mb
+from scrapers.page_guard import BlockCircuitBreaker, is_block_page, accept_consent
+from config import (
+    MIN_DELAY_SECONDS,
+    MAX_DELAY_SECONDS,
+    PAGE_SETTLE_MIN_SECONDS,
+    PAGE_SETTLE_MAX_SECONDS,
+    DATE_MAX_ATTEMPTS,
+    HOTEL_MAX_RESCHEDULES,
+    HOTEL_RESCHEDULE_DELAY_SECONDS,
+    SCRAPE_PARALLEL_HOTELS,
+    SCRAPE_TABS,
+    SCRAPE_CLIENT_TABS,
+    SCRAPE_MAX_TABS,
+    SCRAPE_TAB_MAX_HEAP_MB,
+    SCRAPE_REFINE_DELAY_MIN_SECONDS,
+    SCRAPE_REFINE_DELAY_MAX_SECONDS,
+)
+from scrapers import outcomes
+from scrapers.scrape_grid import GridCell, ScrapeGrid, SoldOutPruner, REFERENCE_ADULTS, snapshot_key
+from scrapers.run_stats import HotelRunStats
+from scrapers.room_parser import parse_price_page
+from scrapers.price_parser import DEFAULT_CURRENCY
+from scrapers.politeness import PolitenessScheduler, get_politeness_scheduler
+from scrapers.prewarm import BrowserPrewarmer
+from scrapers.cancellation import get_cancellation_token
+from observability import timed, inc, observe, log_event
+from observability.profiling import SessionProfiler
 
 
-def get_next_30_days() -> List[date]:
-    """Génère une liste des 30 prochains jours"""
-    today = date.today()
-    return [today + timedelta(days=i) for i in range(1, 31)]
+def _record_outcome(
+    hotel_name: Optional[str],
+    checkin_str: str,
+    outcome: str,
+    started: float,
+    run_stats: Optional[HotelRunStats] = None
+):
+    """Compte le résultat d'une date (voir scrapers.outcomes)"""
+    duration_ms = (time.perf_counter() - started) * 1000
+    inc("scrape_dates_total", hotel=hotel_name, outcome=outcome)
+    log_event("date_result", hotel=hotel_name, date=checkin_str, outcome=outcome,
+              duration_ms=round(duration_ms, 1))
+    if run_stats is not None:
+        run_stats.record_date(checkin_str, outcome, duration_ms)
+
+
+def _empty_snapshot(cell: GridCell, outcome: str) -> Dict[str, Any]:
+    return {
+        "dateCheckin": cell.checkin.strftime("%Y-%m-%d"),
+        "nights": cell.nights,
+        "adults": cell.adults,
+        "price": None,
+        "currency": DEFAULT_CURRENCY,
+        "available": False,
+        "outcome": outcome,
+    }
+
+
+def _cell_url(hotel_url: str, cell: GridCell) -> str:
+    """URL Booking de la cellule (dates et occupation)"""
+    params = (
+        f"checkin={cell.checkin.strftime('%Y-%m-%d')}&checkout={cell.checkout.strftime('%Y-%m-%d')}"
+        f"&group_adults={cell.adults}&no_rooms=1&group_children=0"
+    )
+    separator = "&" if "?" in hotel_url else "?"
+    return f"{hotel_url}{separator}{params}"
+
+
+def _navigate(
+    page: Page,
+    url: str,
+    hotel_name: Optional[str],
+    run_stats: Optional[HotelRunStats],
+    wait_until: str = "domcontentloaded"
+):
+    """page.goto mesuré (durée du goto, pages chargées)"""
+    goto_started = time.perf_counter()
+    with timed("goto", hotel=hotel_name):
+        response = page.goto(url, wait_until=wait_until, timeout=get_cancellation_token().timeout_ms(30000))
+    inc("scrape_pages_total", hotel=hotel_name)
+    if run_stats is not None:
+        run_stats.record_page((time.perf_counter() - goto_started) * 1000)
+    return response
+
+
+def _read_cell(
+    page: Page,
+    response,
+    cell: GridCell,
+    hotel_name: Optional[str],
+    run_stats: Optional[HotelRunStats],
+    started: float,
+    navigated: float
+) -> Dict[str, Any]:
+    """Lit une page chargée: blocage, consentement, attente des prix, extraction"""
+    label = cell.key
+    # Vérifié avant toute attente: une page de challenge ne contiendra jamais de prix
+    if is_block_page(page, response):
+        print(f"    🚫 {label}: Page de blocage / CAPTCHA")
+        _record_outcome(hotel_name, label, outcomes.BLOCKED, started, run_stats)
+        return _empty_snapshot(cell, outcomes.BLOCKED)
+    accept_consent(page, hotel=hotel_name)
+    
+    # Pause de rendu, déjà (en partie) écoulée pour un onglet chargé en arrière-plan
+    settle = random.uniform(PAGE_SETTLE_MIN_SECONDS, PAGE_SETTLE_MAX_SECONDS) - (time.perf_counter() - navigated)
+    random_delay(max(0, settle), max(0, settle), stage="settle_delay")
+    
+    # Attendre le chargement des prix (absent si l'hôtel est complet)
+    try:
+        with timed("selector_wait", hotel=hotel_name):
+            page.wait_for_selector(
+                '[data-testid="price-and-discounted-price"]', timeout=get_cancellation_token().timeout_ms(10000)
+            )
+    except PlaywrightTimeout:
+        pass
+    
+    # Un seul aller-retour navigateur: tout le tableau est lu sur le HTML
+    with timed("extraction", hotel=hotel_name):
+        parsed = parse_price_page(page.content())
+        price = parsed["price"]
+        if price is not None:
+            outcome = outcomes.SUCCESS
+        elif parsed["found_unparsed"] or (parsed["has_room_table"] and not parsed["sold_out_notice"]):
+            # Des chambres sont affichées mais aucun prix n'a pu être lu
+            outcome = outcomes.PARSE_ERROR
+        else:
+            outcome = outcomes.SOLD_OUT
+    
+    snapshot = _empty_snapshot(cell, outcome)
+    if outcome == outcomes.SUCCESS:
+        snapshot["price"] = price
+        snapshot["currency"] = parsed["currency"]
+        snapshot["available"] = True
+        snapshot["rooms"] = parsed["rooms"]
+        inc("scrape_rooms_total", len(parsed["rooms"]), hotel=hotel_name)
+        print(f"    ✅ {label}: {price} {parsed['currency']} ({len(parsed['rooms'])} offre(s))")
+    elif outcome == outcomes.SOLD_OUT:
+        print(f"    ⚠️ {label}: Indisponible")
+    else:
+        print(f"    ❓ {label}: Prix illisible")
+    
+    _record_outcome(hotel_name, label, outcome, started, run_stats)
+    return snapshot
+
+
+def _failed_cell(
+    cell: GridCell,
+    error: Exception,
+    hotel_name: Optional[str],
+    run_stats: Optional[HotelRunStats],
+    started: float
+) -> Dict[str, Any]:
+    """Snapshot d'une cellule dont la page n'a pas pu être lue (timeout, erreur)"""
+    label = cell.key
+    if isinstance(error, PlaywrightTimeout):
+        print(f"    ❌ {label}: Timeout")
+        _record_outcome(hotel_name, label, outcomes.TIMEOUT, started, run_stats)
+        return _empty_snapshot(cell, outcomes.TIMEOUT)
+    print(f"    ❌ {label}: Erreur - {error}")
+    _record_outcome(hotel_name, label, outcomes.ERROR, started, run_stats)
+    if run_stats is not None:
+        run_stats.record_error(f"{label}: {error}")
+    return _empty_snapshot(cell, outcomes.ERROR)
 
 
 def scrape_price_for_date(
     page: Page, 
     hotel_url: str, 
-    checkin_date: date
-) -> Optional[Dict[str, Any]]:
+    checkin_date: date,
+    hotel_name: Optional[str] = None,
+    run_stats: Optional[HotelRunStats] = None,
+    nights: int = 1,
+    adults: int = REFERENCE_ADULTS
+) -> Dict[str, Any]:
     """
     Scrape le prix pour une date spécifique
     
@@ -32,168 +194,493 @@ def scrape_price_for_date(
         page: Page Playwright déjà ouverte
         hotel_url: URL de l'hôtel
         checkin_date: Date de check-in
+        hotel_name: Nom de l'hôtel (labels des métriques)
+        run_stats: Statistiques de l'hôtel à compléter
+        nights: Durée du séjour (prix affiché = total du séjour)
+        adults: Nombre d'adultes (une chambre)
         
     Returns:
-        Dict avec: price, currency, available, dateCheckin
+        Dict avec: price, currency, available, dateCheckin, nights, adults, outcome
+        (outcome: success, sold_out, timeout, blocked, parse_error, error)
     """
+    started = time.perf_counter()
+    cell = GridCell(checkin_date, nights, adults)
     try:
-        # Formater les dates pour l'URL Booking
-        checkout_date = checkin_date + timedelta(days=1)  # 1 nuit
-        
-        checkin_str = checkin_date.strftime("%Y-%m-%d")
-        checkout_str = checkout_date.strftime("%Y-%m-%d")
-        
-        # Construire URL avec dates
-        if "?" in hotel_url:
-            url_with_dates = f"{hotel_url}&checkin={checkin_str}&checkout={checkout_str}"
-        else:
-            url_with_dates = f"{hotel_url}?checkin={checkin_str}&checkout={checkout_str}"
-        
-        # Aller sur la page avec les dates
-        page.goto(url_with_dates, wait_until="domcontentloaded", timeout=30000)
-        random_delay(2, 4)
-        
-        # Attendre le chargement des prix
-        try:
-            page.wait_for_selector('[data-testid="price-and-discounted-price"]', timeout=10000)
-        except:
-            # Si pas de prix trouvé, l'hôtel est peut-être complet
-            pass
-        
-        snapshot = {
-            "dateCheckin": checkin_str,
-            "price": None,
-            "currency": "EUR",
-            "available": False,
-        }
+        response = _navigate(page, _cell_url(hotel_url, cell), hotel_name, run_stats)
+        return _read_cell(page, response, cell, hotel_name, run_stats, started, time.perf_counter())
+    except Exception as e:
+        return _failed_cell(cell, e, hotel_name, run_stats, started)
+
+
+def scrape_cells_pipelined(
+    pages: List[Page],
+    hotel_url: str,
+    cells: List[GridCell],
+    hotel_name: Optional[str] = None,
+    run_stats: Optional[HotelRunStats] = None,
+    before_navigation: Optional[Callable[[], Any]] = None
+) -> List[Tuple[Dict[str, Any], Optional[float]]]:
+    """
+    Scrape plusieurs cellules en parallèle dans les onglets d'un même contexte
+    
+    Chaque onglet lance sa navigation sans attendre le DOM (wait_until=
+    "commit"), puis les onglets sont lus dans l'ordre: pendant que le
+    premier attend ses prix, les suivants finissent de charger.
+    
+    Args:
+        pages: Onglets (un par cellule)
+        before_navigation: Appelé avant chaque navigation après la première
+            (jeton de débit du domaine)
         
-        # Chercher le prix
+    Returns:
+        (snapshot, durée du goto en ms) par cellule, dans l'ordre de cells
+    """
+    in_flight = []
+    for index, (page, cell) in enumerate(zip(pages, cells)):
+        if index and before_navigation is not None:
+            before_navigation()
+        started = time.perf_counter()
         try:
-            # Méthode 1: Prix dans le premier résultat de chambre
-            price_element = page.locator('[data-testid="price-and-discounted-price"]').first
-            price_text = price_element.inner_text()
-            
-            # Extraire le nombre (ex: "€ 150" -> 150.0)
-            price_match = re.search(r'[\d\s]+(?:[.,]\d+)?', price_text.replace('\xa0', ''))
-            if price_match:
-                price_str = price_match.group().replace(' ', '').replace(',', '.')
-                snapshot["price"] = float(price_str)
-                snapshot["available"] = True
-                print(f"    ✅ {checkin_str}: {snapshot['price']}€")
-        except:
-            # Méthode 2: Chercher dans les offres
+            response = _navigate(page, _cell_url(hotel_url, cell), hotel_name, run_stats, wait_until="commit")
+            goto_ms = run_stats.last_goto_ms if run_stats else None
+            in_flight.append((page, cell, started, time.perf_counter(), response, goto_ms, None))
+        except Exception as e:
+            in_flight.append((page, cell, started, None, None, None, e))
+    
+    results = []
+    for page, cell, started, navigated, response, goto_ms, error in in_flight:
+        if error is None:
             try:
-                price_element = page.locator('.prco-valign-middle-helper').first
-                price_text = price_element.inner_text()
-                
-                price_match = re.search(r'[\d\s]+(?:[.,]\d+)?', price_text.replace('\xa0', ''))
-                if price_match:
-                    price_str = price_match.group().replace(' ', '').replace(',', '.')
-                    snapshot["price"] = float(price_str)
-                    snapshot["available"] = True
-                    print(f"    ✅ {checkin_str}: {snapshot['price']}€")
+                with timed("tab_wait", hotel=hotel_name):
+                    page.wait_for_load_state("domcontentloaded", timeout=get_cancellation_token().timeout_ms(30000))
+                results.append((_read_cell(page, response, cell, hotel_name, run_stats, started, navigated), goto_ms))
+                continue
             except Exception as e:
-                # Pas de prix = indisponible
-                print(f"    ⚠️ {checkin_str}: Indisponible")
-                snapshot["available"] = False
-        
-        return snapshot
-        
-    except PlaywrightTimeout:
-        print(f"    ❌ {checkin_date}: Timeout")
-        return {
-            "dateCheckin": checkin_date.isoformat(),
-            "price": None,
-            "currency": "EUR",
-            "available": False,
-        }
-    except Exception as e:
-        print(f"    ❌ {checkin_date}: Erreur - {e}")
-        return None
+                error = e
+        results.append((_failed_cell(cell, error, hotel_name, run_stats, started), goto_ms))
+    return results
 
 
-def scrape_hotel_prices(hotel: Dict[str, Any]) -> List[Dict[str, Any]]:
+def scrape_hotel_prices(
+    hotel: Dict[str, Any],
+    run_stats: Optional[HotelRunStats] = None,
+    dates: Optional[List[date]] = None,
+    cells: Optional[List[GridCell]] = None,
+    scheduler: Optional[PolitenessScheduler] = None,
+    tabs: Optional[int] = None,
+    profiler: Optional[SessionProfiler] = None,
+    session: Optional[BrowserSession] = None
+) -> List[Dict[str, Any]]:
     """
-    Scrape tous les prix pour un hôtel sur 30 jours
+    Scrape tous les prix d'un hôtel sur la grille (dates x nuits x adultes)
+    
+    Les cellules sont chargées dans le même contexte navigateur; les
+    variantes d'une même arrivée s'enchaînent avec un délai court
+    (recherche affinée) et les occupations qu'un séjour déjà vu complet
+    pour moins d'adultes rend forcément complètes ne sont pas chargées
+    (SoldOutPruner). Chaque navigation
+    attend son tour auprès de l'ordonnanceur de politesse (délai de
+    l'identité, débit du domaine).
+    
+    Avec plusieurs onglets, chaque tour charge un lot de cellules dans
+    le même contexte (scrape_cells_pipelined): un délai par lot, un jeton
+    du domaine par page. L'hôtel client (isClient) a sa propre cadence
+    (SCRAPE_CLIENT_TABS).
+    
+    Les dates en échec rejouable (timeout, blocage, parsing, erreur) sont
+    remises en file et retentées après la passe complète, avec un backoff
+    croissant, jusqu'à DATE_MAX_ATTEMPTS tentatives. Le snapshot garde la
+    classe du dernier résultat (outcome).
+    
+    Après chaque lot, le chien de garde mémoire peut relancer Chromium
+    (BROWSER_MAX_RSS_MB, BROWSER_RECYCLE_PAGES, MEMORY_CEILING_MB) sans
+    changer d'identité ni interrompre l'hôtel.
+    
+    Une page de blocage déclenche un changement d'identité (nouveau contexte);
+    si le blocage persiste, l'hôtel est abandonné (run_stats.aborted) pour
+    être reprogrammé par scrape_multiple_hotels.
+    
+    Un arrêt demandé (SIGTERM, voir scrapers.cancellation) termine l'hôtel
+    après la page en cours (run_stats.cancelled): les snapshots déjà lus
+    sont renvoyés, les cellules restantes ne le sont pas.
     
     Args:
         hotel: Dict avec id, url, name
+        run_stats: Statistiques de performance à compléter (optionnel)
+        dates: Dates de check-in (défaut: horizon SCRAPE_HORIZON_DAYS)
+        cells: Cellules à scraper (défaut: grille SCRAPE_* sur ces dates)
+        scheduler: Ordonnanceur de politesse (défaut: celui du process)
+        tabs: Onglets chargés en pipeline (défaut: SCRAPE_TABS, SCRAPE_CLIENT_TABS
+            pour l'hôtel client; plafond SCRAPE_MAX_TABS)
+        profiler: Profilage de session (traces Playwright des premières pages
+            si cet hôtel est l'hôtel profilé)
+        session: Navigateur déjà lancé (préchauffé) pour cet hôtel, fermé à la fin
         
     Returns:
-        Liste de snapshots de prix
+        Liste de snapshots de prix (une ligne par cellule tentée, triée par date)
     """
     print(f"\n🏨 Scraping {hotel['name']}...")
+    if run_stats is None:
+        run_stats = HotelRunStats(hotel['id'], hotel['name'])
     
-    browser, context, page = create_stealth_browser()
-    snapshots = []
+    session = session or BrowserSession(hotel=hotel['name'])
+    scheduler = scheduler or get_politeness_scheduler()
+    cancellation = get_cancellation_token()
+    breaker = BlockCircuitBreaker()
+    results: Dict[str, Dict[str, Any]] = {}
+    pruner = SoldOutPruner()
+    pending: List[GridCell] = []
+    hotel_started = time.perf_counter()
+    first_price_seen = False
+    if tabs is None:
+        tabs = SCRAPE_CLIENT_TABS if hotel.get('isClient') else SCRAPE_TABS
+    tab_count = max(1, min(tabs, SCRAPE_MAX_TABS))
     
     try:
-        dates = get_next_30_days()
+        if session.browser is None:
+            session.start()
+        if cells is None:
+            cells = ScrapeGrid.from_config().cells(dates)
         
-        for i, checkin_date in enumerate(dates, 1):
-            print(f"  📅 Date {i}/30: {checkin_date}")
+        pending = list(cells)
+        previous_cell: Optional[GridCell] = None
+        for attempt in range(1, max(1, DATE_MAX_ATTEMPTS) + 1):
+            if not pending or run_stats.aborted or run_stats.cancelled:
+                break
+            if attempt > 1:
+                print(f"  🔁 Nouvelle tentative {attempt}/{DATE_MAX_ATTEMPTS} pour {len(pending)} date(s)")
+                run_stats.retries += len(pending)
+                inc("scrape_date_retries_total", len(pending), hotel=hotel['name'])
+                pause = outcomes.retry_backoff_seconds(attempt - 1)
+                random_delay(pause, pause, stage="retry_backoff")
+                if cancellation.cancelled:
+                    run_stats.cancelled = True
+                    break
             
-            snapshot = scrape_price_for_date(page, hotel['url'], checkin_date)
-            
-            if snapshot:
-                snapshot["hotelId"] = hotel['id']
-                snapshots.append(snapshot)
-            
-            # Délai aléatoire entre chaque requête (sauf dernière)
-            if i < len(dates):
-                random_delay(MIN_DELAY_SECONDS, MAX_DELAY_SECONDS)
+            retry_cells = []
+            i = 0
+            while i < len(pending):
+                cell = pending[i]
+                if pruner.is_sold_out(cell):
+                    # Séjour déjà vu complet pour moins d'adultes: page inutile
+                    snapshot = _empty_snapshot(cell, outcomes.SOLD_OUT)
+                    snapshot["hotelId"] = hotel['id']
+                    results[cell.key] = snapshot
+                    run_stats.record_date(cell.key, outcomes.SOLD_OUT)
+                    run_stats.pruned += 1
+                    inc("scrape_cells_pruned_total", hotel=hotel['name'])
+                    i += 1
+                    continue
+                
+                # Lot: cette cellule et les suivantes, une par onglet, tant qu'aucune
+                # ne peut être élaguée par le résultat d'une autre du lot
+                batch = _next_batch(pending, i, tab_count, pruner)
+                
+                # Délai aléatoire depuis la page précédente de l'identité (court entre
+                # variantes d'une même arrivée); les autres hôtels naviguent pendant ce temps
+                if previous_cell is not None and previous_cell.checkin == cell.checkin:
+                    gap, stage = (SCRAPE_REFINE_DELAY_MIN_SECONDS, SCRAPE_REFINE_DELAY_MAX_SECONDS), "refine_delay"
+                elif previous_cell is not None:
+                    gap, stage = (MIN_DELAY_SECONDS, MAX_DELAY_SECONDS), "delay"
+                else:
+                    gap, stage = (0, 0), "delay"
+                previous_cell = batch[-1]
+                
+                run_stats.last_goto_ms = None
+                label = ', '.join(c.key for c in batch)
+                page_trace = profiler.page(hotel, session.context, label) if profiler else nullcontext()
+                with scheduler.turn(hotel['url'], session.identity, *gap, stage=stage), page_trace:
+                    if cancellation.cancelled:
+                        # Signal reçu avant cette page (pendant le délai): elle n'est pas chargée
+                        run_stats.cancelled = True
+                        break
+                    print(f"  📅 {hotel['name']} {i + 1}/{len(pending)}: {label}")
+                    if len(batch) == 1:
+                        snapshot = scrape_price_for_date(
+                            session.page, hotel['url'], cell.checkin,
+                            hotel_name=hotel['name'], run_stats=run_stats,
+                            nights=cell.nights, adults=cell.adults
+                        )
+                        scraped = [(snapshot, run_stats.last_goto_ms)]
+                    else:
+                        tabs_used = session.tabs(len(batch))
+                        identity = session.identity
+                        # Chaque onglet supplémentaire consomme un jeton du domaine
+                        scraped = scrape_cells_pipelined(
+                            tabs_used, hotel['url'], batch,
+                            hotel_name=hotel['name'], run_stats=run_stats,
+                            before_navigation=lambda: scheduler.acquire(hotel['url'], identity)
+                        )
+                        _check_tab_memory(session, tabs_used, run_stats)
+                # Chromium relancé (même identité) si sa mémoire ou ses pages dépassent les seuils
+                session.check_memory(len(batch))
+                
+                advance = len(batch)
+                for k, (snapshot, goto_ms) in enumerate(scraped):
+                    cell = batch[k]
+                    snapshot["hotelId"] = hotel['id']
+                    results[cell.key] = snapshot
+                    pruner.record(cell, snapshot["outcome"])
+                    if snapshot["outcome"] == outcomes.SUCCESS and not first_price_seen:
+                        # Lancement + bandeau cookies + premier chargement (gain de l'état persistant)
+                        first_price_seen = True
+                        observe("scrape_stage_duration_seconds", time.perf_counter() - hotel_started,
+                                stage="first_price", hotel=hotel['name'])
+                    # Santé du proxy: latence du goto, blocage, échec réseau
+                    proxy_quarantined = session.report(snapshot["outcome"], goto_ms)
+                    
+                    action = breaker.record(snapshot["outcome"])
+                    if action == BlockCircuitBreaker.ROTATE:
+                        # Même cellule (et fin du lot) avec une nouvelle identité
+                        _rotate(session, scheduler)
+                        advance = k
+                        break
+                    if proxy_quarantined and action == BlockCircuitBreaker.CONTINUE:
+                        # Proxy muet (échecs réseau répétés): la suite passe par un autre
+                        _rotate(session, scheduler)
+                    if outcomes.is_retryable(snapshot["outcome"]):
+                        retry_cells.append(cell)
+                    if action == BlockCircuitBreaker.ABORT:
+                        print(f"⛔ {hotel['name']}: blocage persistant après {session.rotations} rotation(s), hôtel abandonné")
+                        run_stats.aborted = True
+                        inc("scrape_hotels_aborted_total", hotel=hotel['name'])
+                        # Pages du lot déjà chargées: leur résultat est gardé pour la reprise
+                        for later_cell, (later, _) in zip(batch[k + 1:], scraped[k + 1:]):
+                            later["hotelId"] = hotel['id']
+                            results[later_cell.key] = later
+                        retry_cells.extend(pending[i + k + 1:])
+                        break
+                if run_stats.aborted:
+                    break
+                i += advance
+            pending = retry_cells
         
-        print(f"✅ {hotel['name']}: {len(snapshots)} snapshots récupérés")
+        if run_stats.cancelled:
+            print(f"⏹️ {hotel['name']}: arrêt demandé, {len(cells) - len(results)} cellule(s) non scrapée(s)")
+        elif pending:
+            print(f"⚠️ {hotel['name']}: {len(pending)} date(s) sans résultat")
+        print(f"✅ {hotel['name']}: {len(results)} snapshots récupérés")
+        log_event(
+            "hotel_done",
+            hotel=hotel['name'],
+            snapshots=len(results),
+            failed=len(pending),
+            retries=run_stats.retries,
+            pruned=run_stats.pruned,
+            rotations=session.rotations,
+            aborted=run_stats.aborted,
+            cancelled=run_stats.cancelled,
+            proxy=session.proxy.label if session.proxy else None,
+            bytes=session.byte_counter.total,
+            tabs=tab_count,
+            peak_tab_heap_mb=run_stats.peak_tab_heap_mb,
+            recycles=session.recycles,
+            peak_browser_rss_mb=session.watchdog.peak_rss_mb,
+        )
         
     except Exception as e:
         print(f"❌ Erreur scraping {hotel['name']}: {e}")
+        run_stats.record_error(str(e))
     finally:
-        close_browser(browser)
+        run_stats.rotations = session.rotations
+        scheduler.forget(session.identity)
+        session.close()
+        run_stats.finish(session.byte_counter.total)
     
-    return snapshots
+    return _sorted_snapshots(results.values())
+
+
+def _next_batch(pending: List[GridCell], start: int, size: int, pruner: SoldOutPruner) -> List[GridCell]:
+    """Cellules consécutives à charger ensemble (une par onglet), à partir de pending[start]"""
+    batch = [pending[start]]
+    for cell in pending[start + 1:start + size]:
+        if pruner.is_sold_out(cell) or any(SoldOutPruner.depends_on(cell, other) for other in batch):
+            break
+        batch.append(cell)
+    return batch
+
 
+def _check_tab_memory(session: BrowserSession, pages: List[Page], run_stats: HotelRunStats):
+    """Relève le tas JS de chaque onglet et recycle ceux qui dépassent SCRAPE_TAB_MAX_HEAP_MB"""
+    for page in pages:
+        heap_mb = tab_heap_mb(page)
+        run_stats.record_tab_heap(heap_mb)
+        if SCRAPE_TAB_MAX_HEAP_MB and heap_mb is not None and heap_mb > SCRAPE_TAB_MAX_HEAP_MB:
+            print(f"♻️ Onglet à {heap_mb} Mo de tas JS, remplacé")
+            session.recycle_tab(page)
 
-def scrape_multiple_hotels(hotels: List[Dict[str, Any]]) -> Dict[str, Any]:
+
+def _rotate(session: BrowserSession, scheduler: PolitenessScheduler):
+    """Nouvelle identité: elle attend un délai complet avant sa première page"""
+    previous = session.identity
+    session.rotate()
+    scheduler.forget(previous)
+    scheduler.done(session.identity)
+
+
+def _sorted_snapshots(snapshots) -> List[Dict[str, Any]]:
+    return sorted(snapshots, key=lambda s: (s["dateCheckin"], s.get("nights") or 1, s.get("adults") or 0))
+
+
+def _scrape_hotel_run(
+    hotel: Dict[str, Any],
+    cells: List[GridCell],
+    stats: Dict[str, Any],
+    profiler: Optional[SessionProfiler] = None,
+    session: Optional[BrowserSession] = None
+) -> Tuple[HotelRunStats, List[Dict[str, Any]]]:
+    """Un passage sur un hôtel: ligne de performance + snapshots"""
+    run_stats = HotelRunStats(hotel['id'], hotel['name'])
+    snapshots = []
+    if get_cancellation_token().cancelled:
+        # Arrêt demandé: hôtel pas commencé, ni navigateur ni ligne de performance
+        run_stats.cancelled = True
+        if session is not None:
+            session.close()
+        return run_stats, snapshots
+    try:
+        with profiler.hotel(hotel) if profiler else nullcontext(), timed("hotel", hotel=hotel['name']):
+            snapshots = scrape_hotel_prices(hotel, run_stats=run_stats, cells=cells, profiler=profiler, session=session)
+    except Exception as e:
+        error_msg = f"Erreur {hotel['name']}: {str(e)}"
+        print(f"❌ {error_msg}")
+        stats["errors"].append(error_msg)
+        run_stats.record_error(error_msg)
+        run_stats.finish()
+    stats["hotel_runs"].append(run_stats.to_dict())
+    return run_stats, snapshots
+
+
+def _scrape_hotels_parallel(
+    jobs: List[Tuple[Dict[str, Any], List[GridCell]]],
+    stats: Dict[str, Any],
+    profiler: Optional[SessionProfiler] = None,
+    prewarmed: Optional[BrowserPrewarmer] = None
+) -> List[Tuple[HotelRunStats, List[Dict[str, Any]]]]:
+    """
+    Scrape les hôtels par groupes de SCRAPE_PARALLEL_HOTELS threads (un
+    navigateur Playwright par thread). L'ordonnanceur de politesse, partagé,
+    décide de chaque navigation: un hôtel en attente laisse passer les autres.
+    
+    Avec des navigateurs préchauffés, les threads sont ceux du préchauffage
+    (Playwright ne change pas de thread).
+    
+    Returns:
+        (run_stats, snapshots) de chaque hôtel, dans l'ordre de jobs
+    """
+    if prewarmed is not None:
+        print(f"🔥 {prewarmed.ready_count} navigateur(s) préchauffé(s) prêt(s)")
+        return prewarmed.run(
+            jobs, lambda hotel, cells, session: _scrape_hotel_run(hotel, cells, stats, profiler, session)
+        )
+    workers = max(1, min(SCRAPE_PARALLEL_HOTELS, len(jobs)))
+    if workers == 1:
+        return [_scrape_hotel_run(hotel, cells, stats, profiler) for hotel, cells in jobs]
+    print(f"🧵 {len(jobs)} hôtel(s), {workers} en parallèle")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hotel") as executor:
+        futures = [executor.submit(_scrape_hotel_run, hotel, cells, stats, profiler) for hotel, cells in jobs]
+        return [future.result() for future in futures]
+
+
+def _unresolved_cells(snapshots: Dict[str, Dict[str, Any]], cells: List[GridCell]) -> List[GridCell]:
+    """Cellules sans résultat définitif (à reprendre lors d'un nouveau passage)"""
+    return [
+        cell for cell in cells
+        if not outcomes.is_definitive((snapshots.get(cell.key) or {}).get("outcome", outcomes.ERROR))
+    ]
+
+
+def scrape_multiple_hotels(
+    hotels: List[Dict[str, Any]],
+    profiler: Optional[SessionProfiler] = None,
+    prewarmed: Optional[BrowserPrewarmer] = None
+) -> Dict[str, Any]:
     """
     Scrape plusieurs hôtels et retourne les statistiques
     
+    Les hôtels sont scrapés en parallèle (SCRAPE_PARALLEL_HOTELS), la
+    cadence de chaque identité et le débit vers Booking étant réglés par
+    l'ordonnanceur de politesse.
+    
+    Un hôtel abandonné pour blocage est reprogrammé en fin de session
+    (après HOTEL_RESCHEDULE_DELAY_SECONDS, au plus HOTEL_MAX_RESCHEDULES fois),
+    uniquement sur ses cellules restées sans résultat.
+    
+    Après un arrêt demandé (SIGTERM), les hôtels en cours s'arrêtent après
+    leur page, les suivants ne sont pas commencés et aucune reprise n'a
+    lieu; les snapshots déjà lus sont renvoyés (stats["cancelled"]).
+    
     Args:
         hotels: Liste d'hôtels à scraper
+        profiler: Profilage de session (un hôtel profilé, choisi ici)
+        prewarmed: Navigateurs préchauffés par le scheduler (premier passage)
         
     Returns:
-        Stats: total_hotels, total_snapshots, errors
+        Stats: total_hotels, total_snapshots, errors, cancelled, completed_hotels
     """
     stats = {
         "total_hotels": len(hotels),
         "total_snapshots": 0,
         "successful_hotels": 0,
         "failed_hotels": 0,
-        "errors": []
+        "errors": [],
+        "hotel_runs": [],
+        "cancelled": False,
+        "completed_hotels": 0
     }
     
-    all_snapshots = []
+    grid = ScrapeGrid.from_config()
+    cells = grid.cells()
+    print(f"🗓️ Grille: {grid.horizon_days} jours x {len(grid.lengths_of_stay)} durée(s) x "
+          f"{len(grid.adults)} occupation(s) = {len(cells)} cellules par hôtel")
+    # hôtel -> cellule -> snapshot (un passage reprogrammé remplace les lignes en échec)
+    results: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    aborted: List[Dict[str, Any]] = []
+    # Hôtels dont la grille a été interrompue (ou jamais commencée) par un arrêt
+    interrupted = set()
+    cancellation = get_cancellation_token()
     
-    for i, hotel in enumerate(hotels, 1):
-        print(f"\n{'='*60}")
-        print(f"Hôtel {i}/{len(hotels)}")
-        print(f"{'='*60}")
-        
-        try:
-            snapshots = scrape_hotel_prices(hotel)
-            all_snapshots.extend(snapshots)
-            stats["total_snapshots"] += len(snapshots)
-            stats["successful_hotels"] += 1
-            
-        except Exception as e:
-            error_msg = f"Erreur {hotel['name']}: {str(e)}"
-            print(f"❌ {error_msg}")
+    if profiler is not None and profiler.hotel_id is None:
+        profiler.select(hotels)
+    
+    runs = _scrape_hotels_parallel([(hotel, cells) for hotel in hotels], stats, profiler, prewarmed)
+    for hotel, (run_stats, snapshots) in zip(hotels, runs):
+        results[hotel['id']] = {snapshot_key(s): s for s in snapshots}
+        if run_stats.cancelled:
+            interrupted.add(hotel['id'])
+        elif run_stats.aborted:
+            aborted.append(hotel)
+    
+    for round_number in range(1, HOTEL_MAX_RESCHEDULES + 1):
+        if not aborted or cancellation.cancelled:
+            break
+        print(f"\n🔁 Reprise de {len(aborted)} hôtel(s) bloqué(s) dans {HOTEL_RESCHEDULE_DELAY_SECONDS}s")
+        random_delay(HOTEL_RESCHEDULE_DELAY_SECONDS, HOTEL_RESCHEDULE_DELAY_SECONDS * 1.5, stage="reschedule_pause")
+        for hotel in aborted:
+            inc("scrape_hotels_rescheduled_total", hotel=hotel['name'])
+        jobs = [(hotel, _unresolved_cells(results[hotel['id']], cells)) for hotel in aborted]
+        still_blocked = []
+        for hotel, (run_stats, snapshots) in zip(aborted, _scrape_hotels_parallel(jobs, stats, profiler)):
+            results[hotel['id']].update({snapshot_key(s): s for s in snapshots})
+            if run_stats.cancelled:
+                interrupted.add(hotel['id'])
+            elif run_stats.aborted:
+                still_blocked.append(hotel)
+        aborted = still_blocked
+    
+    all_snapshots = []
+    for hotel in hotels:
+        hotel_snapshots = results.get(hotel['id'], {})
+        all_snapshots.extend(_sorted_snapshots(hotel_snapshots.values()))
+        if hotel in aborted or not hotel_snapshots:
             stats["failed_hotels"] += 1
-            stats["errors"].append(error_msg)
-        
-        # Pause entre hôtels
-        if i < len(hotels):
-            print(f"\n⏸️ Pause avant hôtel suivant...")
-            random_delay(MIN_DELAY_SECONDS * 2, MAX_DELAY_SECONDS * 2)
+            if hotel in aborted:
+                stats["errors"].append(f"Blocage persistant: {hotel['name']}")
+        else:
+            stats["successful_hotels"] += 1
+    stats["total_snapshots"] = len(all_snapshots)
+    stats["cancelled"] = cancellation.cancelled
+    stats["completed_hotels"] = len(hotels) - len(interrupted)
     
     return stats, all_snapshots
 
@@ -0,0 +1,228 @@
+"""
+Pool de proxies pour les contextes navigateur
+
+Chaque contexte Playwright reçoit un proxy du pool. Le pool suit, par
+proxy, la latence (moyenne glissante), le taux de succès et le taux de
+blocage; il tire de préférence les proxies sains et met en quarantaine
+ceux qui se font bloquer ou ne répondent plus (durée doublée à chaque
+récidive, remise à zéro au premier succès).
+"""
+from typing import Dict, List, Optional, Any
+from urllib.parse import urlsplit, unquote
+import random
+import threading
+import time
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import (
+    PROXY_LIST,
+    PROXY_FILE,
+    PROXY_COOLDOWN_SECONDS,
+    PROXY_MAX_COOLDOWN_SECONDS,
+    PROXY_MAX_CONSECUTIVE_FAILURES,
+)
+from observability import inc, observe, log_event
+from scrapers import outcomes
+
+# Poids de la dernière mesure dans la latence moyenne glissante
+LATENCY_EWMA_ALPHA = 0.3
+# Latence (goto) à laquelle le score d'un proxy est divisé par deux
+LATENCY_REFERENCE_MS = 2000
+
+# Résultats qui mettent en cause le proxy (et non la page)
+FAILURE_OUTCOMES = {outcomes.TIMEOUT, outcomes.ERROR}
+
+
+class Proxy:
+    """Un proxy et ses statistiques de santé"""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url if "://" in url else f"http://{url}")
+        if not parts.hostname or not parts.port:
+            raise ValueError(f"Proxy invalide (attendu scheme://[user:pass@]host:port): {url}")
+        self.server = f"{parts.scheme}://{parts.hostname}:{parts.port}"
+        self.username = unquote(parts.username) if parts.username else None
+        self.password = unquote(parts.password) if parts.password else None
+        # Identifiant sans identifiants de connexion (logs, labels des métriques)
+        self.label = f"{parts.hostname}:{parts.port}"
+
+        self.requests = 0
+        self.successes = 0
+        self.blocks = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency_ms: Optional[float] = None
+        self.strikes = 0
+        self.cooldown_until = 0.0
+
+    @property
+    def success_rate(self) -> float:
+        # Lissage de Laplace: un proxy neuf vaut 0.5, ni banni ni parfait
+        return (self.successes + 1) / (self.requests + 2)
+
+    @property
+    def block_rate(self) -> float:
+        return self.blocks / (self.requests + 2)
+
+    def is_available(self, now: Optional[float] = None) -> bool:
+        return (now or time.monotonic()) >= self.cooldown_until
+
+    def score(self) -> float:
+        """Poids de tirage: succès, absence de blocage, rapidité"""
+        latency_factor = 1 + (self.latency_ms or 0) / LATENCY_REFERENCE_MS
+        return self.success_rate * (1 - self.block_rate) / latency_factor
+
+    def to_playwright(self) -> Dict[str, str]:
+        """Option proxy de browser.new_context()"""
+        proxy = {"server": self.server}
+        if self.username:
+            proxy["username"] = self.username
+        if self.password:
+            proxy["password"] = self.password
+        return proxy
+
+    def to_dict(self) -> Dict[str, Any]:
+        remaining = max(0.0, self.cooldown_until - time.monotonic())
+        return {
+            "proxy": self.label,
+            "requests": self.requests,
+            "successes": self.successes,
+            "blocks": self.blocks,
+            "failures": self.failures,
+            "latencyMs": round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            "score": round(self.score(), 3),
+            "cooldownSeconds": round(remaining),
+        }
+
+
+class ProxyPool:
+    """Proxies disponibles pour les contextes navigateur (thread-safe)"""
+
+    def __init__(
+        self,
+        urls: List[str],
+        cooldown_seconds: float = PROXY_COOLDOWN_SECONDS,
+        max_cooldown_seconds: float = PROXY_MAX_COOLDOWN_SECONDS,
+        max_consecutive_failures: int = PROXY_MAX_CONSECUTIVE_FAILURES,
+    ):
+        self.proxies = [Proxy(url) for url in dict.fromkeys(urls)]
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.max_consecutive_failures = max(1, max_consecutive_failures)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.proxies)
+
+    def acquire(self, exclude: Optional[Proxy] = None) -> Optional[Proxy]:
+        """
+        Tire un proxy hors quarantaine, pondéré par son score
+        (exclude: proxy de l'identité précédente, évité si possible)
+
+        Si tous les proxies sont en quarantaine, retourne celui qui en
+        sort le plus tôt plutôt que de repasser par l'IP du serveur.
+        """
+        if not self.proxies:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            available = [p for p in self.proxies if p.is_available(now)]
+            candidates = [p for p in available if p is not exclude] or available
+            if candidates:
+                return random.choices(candidates, weights=[p.score() for p in candidates])[0]
+            proxy = min(self.proxies, key=lambda p: p.cooldown_until)
+        inc("proxy_pool_exhausted_total")
+        print(f"⚠️ Tous les proxies sont en quarantaine, utilisation de {proxy.label}")
+        return proxy
+
+    def report(self, proxy: Proxy, outcome: str, latency_ms: Optional[float] = None) -> bool:
+        """
+        Met à jour la santé du proxy après une page
+
+        blocked: quarantaine immédiate. timeout / error: quarantaine après
+        max_consecutive_failures échecs de suite. Les autres résultats
+        (page servie, même sans prix) comptent comme un succès du proxy.
+
+        Returns:
+            True si le proxy vient d'être mis en quarantaine
+        """
+        quarantined = False
+        with self._lock:
+            proxy.requests += 1
+            if outcome == outcomes.BLOCKED:
+                proxy.blocks += 1
+                self._cool_down(proxy, "blocked")
+                quarantined = True
+            elif outcome in FAILURE_OUTCOMES:
+                proxy.failures += 1
+                proxy.consecutive_failures += 1
+                if proxy.consecutive_failures >= self.max_consecutive_failures:
+                    self._cool_down(proxy, "failures")
+                    quarantined = True
+            else:
+                proxy.successes += 1
+                proxy.consecutive_failures = 0
+                proxy.strikes = 0
+            if latency_ms is not None:
+                if proxy.latency_ms is None:
+                    proxy.latency_ms = latency_ms
+                else:
+                    proxy.latency_ms += LATENCY_EWMA_ALPHA * (latency_ms - proxy.latency_ms)
+        inc("proxy_requests_total", proxy=proxy.label, outcome=outcome)
+        if latency_ms is not None:
+            observe("proxy_latency_seconds", latency_ms / 1000, proxy=proxy.label)
+        return quarantined
+
+    def _cool_down(self, proxy: Proxy, reason: str):
+        # Appelé sous self._lock
+        duration = min(self.max_cooldown_seconds, self.cooldown_seconds * (2 ** proxy.strikes))
+        proxy.strikes += 1
+        proxy.consecutive_failures = 0
+        proxy.cooldown_until = time.monotonic() + duration
+        inc("proxy_cooldowns_total", proxy=proxy.label, reason=reason)
+        log_event("proxy_cooldown", proxy=proxy.label, reason=reason, seconds=round(duration))
+        print(f"🧊 Proxy {proxy.label} en quarantaine {int(duration)}s ({reason})")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """État de santé de chaque proxy (logs, benchmarks)"""
+        with self._lock:
+            return [p.to_dict() for p in self.proxies]
+
+
+def load_proxy_urls(proxy_list: Optional[List[str]] = None, proxy_file: Optional[str] = None) -> List[str]:
+    """URLs de PROXY_LIST puis de PROXY_FILE (une par ligne, # = commentaire)"""
+    urls = list(PROXY_LIST if proxy_list is None else proxy_list)
+    path = PROXY_FILE if proxy_file is None else proxy_file
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        urls.append(line)
+        except OSError as e:
+            print(f"❌ Erreur lecture PROXY_FILE {path}: {e}")
+    return urls
+
+
+_pool: Optional[ProxyPool] = None
+_pool_loaded = False
+_pool_lock = threading.Lock()
+
+
+def get_proxy_pool() -> Optional[ProxyPool]:
+    """
+    Pool partagé par le process (la santé des proxies survit d'une session
+    à l'autre du scheduler). None si aucun proxy n'est configuré.
+    """
+    global _pool, _pool_loaded
+    with _pool_lock:
+        if not _pool_loaded:
+            urls = load_proxy_urls()
+            _pool = ProxyPool(urls) if urls else None
+            _pool_loaded = True
+            if _pool is not None:
+                print(f"🌐 Pool de {len(_pool)} proxy(s) chargé")
+        return _pool
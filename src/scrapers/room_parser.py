@@ -0,0 +1,140 @@
+"""
+Extraction du tableau des chambres en une passe sur le HTML déjà chargé
+
+Un seul aller-retour vers le navigateur (page.content()), puis parsing
+lxml: une ligne par chambre x offre (remboursable, petit-déjeuner, prix
+barré, devise, taxes), et le prix minimum de la page pour rate_snapshots.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import sys
+import os
+
+from bs4 import BeautifulSoup
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scrapers import outcomes
+from scrapers.price_parser import DEFAULT_CURRENCY, ParsedPrice, parse_price
+
+ROOM_ROW_SELECTOR = "tr.js-rt-block-row"
+ROOM_NAME_SELECTOR = ".hprt-roomtype-icon-link"
+CONDITIONS_SELECTOR = ".hprt-table-cell-conditions li"
+# Mention sous le prix: "Taxes et frais compris" / "+12 € de taxes et frais"
+TAXES_SELECTOR = ".prd-taxes-and-fees-under-price"
+# Prix affiché (remisé si promotion), puis ancien sélecteur de repli
+PRICE_SELECTORS = ('[data-testid="price-and-discounted-price"]', ".prco-valign-middle-helper")
+# Prix barré quand une remise est affichée
+ORIGINAL_PRICE_SELECTORS = (".bui-price-display__original", ".prco-valign-middle-helper")
+
+REFUNDABLE_MARKERS = ("annulation gratuite", "free cancellation")
+NON_REFUNDABLE_MARKERS = ("non remboursable", "non-refundable", "non refundable")
+BREAKFAST_MARKERS = ("petit-déjeuner compris", "petit-déjeuner inclus", "breakfast included")
+
+def _text(element) -> str:
+    return element.get_text(" ", strip=True) if element is not None else ""
+
+
+def _first(element, selectors) -> Tuple[Optional[Any], Optional[str]]:
+    """Premier élément trouvé et le sélecteur qui l'a trouvé"""
+    for selector in selectors:
+        found = element.select_one(selector)
+        if found is not None:
+            return found, selector
+    return None, None
+
+
+def _refundable(conditions: List[str]) -> Optional[bool]:
+    text = " ".join(conditions).lower()
+    if any(marker in text for marker in NON_REFUNDABLE_MARKERS):
+        return False
+    if any(marker in text for marker in REFUNDABLE_MARKERS):
+        return True
+    return None
+
+
+def parse_room_rows(table) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Lignes chambre x offre du tableau #hprt-table
+
+    Sur Booking le nom de la chambre n'est affiché que sur la première
+    offre (rowspan): il est reporté sur les lignes suivantes.
+
+    Returns:
+        (lignes, True si un prix était présent mais illisible)
+    """
+    rooms = []
+    found_unparsed = False
+    room_name = None
+    for position, row in enumerate(table.select(ROOM_ROW_SELECTOR)):
+        name = _text(row.select_one(ROOM_NAME_SELECTOR))
+        room_name = name or room_name
+
+        price_element, selector = _first(row, PRICE_SELECTORS)
+        taxes_text = _text(row.select_one(TAXES_SELECTOR))
+        parsed: Optional[ParsedPrice] = None
+        if price_element is not None:
+            parsed = parse_price(_text(price_element), taxes_text)
+            found_unparsed = found_unparsed or parsed is None
+        price = parsed.amount if parsed else None
+
+        original_price = None
+        for original_selector in ORIGINAL_PRICE_SELECTORS:
+            if original_selector == selector:
+                continue
+            original = parse_price(_text(row.select_one(original_selector)))
+            if original is not None and price is not None and original.amount > price:
+                original_price = original.amount
+                break
+
+        conditions = [_text(li) for li in row.select(CONDITIONS_SELECTOR)]
+        lowered = " ".join(conditions).lower()
+        rooms.append({
+            "roomName": room_name,
+            "ratePlan": " · ".join(conditions) or None,
+            "price": price,
+            "originalPrice": original_price,
+            "currency": (parsed.currency if parsed else None) or DEFAULT_CURRENCY,
+            "taxesIncluded": parsed.taxes_included if parsed else None,
+            "refundable": _refundable(conditions),
+            "breakfastIncluded": any(marker in lowered for marker in BREAKFAST_MARKERS),
+            "position": position,
+        })
+    return rooms, found_unparsed
+
+
+def parse_price_page(html: str) -> Dict[str, Any]:
+    """
+    Analyse une page hôtel datée
+
+    Returns:
+        Dict avec price (minimum des chambres, sinon premier prix de la
+        page), currency, found_unparsed, rooms, has_room_table, sold_out_notice
+    """
+    soup = BeautifulSoup(html, "lxml")
+    table = soup.select_one(outcomes.ROOM_TABLE_SELECTOR)
+
+    rooms, found_unparsed = parse_room_rows(table) if table is not None else ([], False)
+    priced = [room for room in rooms if room["price"] is not None]
+    cheapest = min(priced, key=lambda room: room["price"]) if priced else None
+    price = cheapest["price"] if cheapest else None
+    currency = cheapest["currency"] if cheapest else DEFAULT_CURRENCY
+
+    if price is None and not rooms:
+        # Mise en page sans tableau: premier prix lisible de la page
+        for selector in PRICE_SELECTORS:
+            element = soup.select_one(selector)
+            if element is None:
+                continue
+            parsed = parse_price(_text(element))
+            if parsed is not None:
+                price, currency = parsed.amount, parsed.currency or DEFAULT_CURRENCY
+                break
+            found_unparsed = True
+
+    return {
+        "price": price,
+        "currency": currency,
+        "found_unparsed": found_unparsed,
+        "rooms": rooms,
+        "has_room_table": table is not None,
+        "sold_out_notice": any(soup.select_one(s) is not None for s in outcomes.SOLD_OUT_SELECTORS),
+    }
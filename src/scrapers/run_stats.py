@@ -0,0 +1,103 @@
+"""
+Statistiques de performance d'un hôtel pendant une session
+Sérialisées en lignes enfants de scraper_logs (table scraper_hotel_logs)
+"""
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+
+
+class HotelRunStats:
+    """Compteurs et durées collectés pendant le scraping d'un hôtel"""
+
+    def __init__(self, hotel_id: str, hotel_name: str):
+        self.hotel_id = hotel_id
+        self.hotel_name = hotel_name
+        self.started_at = datetime.now()
+        self.completed_at: Optional[datetime] = None
+        self.pages_loaded = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.retries = 0
+        self.pruned = 0
+        self.rotations = 0
+        self.aborted = False
+        # Arrêté par un signal (SIGTERM) avant la fin de sa grille, non sérialisé
+        self.cancelled = False
+        self.bytes_transferred = 0
+        # Durée du dernier page.goto (santé du proxy), non sérialisée
+        self.last_goto_ms: Optional[float] = None
+        # Plus gros tas JS vu sur un onglet (Mo, onglets multiples), non sérialisé
+        self.peak_tab_heap_mb: Optional[float] = None
+        self.unavailable_dates: List[str] = []
+        self.failed_dates: List[str] = []
+        self.date_timings: Dict[str, int] = {}
+        self.error_messages: List[str] = []
+
+    def record_page(self, goto_ms: Optional[float] = None):
+        self.pages_loaded += 1
+        self.last_goto_ms = goto_ms
+
+    def record_tab_heap(self, heap_mb: Optional[float]):
+        if heap_mb is not None:
+            self.peak_tab_heap_mb = max(self.peak_tab_heap_mb or 0, heap_mb)
+
+    def record_date(self, checkin: str, outcome: str, duration_ms: Optional[float] = None):
+        """
+        Enregistre le résultat d'une tentative sur une date
+
+        Une date retentée n'apparaît qu'une fois dans les listes, avec le
+        résultat de sa dernière tentative; timeouts et errors comptent
+        toutes les tentatives.
+
+        Args:
+            checkin: Date au format YYYY-MM-DD
+            outcome: success, sold_out, timeout, blocked, parse_error ou error
+            duration_ms: Durée de la page (goto -> extraction)
+        """
+        if duration_ms is not None:
+            self.date_timings[checkin] = int(duration_ms)
+        for dates in (self.unavailable_dates, self.failed_dates):
+            if checkin in dates:
+                dates.remove(checkin)
+        if outcome == "sold_out":
+            self.unavailable_dates.append(checkin)
+        elif outcome == "timeout":
+            self.timeouts += 1
+            self.failed_dates.append(checkin)
+        elif outcome != "success":
+            self.errors += 1
+            self.failed_dates.append(checkin)
+
+    def record_error(self, message: str):
+        self.error_messages.append(message)
+
+    def finish(self, bytes_transferred: int = 0):
+        self.completed_at = datetime.now()
+        self.bytes_transferred = bytes_transferred
+
+    @property
+    def duration_ms(self) -> int:
+        end = self.completed_at or datetime.now()
+        return int((end - self.started_at).total_seconds() * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Ligne scraper_hotel_logs (sans id ni logId)"""
+        return {
+            "hotelId": self.hotel_id,
+            "startedAt": self.started_at.isoformat(),
+            "completedAt": (self.completed_at or datetime.now()).isoformat(),
+            "durationMs": self.duration_ms,
+            "pagesLoaded": self.pages_loaded,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "retries": self.retries,
+            "rotations": self.rotations,
+            "aborted": self.aborted,
+            "cellsPruned": self.pruned,
+            "bytesTransferred": self.bytes_transferred,
+            "unavailableDates": self.unavailable_dates,
+            "failedDates": self.failed_dates,
+            "dateTimings": self.date_timings,
+            "errorMessages": self.error_messages,
+        }
+
@@ -0,0 +1,138 @@
+"""
+Grille de scraping: horizon, durées de séjour (LOS) et occupations
+
+Une cellule = (date d'arrivée, nuits, adultes) = un chargement de page.
+Les variantes d'une même arrivée se suivent (nuits puis adultes
+croissants), les occupations d'un même séjour par nombre d'adultes
+croissant: un séjour complet pour n adultes l'est aussi, sans charger la
+page, pour plus d'adultes. Rien n'est déduit d'un séjour à l'autre: une
+nuit sans disponibilité peut n'être qu'une durée minimale ou une
+fermeture à l'arrivée (week-ends), que les séjours plus longs respectent.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SCRAPE_HORIZON_DAYS, SCRAPE_LENGTHS_OF_STAY, SCRAPE_ADULTS
+from scrapers import outcomes
+
+# Séjour de référence (occupation par défaut de Booking): historique,
+# alertes et anciens snapshots (nights/adults NULL) s'y rapportent
+REFERENCE_NIGHTS = 1
+REFERENCE_ADULTS = 2
+
+
+@dataclass(frozen=True)
+class GridCell:
+    """Une recherche Booking: arrivée, nombre de nuits, nombre d'adultes"""
+
+    checkin: date
+    nights: int = REFERENCE_NIGHTS
+    adults: int = REFERENCE_ADULTS
+
+    @property
+    def checkout(self) -> date:
+        return self.checkin + timedelta(days=self.nights)
+
+    @property
+    def stay_nights(self) -> List[date]:
+        """Nuits couvertes par le séjour"""
+        return [self.checkin + timedelta(days=i) for i in range(self.nights)]
+
+    @property
+    def is_reference(self) -> bool:
+        return self.nights == REFERENCE_NIGHTS and self.adults == REFERENCE_ADULTS
+
+    @property
+    def key(self) -> str:
+        """Libellé (logs, run_stats): la date seule pour le séjour de référence"""
+        if self.is_reference:
+            return self.checkin.isoformat()
+        return f"{self.checkin.isoformat()}+{self.nights}n{self.adults}a"
+
+
+def is_reference_snapshot(snapshot: Dict) -> bool:
+    """True pour le séjour de référence (NULL = snapshot d'avant la grille)"""
+    return (snapshot.get("nights") or REFERENCE_NIGHTS) == REFERENCE_NIGHTS \
+        and (snapshot.get("adults") or REFERENCE_ADULTS) == REFERENCE_ADULTS
+
+
+def snapshot_key(snapshot: Dict) -> str:
+    """Clé de cellule d'un snapshot (même format que GridCell.key)"""
+    return GridCell(
+        date.fromisoformat(snapshot["dateCheckin"]),
+        snapshot.get("nights") or REFERENCE_NIGHTS,
+        snapshot.get("adults") or REFERENCE_ADULTS,
+    ).key
+
+
+@dataclass(frozen=True)
+class ScrapeGrid:
+    """Spécification de la grille (lue depuis SCRAPE_* par défaut)"""
+
+    horizon_days: int = 30
+    lengths_of_stay: Tuple[int, ...] = (REFERENCE_NIGHTS,)
+    adults: Tuple[int, ...] = (REFERENCE_ADULTS,)
+
+    @classmethod
+    def from_config(cls) -> "ScrapeGrid":
+        return cls(
+            horizon_days=SCRAPE_HORIZON_DAYS,
+            lengths_of_stay=tuple(sorted(set(SCRAPE_LENGTHS_OF_STAY))),
+            adults=tuple(sorted(set(SCRAPE_ADULTS))),
+        )
+
+    def dates(self, start: Optional[date] = None) -> List[date]:
+        """Dates d'arrivée de l'horizon (à partir de demain)"""
+        start = start or date.today()
+        return [start + timedelta(days=i) for i in range(1, self.horizon_days + 1)]
+
+    def cells(self, dates: Optional[List[date]] = None) -> List[GridCell]:
+        """
+        Cellules dans l'ordre de scraping: date, puis nuits croissantes,
+        puis adultes croissants (les variantes d'une même arrivée se suivent)
+        """
+        dates = self.dates() if dates is None else dates
+        return [
+            GridCell(checkin, nights, adults)
+            for checkin in dates
+            for nights in sorted(self.lengths_of_stay)
+            for adults in sorted(self.adults)
+        ]
+
+    @property
+    def size(self) -> int:
+        return self.horizon_days * len(self.lengths_of_stay) * len(self.adults)
+
+
+class SoldOutPruner:
+    """
+    Déduit les cellules complètes des séjours déjà vus complets
+
+    Un séjour (arrivée, nuits) complet pour n adultes l'est pour toute
+    occupation >= n (moins de chambres assez grandes). Un autre séjour,
+    même s'il couvre les mêmes nuits, est toujours chargé: ses règles de
+    durée minimale ou d'arrivée peuvent différer.
+    """
+
+    def __init__(self):
+        # (arrivée, nuits) -> plus petite occupation vue complète
+        self._sold_out: Dict[Tuple[date, int], int] = {}
+
+    def record(self, cell: GridCell, outcome: Optional[str]):
+        if outcome == outcomes.SOLD_OUT:
+            stay = (cell.checkin, cell.nights)
+            self._sold_out[stay] = min(cell.adults, self._sold_out.get(stay, cell.adults))
+
+    @staticmethod
+    def depends_on(cell: GridCell, other: GridCell) -> bool:
+        """True si un résultat complet sur other rendrait cell inutile"""
+        return other.checkin == cell.checkin and other.nights == cell.nights and other.adults <= cell.adults
+
+    def is_sold_out(self, cell: GridCell) -> bool:
+        """True si la cellule est forcément complète (page inutile)"""
+        adults = self._sold_out.get((cell.checkin, cell.nights))
+        return adults is not None and adults <= cell.adults
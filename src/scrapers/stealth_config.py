@@ -2,17 +2,55 @@
 Configuration Playwright avec mode stealth pour éviter la détection
 """
 from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page
+from typing import Any, Dict, List, Optional, Union
 import random
+import uuid
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import USER_AGENTS, HEADLESS_MODE
+from config import USER_AGENTS, HEADLESS_MODE, BROWSER_STATE_ENABLED, SCRAPE_MAX_TABS
+from observability import timed, inc
+from scrapers.proxy_pool import Proxy, ProxyPool, get_proxy_pool
+from scrapers.browser_state import BrowserStateStore
+from scrapers.memory_watchdog import MemoryWatchdog, driver_pid
+from scrapers import outcomes
+from scrapers.cancellation import get_cancellation_token
 
 
-def get_random_user_agent() -> str:
-    """Retourne un User-Agent aléatoire"""
-    return random.choice(USER_AGENTS)
+def get_random_user_agent(exclude: Optional[str] = None, prefer: Optional[List[str]] = None) -> str:
+    """
+    Retourne un User-Agent aléatoire (différent de exclude si possible),
+    pris dans prefer quand l'un d'eux convient (identité déjà connue)
+    """
+    choices = [ua for ua in USER_AGENTS if ua != exclude] or USER_AGENTS
+    preferred = [ua for ua in choices if ua in (prefer or [])]
+    return random.choice(preferred or choices)
+
+
+STEALTH_INIT_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+    
+    Object.defineProperty(navigator, 'plugins', {
+        get: () => [1, 2, 3, 4, 5]
+    });
+    
+    Object.defineProperty(navigator, 'languages', {
+        get: () => ['fr-FR', 'fr', 'en-US', 'en']
+    });
+    
+    window.chrome = {
+        runtime: {}
+    };
+    
+    Object.defineProperty(navigator, 'permissions', {
+        get: () => ({
+            query: () => Promise.resolve({ state: 'granted' })
+        })
+    });
+"""
 
 
 def create_stealth_browser() -> tuple[Browser, BrowserContext, Page]:
@@ -20,11 +58,17 @@ def create_stealth_browser() -> tuple[Browser, BrowserContext, Page]:
     Crée un navigateur Playwright en mode stealth
     Returns: (browser, context, page)
     """
-    playwright = sync_playwright().start()
-    
+    with timed("browser_launch"):
+        return _launch_stealth_browser()
+
+
+def _launch_browser(playwright, per_context_proxy: bool = False) -> Browser:
+    # Chromium sous Windows exige un proxy global pour accepter un proxy par contexte
+    launch_options = {"proxy": {"server": "http://per-context"}} if per_context_proxy else {}
     # Lancer Chrome en mode stealth
-    browser = playwright.chromium.launch(
+    return playwright.chromium.launch(
         headless=HEADLESS_MODE,
+        **launch_options,
         args=[
             '--disable-blink-features=AutomationControlled',
             '--disable-dev-shm-usage',
@@ -34,10 +78,23 @@ def create_stealth_browser() -> tuple[Browser, BrowserContext, Page]:
             '--disable-features=IsolateOrigins,site-per-process',
         ]
     )
-    
-    # Créer contexte avec User-Agent aléatoire
+
+
+def _new_context(
+    browser: Browser,
+    user_agent: str,
+    proxy: Optional[Proxy] = None,
+    storage_state: Optional[Union[str, Dict[str, Any]]] = None
+) -> BrowserContext:
+    # Créer contexte avec le User-Agent (proxy, cookies sauvegardés) donnés
+    options = {}
+    if proxy:
+        options["proxy"] = proxy.to_playwright()
+    if storage_state:
+        options["storage_state"] = storage_state
     context = browser.new_context(
-        user_agent=get_random_user_agent(),
+        user_agent=user_agent,
+        **options,
         viewport={'width': 1920, 'height': 1080},
         locale='fr-FR',
         timezone_id='Europe/Paris',
@@ -48,36 +105,268 @@ def create_stealth_browser() -> tuple[Browser, BrowserContext, Page]:
     )
     
     # Masquer les propriétés Webdriver
-    context.add_init_script("""
-        Object.defineProperty(navigator, 'webdriver', {
-            get: () => undefined
-        });
-        
-        Object.defineProperty(navigator, 'plugins', {
-            get: () => [1, 2, 3, 4, 5]
-        });
-        
-        Object.defineProperty(navigator, 'languages', {
-            get: () => ['fr-FR', 'fr', 'en-US', 'en']
-        });
-        
-        window.chrome = {
-            runtime: {}
-        };
-        
-        Object.defineProperty(navigator, 'permissions', {
-            get: () => ({
-                query: () => Promise.resolve({ state: 'granted' })
-            })
-        });
-    """)
-    
+    context.add_init_script(STEALTH_INIT_SCRIPT)
+    return context
+
+
+def _launch_stealth_browser() -> tuple[Browser, BrowserContext, Page]:
+    playwright = sync_playwright().start()
+    browser = _launch_browser(playwright)
+    context = _new_context(browser, get_random_user_agent())
     page = context.new_page()
     
     print(f"✅ Navigateur stealth créé (headless={HEADLESS_MODE})")
     return browser, context, page
 
 
+class BrowserSession:
+    """
+    Navigateur stealth + identité courante (contexte: UA, cookies, proxy)
+
+    rotate() remplace le contexte sans relancer Chromium: nouvel UA,
+    autre proxy du pool. Le compteur d'octets est conservé entre rotations.
+    Sans pool configuré, le navigateur sort par l'IP du serveur.
+
+    Les cookies de chaque identité (UA + proxy) sont sauvegardés à la
+    fermeture du contexte et rechargés quand l'identité est reprise; ceux
+    d'une identité qui vient d'être bloquée sont jetés.
+
+    tabs(n) ouvre des onglets supplémentaires dans le même contexte (même
+    visiteur), au plus SCRAPE_MAX_TABS; ils sont fermés avec le contexte.
+
+    check_memory() relance Chromium quand le chien de garde mémoire le
+    demande (RSS, pages chargées): même identité, cookies conservés.
+    """
+
+    def __init__(
+        self,
+        proxy_pool: Optional[ProxyPool] = None,
+        state_store: Optional[BrowserStateStore] = None,
+        **labels
+    ):
+        self.labels = labels
+        self.proxy_pool = proxy_pool if proxy_pool is not None else get_proxy_pool()
+        if state_store is None and BROWSER_STATE_ENABLED:
+            state_store = BrowserStateStore()
+        self.state_store = state_store
+        self.state_reused = False
+        self.blocked = False
+        self.playwright = None
+        self.browser: Optional[Browser] = None
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        # Onglets du contexte courant (le premier est self.page)
+        self._tabs: List[Page] = []
+        self.user_agent: Optional[str] = None
+        self.proxy: Optional[Proxy] = None
+        # Identifiant du contexte courant (un visiteur) pour l'ordonnanceur de politesse
+        self.identity: Optional[str] = None
+        self.rotations = 0
+        self.recycles = 0
+        self.byte_counter = ByteCounter()
+        self.watchdog = MemoryWatchdog()
+
+    def start(self) -> "BrowserSession":
+        with timed("browser_launch"):
+            self.playwright = sync_playwright().start()
+            self.browser = _launch_browser(self.playwright, per_context_proxy=bool(self.proxy_pool))
+            self._open_context()
+        self.watchdog.attach(driver_pid(self.playwright))
+        print(f"✅ Navigateur stealth créé (headless={HEADLESS_MODE})")
+        return self
+
+    def _open_context(self, previous_user_agent: Optional[str] = None, previous_proxy: Optional[Proxy] = None):
+        if self.proxy_pool:
+            self.proxy = self.proxy_pool.acquire(exclude=previous_proxy)
+            print(f"🌐 Proxy: {self.proxy.label}")
+        proxy_label = self.proxy.label if self.proxy else None
+        
+        # Reprendre de préférence une identité connue derrière ce proxy
+        state_path = None
+        known = self.state_store.user_agents_with_state(proxy_label) if self.state_store else []
+        self.user_agent = get_random_user_agent(exclude=previous_user_agent, prefer=known)
+        if self.state_store:
+            state_path = self.state_store.load(self.user_agent, proxy_label)
+        self.state_reused = state_path is not None
+        self.blocked = False
+        if self.state_reused:
+            inc("browser_state_reused_total", **self.labels)
+        
+        self.identity = uuid.uuid4().hex[:12]
+        self._attach_context(state_path)
+
+    def _attach_context(self, storage_state: Optional[Union[str, Dict[str, Any]]] = None):
+        self.context = _new_context(self.browser, self.user_agent, self.proxy, storage_state)
+        self.page = self._new_tab()
+        self._tabs = [self.page]
+
+    def _new_tab(self) -> Page:
+        page = self.context.new_page()
+        attach_byte_counter(page, counter=self.byte_counter, **self.labels)
+        return page
+
+    def tabs(self, count: int) -> List[Page]:
+        """Les `count` premiers onglets du contexte (ouverts au besoin, plafond SCRAPE_MAX_TABS)"""
+        count = max(1, min(count, SCRAPE_MAX_TABS))
+        while len(self._tabs) < count:
+            self._tabs.append(self._new_tab())
+            inc("browser_tabs_opened_total", **self.labels)
+        return self._tabs[:count]
+
+    def recycle_tab(self, page: Page) -> Page:
+        """Ferme un onglet (mémoire) et le remplace par un onglet neuf au même rang"""
+        index = self._tabs.index(page)
+        try:
+            page.close()
+        except Exception as e:
+            print(f"⚠️ Erreur fermeture onglet: {e}")
+        self._tabs[index] = self._new_tab()
+        if index == 0:
+            self.page = self._tabs[0]
+        inc("browser_tabs_recycled_total", **self.labels)
+        return self._tabs[index]
+
+    def _close_context(self):
+        if self.context is not None and self.state_store:
+            proxy_label = self.proxy.label if self.proxy else None
+            if self.blocked:
+                self.state_store.discard(self.user_agent, proxy_label)
+            else:
+                self.state_store.save(self.context, self.user_agent, proxy_label)
+        if self.context is not None:
+            try:
+                self.context.close()
+            except Exception as e:
+                print(f"⚠️ Erreur fermeture contexte: {e}")
+        self.context = None
+        self.page = None
+        self._tabs = []
+
+    def report(self, outcome: str, latency_ms: Optional[float] = None) -> bool:
+        """
+        Transmet le résultat d'une page au pool (santé du proxy courant)
+        Returns: True si le proxy courant vient d'être mis en quarantaine
+        """
+        # L'identité n'est sauvegardée que si sa dernière page n'était pas un blocage
+        self.blocked = outcome == outcomes.BLOCKED
+        if self.proxy_pool and self.proxy is not None:
+            return self.proxy_pool.report(self.proxy, outcome, latency_ms)
+        return False
+
+    def rotate(self):
+        """Change d'identité: nouveau contexte (UA différent, autre proxy, cookies propres à cette identité)"""
+        previous_user_agent, previous_proxy = self.user_agent, self.proxy
+        with timed("context_rotate", **self.labels):
+            self._close_context()
+            self._open_context(previous_user_agent=previous_user_agent, previous_proxy=previous_proxy)
+        self.rotations += 1
+        inc("browser_rotations_total", **self.labels)
+        print("🔄 Nouvelle identité navigateur (contexte renouvelé)")
+
+    def recycle(self, reason: str):
+        """Relance Chromium (mémoire) en gardant l'identité: même UA, même proxy, mêmes cookies"""
+        rss = self.watchdog.last_rss_mb
+        with timed("browser_recycle", **self.labels):
+            try:
+                state = self.context.storage_state()
+            except Exception as e:
+                print(f"⚠️ Erreur lecture état navigateur: {e}")
+                state = None
+            self._close_context()
+            close_browser(self.browser)
+            self.browser = _launch_browser(self.playwright, per_context_proxy=bool(self.proxy_pool))
+            self._attach_context(state)
+        self.watchdog.attach(driver_pid(self.playwright))
+        self.recycles += 1
+        inc("browser_recycles_total", reason=reason, **self.labels)
+        print(f"♻️ Navigateur relancé ({reason}, {rss:.0f} Mo)" if rss is not None else f"♻️ Navigateur relancé ({reason})")
+
+    def check_memory(self, pages: int = 0) -> Optional[str]:
+        """
+        À appeler après des pages chargées: relance le navigateur si la RSS
+        ou le nombre de pages dépasse les seuils du chien de garde
+
+        Returns:
+            Raison du recyclage, None si le navigateur est gardé
+        """
+        reason = self.watchdog.check(pages)
+        if reason:
+            self.recycle(reason)
+        return reason
+
+    def close(self):
+        """Ferme contexte, navigateur et driver Playwright"""
+        self.watchdog.detach()
+        self._close_context()
+        if self.browser is not None:
+            close_browser(self.browser)
+            self.browser = None
+        if self.playwright is not None:
+            try:
+                self.playwright.stop()
+            except Exception as e:
+                print(f"⚠️ Erreur arrêt Playwright: {e}")
+            self.playwright = None
+
+    def __enter__(self) -> "BrowserSession":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ByteCounter:
+    """
+    Compte les octets reçus par une page (en-têtes + corps tels que
+    transférés, d'après Request.sizes() une fois la requête terminée:
+    Content-Length manque sur les réponses chunked ou compressées)
+    """
+    
+    def __init__(self):
+        self.total = 0
+        self.responses = 0
+    
+    def on_request_finished(self, request):
+        try:
+            sizes = request.sizes()
+            received = sizes["responseHeadersSize"] + sizes["responseBodySize"]
+        except Exception:
+            # Tailles indisponibles: corps décodé de la réponse
+            try:
+                response = request.response()
+                received = len(response.body()) if response else 0
+            except Exception:
+                return
+        self.total += max(0, received)
+        self.responses += 1
+
+
+def attach_byte_counter(page: Page, counter: Optional[ByteCounter] = None, **labels) -> ByteCounter:
+    """
+    Branche un compteur d'octets sur la page (nouveau ou existant)
+    Les octets sont aussi ajoutés à la métrique scrape_bytes_total
+    """
+    counter = counter or ByteCounter()
+    
+    def handler(request):
+        before = counter.total
+        counter.on_request_finished(request)
+        if counter.total > before:
+            inc("scrape_bytes_total", counter.total - before, **labels)
+    
+    page.on("requestfinished", handler)
+    return counter
+
+
+def tab_heap_mb(page: Page) -> Optional[float]:
+    """Tas JavaScript utilisé par l'onglet (Mo), None si le navigateur ne l'expose pas"""
+    try:
+        used = page.evaluate("() => performance.memory ? performance.memory.usedJSHeapSize : null")
+    except Exception:
+        return None
+    return round(used / (1024 * 1024), 1) if used else None
+
+
 def close_browser(browser: Browser):
     """Ferme proprement le navigateur"""
     try:
@@ -87,8 +376,8 @@ def close_browser(browser: Browser):
         print(f"⚠️ Erreur fermeture navigateur: {e}")
 
 
-def random_delay(min_seconds: int = 2, max_seconds: int = 5):
-    """Attend un délai aléatoire (simulation comportement humain)"""
-    import time
+def random_delay(min_seconds: int = 2, max_seconds: int = 5, stage: str = "delay"):
+    """Attend un délai aléatoire (simulation comportement humain), écourté par un arrêt demandé"""
     delay = random.uniform(min_seconds, max_seconds)
-    time.sleep(delay)
+    with timed(stage):
+        get_cancellation_token().sleep(delay)
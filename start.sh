@@ -4,8 +4,29 @@ echo "[start] Démarrage..."
 echo "[start] PORT=${PORT:-non défini}"
 echo "[start] SUPABASE_URL: $(test -n "$SUPABASE_URL" && echo 'défini' || echo 'MANQUANT')"
 echo "[start] SUPABASE_SERVICE_KEY: $(test -n "$SUPABASE_SERVICE_KEY" && echo 'défini' || echo 'MANQUANT')"
-# Lancer l'API en premier plan pour voir ses logs / crash ; scheduler en arrière-plan
+# Le shell reste PID 1: il transmet SIGTERM/SIGINT au scheduler (arrêt propre de la session) et à l'API
 echo "[start] Lancement Scheduler (background)..."
 python src/scheduler/cron_jobs.py &
-echo "[start] Lancement API (foreground)..."
-exec python -u src/api/server.py 2>&1
+SCHED=$!
+echo "[start] Lancement API..."
+python -u src/api/server.py 2>&1 &
+API=$!
+
+shutdown() {
+    echo "[start] $1 reçu: arrêt du scheduler (session enregistrée) et de l'API..."
+    kill -"$1" "$SCHED" "$API" 2>/dev/null || true
+    wait "$SCHED" || true
+    wait "$API" || true
+    exit 0
+}
+trap 'shutdown TERM' TERM
+trap 'shutdown INT' INT
+
+# L'API s'arrête seule (crash): on arrête aussi le scheduler, le code de sortie déclenche le redémarrage
+set +e
+wait "$API"
+STATUS=$?
+echo "[start] API arrêtée (code $STATUS), arrêt du scheduler..."
+kill -TERM "$SCHED" 2>/dev/null
+wait "$SCHED"
+exit "$STATUS"
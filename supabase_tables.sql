@@ -5,6 +5,8 @@
 
 -- Supprimer les tables existantes si nécessaire (ATTENTION: perte de données)
 -- DROP TABLE IF EXISTS scraper_logs;
+-- DROP TABLE IF EXISTS rate_curves;
+-- DROP TABLE IF EXISTS rate_snapshot_rooms;
 -- DROP TABLE IF EXISTS rate_snapshots;
 -- DROP TABLE IF EXISTS hotels;
 
@@ -46,9 +48,17 @@ CREATE TABLE IF NOT EXISTS rate_snapshots (
   price FLOAT8 CHECK (price IS NULL OR price >= 0),
   currency TEXT DEFAULT 'EUR',
   available BOOLEAN DEFAULT TRUE,
+  outcome TEXT,
+  nights INTEGER DEFAULT 1 CHECK (nights > 0),
+  adults INTEGER DEFAULT 2 CHECK (adults > 0),
   "scrapedAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Migration des bases existantes
+ALTER TABLE rate_snapshots ADD COLUMN IF NOT EXISTS outcome TEXT;
+ALTER TABLE rate_snapshots ADD COLUMN IF NOT EXISTS nights INTEGER DEFAULT 1;
+ALTER TABLE rate_snapshots ADD COLUMN IF NOT EXISTS adults INTEGER DEFAULT 2;
+
 -- Index pour performances
 CREATE INDEX IF NOT EXISTS idx_rate_snapshots_hotel ON rate_snapshots("hotelId");
 CREATE INDEX IF NOT EXISTS idx_rate_snapshots_date ON rate_snapshots("dateCheckin");
@@ -56,9 +66,79 @@ CREATE INDEX IF NOT EXISTS idx_rate_snapshots_hotel_date ON rate_snapshots("hote
 CREATE INDEX IF NOT EXISTS idx_rate_snapshots_scraped ON rate_snapshots("scrapedAt");
 
 -- Commentaires
-COMMENT ON TABLE rate_snapshots IS 'Historique des prix scrapés (30 jours futurs)';
-COMMENT ON COLUMN rate_snapshots.price IS 'Prix minimum de la nuit, NULL si indisponible';
+COMMENT ON TABLE rate_snapshots IS 'Historique des prix scrapés (grille dates x nuits x adultes)';
+COMMENT ON COLUMN rate_snapshots.price IS 'Prix minimum affiché pour le séjour (nights nuits), NULL si indisponible';
 COMMENT ON COLUMN rate_snapshots.available IS 'false si hôtel complet pour cette date';
+COMMENT ON COLUMN rate_snapshots.outcome IS 'success, sold_out, timeout, blocked, parse_error ou error (NULL: avant classification)';
+COMMENT ON COLUMN rate_snapshots.nights IS 'Durée du séjour recherché (1 = séjour de référence)';
+COMMENT ON COLUMN rate_snapshots.adults IS 'Adultes dans la chambre (2 = occupation par défaut de Booking)';
+
+-- ============================================
+-- TABLE: rate_snapshot_rooms
+-- Offres du tableau des chambres (chambre x conditions) de chaque snapshot
+-- ============================================
+CREATE TABLE IF NOT EXISTS rate_snapshot_rooms (
+  id TEXT PRIMARY KEY,
+  "snapshotId" TEXT NOT NULL REFERENCES rate_snapshots(id) ON DELETE CASCADE,
+  "hotelId" TEXT NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+  "dateCheckin" DATE NOT NULL,
+  nights INTEGER DEFAULT 1 CHECK (nights > 0),
+  adults INTEGER DEFAULT 2 CHECK (adults > 0),
+  "roomName" TEXT,
+  "ratePlan" TEXT,
+  price FLOAT8 CHECK (price IS NULL OR price >= 0),
+  "originalPrice" FLOAT8,
+  currency TEXT DEFAULT 'EUR',
+  refundable BOOLEAN,
+  "breakfastIncluded" BOOLEAN DEFAULT FALSE,
+  "taxesIncluded" BOOLEAN,
+  position INTEGER,
+  "scrapedAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Migration des bases existantes
+ALTER TABLE rate_snapshot_rooms ADD COLUMN IF NOT EXISTS "taxesIncluded" BOOLEAN;
+
+-- Index
+CREATE INDEX IF NOT EXISTS idx_rate_snapshot_rooms_snapshot ON rate_snapshot_rooms("snapshotId");
+CREATE INDEX IF NOT EXISTS idx_rate_snapshot_rooms_hotel_date ON rate_snapshot_rooms("hotelId", "dateCheckin", "scrapedAt");
+
+-- Commentaires
+COMMENT ON TABLE rate_snapshot_rooms IS 'Chambres et conditions tarifaires extraites de la page du snapshot (même chargement)';
+COMMENT ON COLUMN rate_snapshot_rooms."ratePlan" IS 'Conditions affichées (annulation, repas...), séparées par " · "';
+COMMENT ON COLUMN rate_snapshot_rooms."originalPrice" IS 'Prix barré si une remise est affichée, sinon NULL';
+COMMENT ON COLUMN rate_snapshot_rooms.refundable IS 'true = annulation gratuite, false = non remboursable, NULL = non précisé';
+COMMENT ON COLUMN rate_snapshot_rooms.currency IS 'Devise affichée avec le prix (code ISO, EUR si aucune)';
+COMMENT ON COLUMN rate_snapshot_rooms."taxesIncluded" IS 'true = taxes et frais compris, false = en sus, NULL = non précisé';
+COMMENT ON COLUMN rate_snapshot_rooms.position IS 'Rang de la ligne dans le tableau des chambres (0 = première)';
+
+-- ============================================
+-- TABLE: rate_curves
+-- Courbes de prix compactes: une ligne par (hôtel, run, nuits, adultes)
+-- ============================================
+CREATE TABLE IF NOT EXISTS rate_curves (
+  id TEXT PRIMARY KEY,
+  "hotelId" TEXT NOT NULL REFERENCES hotels(id) ON DELETE CASCADE,
+  "scrapedAt" TIMESTAMP WITH TIME ZONE NOT NULL,
+  nights SMALLINT DEFAULT 1 CHECK (nights > 0),
+  adults SMALLINT DEFAULT 2 CHECK (adults > 0),
+  "startDate" DATE NOT NULL,
+  days SMALLINT NOT NULL CHECK (days > 0),
+  currency TEXT DEFAULT 'EUR',
+  prices BYTEA NOT NULL,
+  available BYTEA NOT NULL,
+  outcomes BYTEA NOT NULL
+);
+
+-- Index (une courbe par run et occupation: conversion rejouable)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rate_curves_run ON rate_curves("hotelId", "scrapedAt", nights, adults);
+
+-- Commentaires
+COMMENT ON TABLE rate_curves IS 'Horizon complet d''un run en tableaux binaires (voir src/database/rate_curves.py)';
+COMMENT ON COLUMN rate_curves."startDate" IS 'Date d''arrivée de l''indice 0 des tableaux';
+COMMENT ON COLUMN rate_curves.prices IS 'int32 little-endian par date: prix en centimes, -1 = pas de prix';
+COMMENT ON COLUMN rate_curves.available IS 'Bitmap: bit i à 1 si la date startDate + i est disponible';
+COMMENT ON COLUMN rate_curves.outcomes IS 'Un octet par date: 0 hors grille, 1 success, 2 sold_out, 3 timeout, 4 blocked, 5 parse_error, 6 error';
 
 -- ============================================
 -- TABLE: scraper_logs
@@ -66,21 +146,99 @@ COMMENT ON COLUMN rate_snapshots.available IS 'false si hôtel complet pour cett
 -- ============================================
 CREATE TABLE IF NOT EXISTS scraper_logs (
   id TEXT PRIMARY KEY,
-  status TEXT NOT NULL CHECK (status IN ('running', 'success', 'error')),
+  status TEXT NOT NULL CHECK (status IN ('running', 'success', 'error', 'cancelled')),
   "hotelId" TEXT REFERENCES hotels(id) ON DELETE SET NULL,
   "snapshotsCreated" INTEGER DEFAULT 0,
   error TEXT,
+  errors JSONB DEFAULT '[]'::jsonb,
+  "durationMs" INTEGER,
+  "hotelsTotal" INTEGER,
+  "hotelsCompleted" INTEGER,
   "startedAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
   "completedAt" TIMESTAMP WITH TIME ZONE
 );
 
+-- Migration des bases existantes
+ALTER TABLE scraper_logs ADD COLUMN IF NOT EXISTS errors JSONB DEFAULT '[]'::jsonb;
+ALTER TABLE scraper_logs ADD COLUMN IF NOT EXISTS "durationMs" INTEGER;
+ALTER TABLE scraper_logs ADD COLUMN IF NOT EXISTS "hotelsTotal" INTEGER;
+ALTER TABLE scraper_logs ADD COLUMN IF NOT EXISTS "hotelsCompleted" INTEGER;
+ALTER TABLE scraper_logs DROP CONSTRAINT IF EXISTS scraper_logs_status_check;
+ALTER TABLE scraper_logs ADD CONSTRAINT scraper_logs_status_check
+  CHECK (status IN ('running', 'success', 'error', 'cancelled'));
+
 -- Index
 CREATE INDEX IF NOT EXISTS idx_scraper_logs_status ON scraper_logs(status);
 CREATE INDEX IF NOT EXISTS idx_scraper_logs_started ON scraper_logs("startedAt" DESC);
 
 -- Commentaires
 COMMENT ON TABLE scraper_logs IS 'Logs d''exécution du scraper pour monitoring';
-COMMENT ON COLUMN scraper_logs.status IS 'running, success, ou error';
+COMMENT ON COLUMN scraper_logs.status IS 'running, success, error, ou cancelled (arrêt demandé, SIGTERM: collecte enregistrée)';
+COMMENT ON COLUMN scraper_logs."hotelsCompleted" IS 'Hôtels dont la grille est allée au bout (sur hotelsTotal)';
+COMMENT ON COLUMN scraper_logs.errors IS 'Liste des erreurs par hôtel (stats[''errors''])';
+
+-- ============================================
+-- TABLE: scraper_hotel_logs
+-- Performance par hôtel pour chaque run (lignes enfants de scraper_logs)
+-- ============================================
+CREATE TABLE IF NOT EXISTS scraper_hotel_logs (
+  id TEXT PRIMARY KEY,
+  "logId" TEXT NOT NULL REFERENCES scraper_logs(id) ON DELETE CASCADE,
+  "hotelId" TEXT REFERENCES hotels(id) ON DELETE CASCADE,
+  "startedAt" TIMESTAMP WITH TIME ZONE NOT NULL,
+  "completedAt" TIMESTAMP WITH TIME ZONE,
+  "durationMs" INTEGER,
+  "pagesLoaded" INTEGER DEFAULT 0,
+  timeouts INTEGER DEFAULT 0,
+  errors INTEGER DEFAULT 0,
+  retries INTEGER DEFAULT 0,
+  rotations INTEGER DEFAULT 0,
+  aborted BOOLEAN DEFAULT FALSE,
+  "cellsPruned" INTEGER DEFAULT 0,
+  "bytesTransferred" BIGINT DEFAULT 0,
+  "unavailableDates" JSONB DEFAULT '[]'::jsonb,
+  "failedDates" JSONB DEFAULT '[]'::jsonb,
+  "dateTimings" JSONB DEFAULT '{}'::jsonb,
+  "errorMessages" JSONB DEFAULT '[]'::jsonb
+);
+
+-- Migration des bases existantes
+ALTER TABLE scraper_hotel_logs ADD COLUMN IF NOT EXISTS rotations INTEGER DEFAULT 0;
+ALTER TABLE scraper_hotel_logs ADD COLUMN IF NOT EXISTS aborted BOOLEAN DEFAULT FALSE;
+ALTER TABLE scraper_hotel_logs ADD COLUMN IF NOT EXISTS "cellsPruned" INTEGER DEFAULT 0;
+
+-- Index
+CREATE INDEX IF NOT EXISTS idx_scraper_hotel_logs_log ON scraper_hotel_logs("logId");
+CREATE INDEX IF NOT EXISTS idx_scraper_hotel_logs_hotel_started ON scraper_hotel_logs("hotelId", "startedAt" DESC);
+
+-- Commentaires
+COMMENT ON TABLE scraper_hotel_logs IS 'Durées, pages, timeouts et octets par hôtel et par run';
+COMMENT ON COLUMN scraper_hotel_logs."dateTimings" IS 'Durée en ms par cellule (date, ou date+NnAa hors séjour de référence)';
+COMMENT ON COLUMN scraper_hotel_logs."cellsPruned" IS 'Cellules déduites complètes sans chargement de page';
+COMMENT ON COLUMN scraper_hotel_logs.aborted IS 'true si l''hôtel a été abandonné (blocage persistant)';
+
+-- ============================================
+-- TABLE: price_alerts
+-- Alertes émises par le moteur de règles après chaque run
+-- ============================================
+CREATE TABLE IF NOT EXISTS price_alerts (
+  id TEXT PRIMARY KEY,
+  rule TEXT NOT NULL,
+  "hotelId" TEXT REFERENCES hotels(id) ON DELETE CASCADE,
+  "dateCheckin" DATE NOT NULL,
+  severity TEXT DEFAULT 'warning',
+  message TEXT NOT NULL,
+  payload JSONB DEFAULT '{}'::jsonb,
+  "createdAt" TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Index
+CREATE INDEX IF NOT EXISTS idx_price_alerts_created ON price_alerts("createdAt" DESC);
+CREATE INDEX IF NOT EXISTS idx_price_alerts_hotel ON price_alerts("hotelId");
+
+-- Commentaires
+COMMENT ON TABLE price_alerts IS 'Alertes de prix (concurrent sous le client, concurrent complet...)';
+COMMENT ON COLUMN price_alerts.rule IS 'Nom de la règle déclenchée';
 
 -- ============================================
 -- FONCTION: Mise à jour automatique de updatedAt
@@ -128,7 +286,7 @@ SELECT
   tablename 
 FROM pg_tables 
 WHERE schemaname = 'public' 
-  AND tablename IN ('hotels', 'rate_snapshots', 'scraper_logs');
+  AND tablename IN ('hotels', 'rate_snapshots', 'rate_snapshot_rooms', 'rate_curves', 'scraper_logs');
 
 -- Vérifier les colonnes de hotels
 SELECT column_name, data_type, is_nullable
@@ -185,6 +343,18 @@ ORDER BY ordinal_position;
 -- ORDER BY "startedAt" DESC
 -- LIMIT 20;
 
+-- p50/p95 du temps de scraping par hôtel (30 derniers jours)
+-- SELECT
+--   h.name,
+--   COUNT(*) as runs,
+--   PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY shl."durationMs") as p50_ms,
+--   PERCENTILE_CONT(0.95) WITHIN GROUP (ORDER BY shl."durationMs") as p95_ms
+-- FROM scraper_hotel_logs shl
+-- JOIN hotels h ON h.id = shl."hotelId"
+-- WHERE shl."startedAt" > NOW() - INTERVAL '30 days'
+-- GROUP BY h.name
+-- ORDER BY p95_ms DESC;
+
 -- ============================================
 -- FIN DU SCRIPT
 -- ============================================
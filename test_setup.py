@@ -14,7 +14,7 @@ def test_imports():
         from src.config import SUPABASE_URL, SUPABASE_SERVICE_KEY
         print("  ✅ Config importée")
         
-        from src.database.supabase_client import supabase_client
+        from src.database.supabase_client import SupabaseClient
         print("  ✅ Client Supabase importé")
         
         from src.scrapers.hotel_info_scraper import scrape_hotel_info
@@ -36,10 +36,11 @@ def test_supabase_connection():
     print("🧪 Test 2: Connexion Supabase...")
     
     try:
-        from src.database.supabase_client import supabase_client
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+        from database import get_storage
         
         # Tenter de récupérer les hôtels
-        hotels = supabase_client.get_monitored_hotels()
+        hotels = get_storage().get_monitored_hotels()
         print(f"  ✅ Connexion OK - {len(hotels)} hôtel(s) trouvé(s)")
         
         for hotel in hotels:
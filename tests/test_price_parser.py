@@ -0,0 +1,38 @@
+"""
+Tests de la lecture des prix (scrapers/price_parser.py) sur le corpus du benchmark
+
+Usage:
+    python -m pytest tests/
+"""
+import json
+import sys
+import os
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT_DIR, "src"))
+from scrapers.price_parser import parse_amount, parse_price
+
+CORPUS_PATH = os.path.join(ROOT_DIR, "benchmarks", "fixtures", "price_corpus.json")
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = json.load(f)
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[repr(case["text"]) for case in CORPUS])
+def test_corpus(case):
+    parsed = parse_price(case["text"])
+    if case["amount"] is None:
+        assert parsed is None
+        return
+    assert parsed is not None
+    assert parsed.amount == case["amount"]
+    assert parsed.currency == case["currency"]
+    if "taxesIncluded" in case:
+        assert parsed.taxes_included == case["taxesIncluded"]
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[repr(case["text"]) for case in CORPUS])
+def test_parse_amount(case):
+    assert parse_amount(case["text"]) == case["amount"]